@@ -0,0 +1,134 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.test import SimpleTestCase, override_settings
+
+from accounts.utils import BrevoAPIBackend
+
+
+class StubBrevoHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append({'api_key': self.headers.get('api-key'), 'body': body})
+        status = 500 if body.get('subject') == 'fail' else 201
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class BrevoAPIBackendTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubBrevoHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests.clear()
+        settings_override = override_settings(
+            BREVO_API_KEY='test-key',
+            BREVO_API_URL=f'http://127.0.0.1:{self.server.server_address[1]}/v3/smtp/email',
+            BREVO_BATCH_SIZE=2,
+            BREVO_MAX_WORKERS=3,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def message(self, to, subject='Reminder', body='Body', from_email='memis@example.com'):
+        return EmailMessage(subject, body, from_email, [to])
+
+    def test_single_message_uses_plain_payload(self):
+        email = EmailMultiAlternatives('Hello', 'Text', 'memis@example.com', ['a@example.com'])
+        email.attach_alternative('<p>Html</p>', 'text/html')
+
+        self.assertEqual(BrevoAPIBackend().send_messages([email]), 1)
+
+        [request] = self.server.requests
+        self.assertEqual(request['api_key'], 'test-key')
+        self.assertEqual(request['body']['to'], [{'email': 'a@example.com'}])
+        self.assertEqual(request['body']['htmlContent'], '<p>Html</p>')
+        self.assertNotIn('messageVersions', request['body'])
+
+    def test_messages_are_batched_per_sender(self):
+        messages = [
+            self.message('a@example.com'),
+            self.message('b@example.com', subject='Other'),
+            self.message('c@example.com'),
+            self.message('d@example.com', from_email='alerts@example.com'),
+        ]
+
+        self.assertEqual(BrevoAPIBackend().send_messages(messages), 4)
+
+        bodies = sorted((r['body'] for r in self.server.requests), key=lambda b: b['sender']['email'])
+        self.assertEqual(len(bodies), 3)
+        self.assertEqual(bodies[0]['sender'], {'email': 'alerts@example.com'})
+
+        # Only the messages that differ in nothing but their recipients share a request.
+        batched = next(b for b in bodies if 'messageVersions' in b)
+        self.assertEqual(batched['subject'], 'Reminder')
+        self.assertEqual(batched['messageVersions'], [
+            {'to': [{'email': 'a@example.com'}]},
+            {'to': [{'email': 'c@example.com'}]},
+        ])
+        other = next(b for b in bodies if b.get('subject') == 'Other')
+        self.assertEqual(other['to'], [{'email': 'b@example.com'}])
+
+    def test_html_and_text_messages_are_not_mixed(self):
+        html = EmailMultiAlternatives('Reminder', 'Body', 'memis@example.com', ['a@example.com'])
+        html.attach_alternative('<b>secret for a</b>', 'text/html')
+        messages = [html, self.message('b@example.com'), self.message('c@example.com')]
+
+        self.assertEqual(BrevoAPIBackend().send_messages(messages), 3)
+
+        bodies = [r['body'] for r in self.server.requests]
+        self.assertEqual(len(bodies), 2)
+        text = next(b for b in bodies if 'messageVersions' in b)
+        self.assertNotIn('htmlContent', text)
+        self.assertEqual(text['messageVersions'], [{'to': [{'email': 'b@example.com'}]}, {'to': [{'email': 'c@example.com'}]}])
+        single = next(b for b in bodies if 'messageVersions' not in b)
+        self.assertEqual(single['to'], [{'email': 'a@example.com'}])
+        self.assertEqual(single['htmlContent'], '<b>secret for a</b>')
+
+    def test_message_with_cc_is_sent_on_its_own(self):
+        copied = EmailMessage(
+            'Reminder', 'Body', 'memis@example.com', ['a@example.com'], cc=['boss@example.com'],
+            reply_to=['desk@example.com']
+        )
+        copied.attach('report.txt', 'contents', 'text/plain')
+        messages = [copied, self.message('b@example.com'), self.message('c@example.com')]
+
+        self.assertEqual(BrevoAPIBackend().send_messages(messages), 3)
+
+        bodies = [r['body'] for r in self.server.requests]
+        self.assertEqual(len(bodies), 2)
+        single = next(b for b in bodies if 'messageVersions' not in b)
+        self.assertEqual(single['to'], [{'email': 'a@example.com'}])
+        self.assertEqual(single['cc'], [{'email': 'boss@example.com'}])
+        self.assertEqual(single['replyTo'], {'email': 'desk@example.com'})
+        self.assertEqual(single['attachment'], [{'name': 'report.txt', 'content': 'Y29udGVudHM='}])
+        batched = next(b for b in bodies if 'messageVersions' in b)
+        self.assertNotIn('cc', batched)
+
+    def test_failed_batch_is_not_counted(self):
+        messages = [
+            self.message('a@example.com', subject='fail'),
+            self.message('b@example.com', subject='fail'),
+            self.message('c@example.com'),
+        ]
+        self.assertEqual(BrevoAPIBackend().send_messages(messages), 1)
+        self.assertEqual([message.accepted for message in messages], [False, False, True])
@@ -1,17 +1,72 @@
+import base64
 import requests
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.core.mail.backends.base import BaseEmailBackend
 from django.conf import settings
 from django.core.mail import EmailMessage
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BREVO_API_URL = "https://api.brevo.com/v3/smtp/email"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_brevo_session():
+    """
+    Return the process-wide requests.Session used for Brevo calls.
+
+    The session keeps connections alive between sends, so a burst of emails
+    shares a handful of TLS connections instead of opening one per message.
+    Only retries that can't send an email twice are made: failed connections
+    and 429 responses (the request was rejected, not processed). A gateway
+    error or read timeout may come after Brevo accepted the email, so those
+    are not retried.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = max(getattr(settings, 'BREVO_MAX_WORKERS', 4), 1)
+                retry = Retry(
+                    total=3,
+                    read=0,
+                    backoff_factor=0.5,
+                    status_forcelist=(429,),
+                    allowed_methods=frozenset(['POST']),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    "accept": "application/json",
+                    "content-type": "application/json",
+                })
+                _session = session
+    return _session
+
 
 class BrevoAPIBackend(BaseEmailBackend):
 
     def send_messages(self, email_messages):
         """
         Send one or more EmailMessage objects and return the number of emails successfully sent.
+
+        Messages that differ only in their recipients are grouped into Brevo
+        ``messageVersions`` batches of up to BREVO_BATCH_SIZE messages; any other
+        message is sent on its own. The resulting requests are posted concurrently
+        over the pooled session (at most BREVO_MAX_WORKERS at a time).
+
+        Each message's `accepted` attribute is set to whether Brevo took it, so
+        callers can tell which messages of a partly failed send to retry.
         """
         if not email_messages:
             return 0
@@ -20,24 +75,79 @@ class BrevoAPIBackend(BaseEmailBackend):
             logger.error("Brevo API Key is missing in settings.")
             return 0
 
-        sent_count = 0
+        batches = self._build_batches(email_messages)
+        max_workers = min(getattr(settings, 'BREVO_MAX_WORKERS', 4), len(batches))
 
+        if max_workers <= 1:
+            return sum(self._send_batch(batch) for batch in batches)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return sum(executor.map(self._send_batch, batches))
+
+    def _batch_key(self, message):
+        """
+        Messages with equal keys are identical apart from `to` and can share a
+        ``messageVersions`` request. Returns None for a message that must be
+        sent on its own (cc/bcc, reply-to, attachments, extra headers or
+        alternatives other than one HTML part).
+        """
+        alternatives = list(getattr(message, 'alternatives', []))
+        if (
+            message.cc or message.bcc or message.reply_to or message.attachments or message.extra_headers
+            or len(alternatives) > 1 or any(mimetype != 'text/html' for _, mimetype in alternatives)
+        ):
+            return None
+        return (message.from_email or '', message.subject, message.body, self._html_content(message) or '')
+
+    def _build_batches(self, email_messages):
+        """
+        Split messages into lists that can each go out in a single API call.
+        """
+        batch_size = max(getattr(settings, 'BREVO_BATCH_SIZE', 100), 1)
+        groups = {}
+        batches = []
         for message in email_messages:
-            response = self._send_email_via_brevo(message)
-            if response and response.status_code == 201:  # 201 is for successful email creation
-                sent_count += 1
+            key = self._batch_key(message)
+            if key is None:
+                batches.append([message])
             else:
-                logger.error(f"Failed to send email to {message.to}. Status code: {response.status_code if response else 'No Response'}")
+                groups.setdefault(key, []).append(message)
+        for messages in groups.values():
+            batches.extend(
+                messages[start:start + batch_size] for start in range(0, len(messages), batch_size)
+            )
+        return batches
+
+    def _send_batch(self, messages):
+        """
+        Send a list of messages built by _build_batches() and return how many were accepted.
+        """
+        if len(messages) == 1:
+            data = self._build_payload(messages[0])
+        else:
+            data = self._build_batch_payload(messages)
 
-        return sent_count
+        response = self._post(data)
+        accepted = response is not None and response.status_code == 201  # 201 is for successful email creation
+        for message in messages:
+            message.accepted = accepted
+        if accepted:
+            return len(messages)
+
+        recipients = [recipient for message in messages for recipient in message.to]
+        logger.error(f"Failed to send email to {recipients}. Status code: {response.status_code if response is not None else 'No Response'}")
+        return 0
 
     def _send_email_via_brevo(self, message: EmailMessage):
         """
         Helper method to send an individual email message using the Brevo API.
         """
-        api_key = settings.BREVO_API_KEY
+        return self._post(self._build_payload(message))
 
-        # Prepare the email payload
+    def _build_payload(self, message: EmailMessage):
+        """
+        Build the single-message payload for an EmailMessage.
+        """
         data = {
             "sender": {"email": message.from_email},
             "to": [{"email": recipient} for recipient in message.to],
@@ -46,24 +156,62 @@ class BrevoAPIBackend(BaseEmailBackend):
         }
 
         # Add the HTML content if available
-        html_content = next((content for content, mimetype in getattr(message, 'alternatives', []) if mimetype == 'text/html'), None)
+        html_content = self._html_content(message)
         if html_content:
             data['htmlContent'] = html_content
+        if message.cc:
+            data['cc'] = [{"email": recipient} for recipient in message.cc]
+        if message.bcc:
+            data['bcc'] = [{"email": recipient} for recipient in message.bcc]
+        if message.reply_to:
+            data['replyTo'] = {"email": message.reply_to[0]}
+        if message.extra_headers:
+            data['headers'] = dict(message.extra_headers)
+        if message.attachments:
+            data['attachment'] = [self._attachment(attachment) for attachment in message.attachments]
+        return data
+
+    def _build_batch_payload(self, messages):
+        """
+        Build a ``messageVersions`` payload for messages that differ only in
+        their recipients (see _batch_key): one version per message.
+        """
+        base = self._build_payload(messages[0])
+        del base['to']
+        base['messageVersions'] = [
+            {"to": [{"email": recipient} for recipient in message.to]} for message in messages
+        ]
+        return base
+
+    @staticmethod
+    def _attachment(attachment):
+        # EmailMessage.attachments holds (filename, content, mimetype) tuples or MIME parts.
+        if isinstance(attachment, tuple):
+            filename, content = attachment[0], attachment[1]
+        else:
+            filename, content = attachment.get_filename(), attachment.get_payload(decode=True)
+        if isinstance(content, str):
+            content = content.encode()
+        return {"name": filename, "content": base64.b64encode(content).decode()}
+
+    @staticmethod
+    def _html_content(message):
+        return next((content for content, mimetype in getattr(message, 'alternatives', []) if mimetype == 'text/html'), None)
 
+    def _post(self, data):
+        """
+        POST a payload to Brevo over the pooled session.
+        """
         # Log the outgoing data (without sensitive info like API keys)
-        logger.info(f"Sending email via Brevo with subject: {message.subject}, recipients: {message.to}")
+        recipient_count = len(data.get('messageVersions', [data]))
+        logger.info(f"Sending {recipient_count} email(s) via Brevo with subject: {data.get('subject')}")
 
         try:
-            # Send the email via Brevo API with timeout for better reliability
-            response = requests.post(
-                "https://api.brevo.com/v3/smtp/email",
-                headers={
-                    "accept": "application/json",
-                    "api-key": api_key,
-                    "content-type": "application/json",
-                },
+            response = get_brevo_session().post(
+                getattr(settings, 'BREVO_API_URL', DEFAULT_BREVO_API_URL),
+                headers={"api-key": settings.BREVO_API_KEY},
                 json=data,  # Send data as JSON
-                timeout=10  # Timeout of 10 seconds
+                timeout=getattr(settings, 'BREVO_TIMEOUT', 10)
             )
 
             # Log response success or error
@@ -22,6 +22,7 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
 
 from django_rest_passwordreset.views import ResetPasswordRequestToken
 
+from dashboard.models import AggregateCounter
 from .permissions import IsAdminOrSuperAdmin
 from .serializers import (
     CustomTokenObtainPairSerializer,
@@ -626,6 +627,6 @@ def total_users_view(request):
     
     Only accessible by Admins and Superusers.
     """
-    total_users = User.objects.count()
+    total_users = AggregateCounter.get_value('users:total')
     logger.info(f"User {request.user.get_full_name()} retrieved total user count: {total_users}.")
     return Response({"total_users": total_users})
\ No newline at end of file
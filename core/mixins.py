@@ -0,0 +1,100 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET (ETag / Last-Modified) for generic list and detail views
+    over TimeStampedModel querysets.
+
+    Before anything is serialized, one aggregate query over the filtered
+    queryset fetches Max('modified') and the row count. Together with the full
+    request path (filters, pagination cursor, ?fields) and the user they form
+    the ETag, so a poll that finds nothing changed is answered with 304 Not
+    Modified. Deletions change the count, edits and inserts change the
+    timestamp.
+
+    Views whose representation includes data from related rows can list the
+    related timestamp fields in `conditional_related_fields`
+    (e.g. ('supplier__modified', 'added_by__updated_at')) so edits there also
+    invalidate the ETag.
+    Bulk updates must set `modified` themselves.
+    """
+    conditional_related_fields = ()
+
+    def is_detail_request(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail_request():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_validators(self):
+        """
+        Return (etag, last_modified, row_count) for the current request.
+        """
+        aggregates = {'last_modified': Max('modified'), 'row_count': Count('pk')}
+        for index, field in enumerate(self.conditional_related_fields):
+            aggregates[f'related_{index}'] = Max(field)
+        values = self.get_conditional_queryset().order_by().aggregate(**aggregates)
+
+        timestamps = [value for key, value in values.items() if key != 'row_count' and value is not None]
+        last_modified = max(timestamps) if timestamps else None
+
+        parts = [
+            self.request.get_full_path(),
+            str(self.request.user.pk),
+            self.request.accepted_media_type or '',
+            str(values['row_count']),
+        ] + [values[key].isoformat() if values[key] else '' for key in sorted(values) if key != 'row_count']
+        etag = 'W/"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return etag, last_modified, values['row_count']
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Weak comparison, as RFC 9110 requires for If-None-Match.
+            candidates = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+            return '*' in candidates or etag.removeprefix('W/') in candidates
+
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if if_modified_since is not None and last_modified is not None:
+            return int(last_modified.timestamp()) <= if_modified_since
+        return False
+
+    def set_conditional_headers(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Clients may keep the response but must revalidate it on every use.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified, row_count = self.get_conditional_validators()
+        if row_count == 0 and self.is_detail_request():
+            # Let the normal path produce its 404.
+            return handler(request, *args, **kwargs)
+        if self.is_not_modified(request, etag, last_modified):
+            return self.set_conditional_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.set_conditional_headers(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,124 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    CursorPagination positioned on the whole ordering, not just its first field.
+
+    DRF's cursor records the first ordering field and falls back to an offset
+    among rows that tie on it, so a row inserted or moved while a client pages
+    through tied rows makes later pages repeat or skip rows. Here the position
+    is the value of every ordering field (with the primary key appended as a
+    tie-breaker), so positions are unique, offsets stay 0 and each page is a
+    plain range condition on the ordering index. Ordering fields must be
+    non-null, non-relational columns of the model; views that let clients
+    choose the ordering must limit `ordering_fields` to such columns.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        pk_name = queryset.model._meta.pk.name
+        for field in ordering:
+            name = field.lstrip('-')
+            if name == 'pk':
+                continue
+            try:
+                model_field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or model_field.null or model_field.is_relation:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__} cannot order on '{name}'; keyset ordering fields "
+                    f"must be non-null columns of {queryset.model.__name__}."
+                )
+        if not {pk_name, 'pk'} & {field.lstrip('-') for field in ordering}:
+            ordering += (f'-{pk_name}' if ordering[0].startswith('-') else pk_name,)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(queryset.model, current_position, reverse))
+
+        # Fetch one extra row to learn whether a following page exists.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = (current_position is not None) or (offset > 0)
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_keyset_filter(self, model, position, reverse):
+        """
+        Rows strictly after `position` in the (possibly reversed) ordering:
+        (a < x) OR (a = x AND b < y) OR ..., with < or > per field direction.
+        """
+        pk_name = model._meta.pk.name
+        fields = [pk_name if field.lstrip('-') == 'pk' else field.lstrip('-') for field in self.ordering]
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            values = [model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)]
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        conditions = []
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            equal = {name: value for name, value in zip(fields[:index], values[:index])}
+            lookup = f"{fields[index]}__{'lt' if descending else 'gt'}"
+            conditions.append(Q(**equal, **{lookup: values[index]}))
+        return reduce(or_, conditions)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[field.lstrip('-')] if isinstance(instance, dict) else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        ]
+        # Full-precision ISO dates (DjangoJSONEncoder would drop microseconds), str() for the rest.
+        return json.dumps(
+            values, separators=(',', ':'), default=lambda value: getattr(value, 'isoformat', value.__str__)()
+        )
@@ -57,6 +57,10 @@ FRONTEND_URL = 'https://memis-project.vercel.app'
 # Mailgun API configuration
 BREVO_API_KEY = env('BREVO_API_KEY')
 BREVO_DOMAIN = env('BREVO_DOMAIN')
+BREVO_API_URL = env('BREVO_API_URL', default='https://api.brevo.com/v3/smtp/email')
+BREVO_TIMEOUT = env.float('BREVO_TIMEOUT', default=10)
+BREVO_MAX_WORKERS = env.int('BREVO_MAX_WORKERS', default=4)
+BREVO_BATCH_SIZE = env.int('BREVO_BATCH_SIZE', default=100)
 
 # Default email settings
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='memis@melarc.me')
@@ -95,13 +99,46 @@ CELERY_WORKER_REDIRECT_STDOUTS_LEVEL = 'DEBUG'
 
 CELERY_BROKER_URL = env('REDISCLOUD_URL')
 CELERY_BEAT_SCHEDULE = {
-    # Example: runs every 60 seconds
-    'check-maintenance-schedules': {
-        'task': 'maintenance.tasks.check_maintenance_schedules',
+    # Claim schedules that are due for a reminder and send them in batches
+    'dispatch-maintenance-reminders': {
+        'task': 'equipment.tasks.dispatch_due_maintenance_reminders',
         'schedule': 60.0,
     },
+    # Move next_occurrence past occurrences that have already happened
+    'refresh-stale-next-occurrences': {
+        'task': 'equipment.tasks.refresh_stale_next_occurrences',
+        'schedule': 300.0,
+    },
+    # Keep materialized maintenance occurrences ahead of the calendar
+    'extend-maintenance-occurrence-horizon': {
+        'task': 'equipment.tasks.extend_maintenance_occurrence_horizon',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    # Correct dashboard counter drift from concurrent edits of the same row
+    'reconcile-dashboard-counters': {
+        'task': 'dashboard.tasks.reconcile_counters',
+        'schedule': crontab(minute='*/15'),
+    },
 }
 
+# How far ahead (in days) recurring maintenance occurrences are materialized
+MAINTENANCE_OCCURRENCE_HORIZON_DAYS = 365
+
+# Maintenance reminders are sent this many hours before an occurrence
+MAINTENANCE_REMINDER_LEAD_HOURS = 24
+# Number of schedules claimed per reminder batch
+MAINTENANCE_REMINDER_BATCH_SIZE = 100
+# Sends of one occurrence's reminder that may fail before it is given up on
+MAINTENANCE_REMINDER_MAX_ATTEMPTS = 5
+# A scheduled occurrence counts as done if a matching report is logged within this many days of it
+MAINTENANCE_COMPLIANCE_TOLERANCE_DAYS = 7
+# Seconds a computed compliance report is cached (occurrences become due as time passes)
+MAINTENANCE_COMPLIANCE_CACHE_TIMEOUT = 900
+# Rows validated and inserted per transaction by the bulk equipment import
+EQUIPMENT_IMPORT_CHUNK_SIZE = 500
+# Rows fetched per database round trip by the streaming CSV/NDJSON exports
+EXPORT_CHUNK_SIZE = 2000
+
 
 
 
@@ -168,7 +205,8 @@ INSTALLED_APPS = [
     'accounts.apps.AccountsConfig',
     'equipment.apps.EquipmentConfig',
     'inventory.apps.InventoryConfig',
-    'notification.apps.NotificationConfig',    
+    'notification.apps.NotificationConfig',
+    'dashboard.apps.DashboardConfig',    
 ]
 
 MIDDLEWARE = [
@@ -209,6 +247,10 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'API Documentation for MEMIS',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
+    # Equipment statuses appear on several models; give them one schema name
+    'ENUM_NAME_OVERRIDES': {
+        'OperationalStatusEnum': 'equipment.models.Equipment.OPERATIONAL_STATUS',
+    },
 }
 
 DJANGO_REST_PASSWORDRESET_TOKEN_CONFIG = {
@@ -229,6 +271,26 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Batched WebSocket notifications (wss/notifications/batched/): flush after
+# this many seconds or this many buffered events, whichever comes first.
+NOTIFICATION_BATCH_WINDOW = 0.25
+NOTIFICATION_BATCH_SIZE = 20
+
+# Seconds a cached unread-notification count lives before it is recounted
+NOTIFICATION_UNREAD_COUNT_TIMEOUT = 3600
+
+# Shared by the web (daphne) and Celery processes: snapshot versions, unread
+# counts and report versions are written in one and read in the other, so the
+# cache must not be per-process. Defaults to the Redis instance used above.
+CACHES = {
+    'default': env.cache('CACHE_URL', default=REDIS_URL),
+}
+
+# Dashboard snapshot (/api/dashboard/snapshot/): a stale snapshot younger than
+# MIN_AGE seconds is still served, so bursts of writes cause a single rebuild.
+DASHBOARD_SNAPSHOT_MIN_AGE = 5
+DASHBOARD_SNAPSHOT_TIMEOUT = 3600
+
 
 
 # Cloudinary storage configuration using environment variables
@@ -27,6 +27,7 @@ urlpatterns = [
     path('api/', include('inventory.urls')),
     path('api/', include('accounts.urls')),	
     path('api/', include('notification.urls')),
+    path('api/', include('dashboard.urls')),
     
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
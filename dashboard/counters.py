@@ -0,0 +1,155 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from equipment.models import Equipment
+from inventory.models import Item
+
+from .models import AggregateCounter
+
+User = get_user_model()
+
+
+class CounterSpec:
+    """
+    Which counters a model feeds: a row count under "<name>:total", one
+    counter per value of each grouped field ("<name>:<label>:<value>") and
+    running sums of numeric fields ("<name>:<label>").
+    """
+
+    def __init__(self, name, group_fields=None, sum_fields=None):
+        self.name = name
+        self.group_fields = group_fields or {}
+        self.sum_fields = sum_fields or {}
+        self.fields = tuple(self.group_fields) + tuple(self.sum_fields)
+
+    @property
+    def total_key(self):
+        return f"{self.name}:total"
+
+    def group_key(self, field, value):
+        return f"{self.name}:{self.group_fields[field]}:{value}"
+
+    def sum_key(self, field):
+        return f"{self.name}:{self.sum_fields[field]}"
+
+    def capture(self, instance):
+        # Read from __dict__ so deferred fields are skipped rather than fetched.
+        return {field: instance.__dict__[field] for field in self.fields if field in instance.__dict__}
+
+    def deltas(self, old, new):
+        """
+        Counter changes for a row going from `old` to `new` captured values;
+        None stands for "row doesn't exist" (before a create, after a delete).
+        """
+        result = defaultdict(int)
+        if old is None and new is None:
+            return result
+        if old is None or new is None:
+            result[self.total_key] += 1 if old is None else -1
+            fields = set(old if new is None else new)
+        else:
+            # Only compare fields known on both sides.
+            fields = set(old) & set(new)
+
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            for field in fields:
+                if field in self.group_fields:
+                    result[self.group_key(field, values[field])] += sign
+                else:
+                    result[self.sum_key(field)] += sign * (values[field] or 0)
+        return result
+
+    def compute(self, model):
+        """
+        Recompute this spec's counters from the table, two queries per grouped field.
+        """
+        queryset = model._default_manager.order_by()
+        totals = queryset.aggregate(
+            total=Count('pk'),
+            **{f"sum_{field}": Sum(field) for field in self.sum_fields}
+        )
+        counts = {self.total_key: totals['total']}
+        for field in self.sum_fields:
+            counts[self.sum_key(field)] = totals[f"sum_{field}"] or 0
+        for field in self.group_fields:
+            for row in queryset.values(field).annotate(n=Count('pk')):
+                counts[self.group_key(field, row[field])] = row['n']
+        return counts
+
+
+COUNTER_SPECS = {
+    Equipment: CounterSpec(
+        'equipment',
+        group_fields={'operational_status': 'status', 'device_type': 'type', 'department': 'department'}
+    ),
+    Item: CounterSpec('inventory', sum_fields={'quantity': 'stock'}),
+    User: CounterSpec('users', group_fields={'user_role': 'role'}),
+}
+
+
+def record_created(instances):
+    """
+    Count rows inserted with bulk_create, which doesn't send post_save.
+    """
+    deltas = defaultdict(int)
+    for instance in instances:
+        spec = COUNTER_SPECS[type(instance)]
+        for key, delta in spec.deltas(None, spec.capture(instance)).items():
+            deltas[key] += delta
+    AggregateCounter.add(deltas)
+
+
+def update_counted(queryset, **values):
+    """
+    queryset.update(**values) that keeps the grouped counters in step. The
+    rows being moved are counted per old value first, in the same transaction.
+    """
+    spec = COUNTER_SPECS[queryset.model]
+    deltas = defaultdict(int)
+    with transaction.atomic():
+        for field, new_value in values.items():
+            if field not in spec.group_fields:
+                continue
+            moved = queryset.exclude(**{field: new_value}).values(field).annotate(n=Count('pk')).order_by()
+            for row in moved:
+                deltas[spec.group_key(field, row[field])] -= row['n']
+                deltas[spec.group_key(field, new_value)] += row['n']
+        updated = queryset.update(**values)
+        AggregateCounter.add(deltas)
+    return updated
+
+
+def compute_all():
+    counts = {}
+    for model, spec in COUNTER_SPECS.items():
+        counts.update(spec.compute(model))
+    return counts
+
+
+def reconcile():
+    """
+    Correct every counter from the source tables. Returns {key: (old, new)}
+    for the counters that had drifted.
+
+    The counter rows are locked before the recount. A writer that already
+    moved a counter commits (and is counted) first; one that hasn't yet
+    waits for the corrections and then adds its own delta on top. The
+    corrections go through AggregateCounter.add() as F() deltas, so an
+    increment that slips in meanwhile (e.g. on a counter created after the
+    lock) is kept rather than overwritten.
+    """
+    with transaction.atomic():
+        current = dict(AggregateCounter.objects.select_for_update().order_by('key').values_list('key', 'value'))
+        counts = compute_all()
+        drift = {
+            key: (current.get(key, 0), counts.get(key, 0))
+            for key in set(counts) | set(current)
+            if current.get(key, 0) != counts.get(key, 0)
+        }
+        AggregateCounter.add({key: new - old for key, (old, new) in drift.items()})
+    return drift
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from dashboard.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every AggregateCounter from the equipment, inventory and user tables. "
+        "Use after raw SQL or other writes that bypass the model signals."
+    )
+
+    def handle(self, *args, **options):
+        drift = reconcile()
+        for key, (old, new) in sorted(drift.items()):
+            self.stdout.write(f"{key}: {old} -> {new}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters: {len(drift)} corrected."))
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def seed_counters(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    Item = apps.get_model('inventory', 'Item')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    AggregateCounter = apps.get_model('dashboard', 'AggregateCounter')
+
+    counts = {
+        'equipment:total': Equipment.objects.count(),
+        'users:total': User.objects.count(),
+    }
+    for field, label in (('operational_status', 'status'), ('device_type', 'type'), ('department', 'department')):
+        for row in Equipment.objects.values(field).annotate(n=Count('pk')).order_by():
+            counts[f'equipment:{label}:{row[field]}'] = row['n']
+    inventory = Item.objects.aggregate(total=Count('pk'), stock=Sum('quantity'))
+    counts['inventory:total'] = inventory['total']
+    counts['inventory:stock'] = inventory['stock'] or 0
+    for row in User.objects.values('user_role').annotate(n=Count('pk')).order_by():
+        counts[f'users:role:{row["user_role"]}'] = row['n']
+
+    AggregateCounter.objects.bulk_create([AggregateCounter(key=key, value=value) for key, value in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('equipment', '0007_equipmentidsequence'),
+        ('inventory', '0002_alter_item_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AggregateCounter',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
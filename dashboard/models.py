@@ -0,0 +1,64 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+
+
+class AggregateCounter(models.Model):
+    """
+    Running totals keyed by name, e.g. "equipment:total", "equipment:status:functional",
+    "inventory:stock" or "users:role:2".
+
+    Counters are adjusted with F() increments by the signals in dashboard.signals
+    (and by the bulk code paths that bypass them), so reading a total is a
+    primary-key lookup instead of an aggregate over the source table.
+    `manage.py reconcile_counters` and the periodic task of the same name
+    recompute them from scratch.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+    @classmethod
+    def add(cls, deltas):
+        """
+        Atomically apply a {key: delta} mapping with a single UPDATE; counters
+        that don't exist yet are created at zero first.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        if cls._increment(deltas) == len(deltas):
+            return
+        with transaction.atomic():
+            existing = set(cls.objects.filter(key__in=deltas).values_list('key', flat=True))
+            missing = {key: delta for key, delta in deltas.items() if key not in existing}
+            # Another writer may create the same counters meanwhile; ignore_conflicts lets both add to them.
+            cls.objects.bulk_create([cls(key=key, value=0) for key in missing], ignore_conflicts=True)
+            cls._increment(missing)
+
+    @classmethod
+    def _increment(cls, deltas):
+        return cls.objects.filter(key__in=deltas).update(
+            value=F('value') + Case(
+                *(When(key=key, then=Value(delta)) for key, delta in deltas.items()),
+                default=Value(0),
+                output_field=models.BigIntegerField()
+            )
+        )
+
+    @classmethod
+    def get_value(cls, key):
+        return cls.objects.filter(key=key).values_list('value', flat=True).first() or 0
+
+    @classmethod
+    def get_group(cls, prefix):
+        """
+        Return {suffix: value} for every non-zero counter under `prefix`,
+        e.g. get_group('equipment:status') -> {'functional': 12, ...}.
+        """
+        start = f"{prefix}:"
+        return {
+            key[len(start):]: value
+            for key, value in cls.objects.filter(key__startswith=start, value__gt=0).values_list('key', 'value')
+        }
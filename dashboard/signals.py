@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from equipment.models import Equipment, EquipmentMaintenanceActivity
+from inventory.models import Item
+
+from .counters import COUNTER_SPECS
+from .models import AggregateCounter
+from .snapshot import invalidate_snapshot
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_save, sender=EquipmentMaintenanceActivity)
+@receiver(post_delete, sender=EquipmentMaintenanceActivity)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_dashboard_snapshot(sender, **kwargs):
+    """
+    Mark the cached dashboard snapshot stale whenever one of its sources changes.
+    """
+    invalidate_snapshot()
+
+
+def remember_counted_values(sender, instance, **kwargs):
+    """
+    Keep the counted field values as loaded, so a later save can tell which
+    counters to move.
+
+    The deltas are taken against these loaded values, not the row the UPDATE
+    replaced: if two requests edit the same row concurrently, both move it out
+    of the value they loaded and the counters drift. The reconcile_counters
+    beat task (dashboard.tasks) recomputes them every 15 minutes.
+    """
+    instance._counted_values = COUNTER_SPECS[sender].capture(instance)
+
+
+def update_counters_on_save(sender, instance, created, update_fields=None, **kwargs):
+    spec = COUNTER_SPECS[sender]
+    new = spec.capture(instance)
+    if created:
+        old = None
+    else:
+        old = getattr(instance, '_counted_values', None)
+        if old is None:
+            return
+        if update_fields is not None:
+            old = {field: value for field, value in old.items() if field in update_fields}
+            new = {field: value for field, value in new.items() if field in update_fields}
+    AggregateCounter.add(spec.deltas(old, new))
+    instance._counted_values = {**getattr(instance, '_counted_values', {}), **new}
+
+
+def update_counters_on_delete(sender, instance, **kwargs):
+    spec = COUNTER_SPECS[sender]
+    old = getattr(instance, '_counted_values', None) or spec.capture(instance)
+    AggregateCounter.add(spec.deltas(old, None))
+
+
+for model in COUNTER_SPECS:
+    post_init.connect(remember_counted_values, sender=model, dispatch_uid=f'counted_values_{model._meta.label}')
+    post_save.connect(update_counters_on_save, sender=model, dispatch_uid=f'counters_save_{model._meta.label}')
+    post_delete.connect(update_counters_on_delete, sender=model, dispatch_uid=f'counters_delete_{model._meta.label}')
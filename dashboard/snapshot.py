@@ -0,0 +1,139 @@
+import datetime
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from equipment.models import MaintenanceDailyRollup
+
+from .models import AggregateCounter
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'dashboard:snapshot'
+VERSION_KEY = 'dashboard:snapshot:version'
+LOCK_KEY = 'dashboard:snapshot:lock'
+
+OVERVIEW_DAYS = 30
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # First change since the cache was cleared; any value the snapshot wasn't built at will do.
+        cache.set(VERSION_KEY, int(time.time()), timeout=None)
+
+
+def invalidate_snapshot():
+    """
+    Mark the cached snapshot as stale once the current transaction commits.
+
+    This only bumps a version number; the snapshot itself is rebuilt lazily by
+    the next request, so a burst of writes costs one rebuild, not one per write.
+    """
+    transaction.on_commit(_bump_version)
+
+
+def current_version():
+    # Seeded from the clock, not 1: after an eviction a restarted counter could
+    # match the version a still-cached stale snapshot was built at.
+    return cache.get_or_set(VERSION_KEY, lambda: int(time.time()), timeout=None)
+
+
+def build_snapshot():
+    """
+    Compute every dashboard figure in two queries: one read of the aggregate
+    counters (equipment, inventory and user totals) and one read of the
+    maintenance daily rollup.
+    """
+    counters = dict(AggregateCounter.objects.values_list('key', 'value'))
+
+    def group(prefix):
+        start = f"{prefix}:"
+        return {key[len(start):]: value for key, value in counters.items() if key.startswith(start) and value > 0}
+
+    status_summary = group('equipment:status')
+    total_equipment = sum(status_summary.values())
+    status_summary['total_equipment'] = total_equipment
+
+    end_date = timezone.localdate()
+    start_date = end_date - datetime.timedelta(days=OVERVIEW_DAYS)
+    data_by_day = defaultdict(lambda: {
+        'preventive maintenance': 0,
+        'repair': 0,
+        'calibration': 0
+    })
+    rollup = (
+        MaintenanceDailyRollup.objects
+        .filter(day__gte=start_date, day__lte=end_date, count__gt=0)
+        .values('day', 'activity_type')
+        .annotate(count=Sum('count'))
+        .order_by('day')
+    )
+    for row in rollup:
+        data_by_day[row['day']][row['activity_type']] = row['count']
+
+    return {
+        'total_equipment': total_equipment,
+        'equipment_status_summary': status_summary,
+        'equipment_type_summary': group('equipment:type'),
+        'inventory': {
+            'total_items': counters.get('inventory:total', 0),
+            'total_stock': counters.get('inventory:stock', 0),
+        },
+        'total_users': counters.get('users:total', 0),
+        'maintenance_overview': [
+            {
+                'date': day.strftime('%Y-%m-%d'),
+                'preventive_maintenance': data_by_day[day]['preventive maintenance'],
+                'repair': data_by_day[day]['repair'],
+                'calibration': data_by_day[day]['calibration'],
+            }
+            for day in sorted(data_by_day)
+        ],
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def get_snapshot():
+    """
+    Return the dashboard snapshot, rebuilding it at most once per version.
+
+    While one request holds the rebuild lock, concurrent requests get the
+    previous snapshot instead of piling on the database. A snapshot younger
+    than DASHBOARD_SNAPSHOT_MIN_AGE seconds is served even if it is stale, so
+    a steady stream of writes doesn't trigger a rebuild on every page load.
+    """
+    version = current_version()
+    cached = cache.get(SNAPSHOT_KEY)
+    if cached and cached['version'] == version:
+        return cached['data']
+
+    min_age = getattr(settings, 'DASHBOARD_SNAPSHOT_MIN_AGE', 5)
+    if cached and time.time() - cached['built_at'] < min_age:
+        return cached['data']
+
+    lock_timeout = getattr(settings, 'DASHBOARD_SNAPSHOT_LOCK_TIMEOUT', 30)
+    if not cache.add(LOCK_KEY, version, timeout=lock_timeout):
+        if cached:
+            return cached['data']
+        # Nothing to fall back on yet; build without caching.
+        return build_snapshot()
+
+    try:
+        data = build_snapshot()
+        cache.set(
+            SNAPSHOT_KEY,
+            {'version': version, 'built_at': time.time(), 'data': data},
+            timeout=getattr(settings, 'DASHBOARD_SNAPSHOT_TIMEOUT', 3600)
+        )
+        logger.debug(f"Rebuilt dashboard snapshot at version {version}.")
+        return data
+    finally:
+        cache.delete(LOCK_KEY)
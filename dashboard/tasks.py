@@ -0,0 +1,19 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from .counters import reconcile
+
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def reconcile_counters():
+    """
+    Recompute the dashboard counters from the source tables, correcting the
+    drift concurrent edits can leave behind (see dashboard.signals).
+    """
+    drift = reconcile()
+    if drift:
+        logger.warning(f"Corrected {len(drift)} drifted dashboard counters: {', '.join(sorted(drift))}")
+    return len(drift)
@@ -0,0 +1,197 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+from dashboard.counters import compute_all, reconcile, record_created, update_counted
+from dashboard.models import AggregateCounter
+from dashboard.snapshot import VERSION_KEY
+from dashboard.tasks import reconcile_counters
+from equipment.models import Equipment
+from inventory.models import Item
+
+
+@override_settings(DASHBOARD_SNAPSHOT_MIN_AGE=0)
+class DashboardSnapshotTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='admin@example.com', first_name='Ada')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('dashboard-snapshot')
+        self.add_equipment('MON0001', 'functional', 'monitoring')
+        self.add_equipment('MON0002', 'under_maintenance', 'monitoring')
+        Item.objects.create(name='Fuse', item_code='F-1', category='consumable', quantity=7, location='Store')
+
+    def add_equipment(self, serial, status, device_type):
+        return Equipment.objects.create(
+            name='Monitor', department='icu', model='MX', manufacturer='Philips', serial_number=serial,
+            manufacturing_date=datetime.date(2020, 1, 1), operational_status=status, device_type=device_type
+        )
+
+    def get_snapshot(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(ctx.captured_queries)
+
+    def test_snapshot_combines_dashboard_figures(self):
+        data, queries = self.get_snapshot()
+
+        self.assertEqual(queries, 2)
+        self.assertEqual(data['total_equipment'], 2)
+        self.assertEqual(data['equipment_status_summary'], {'functional': 1, 'under_maintenance': 1, 'total_equipment': 2})
+        self.assertEqual(data['equipment_type_summary'], {'monitoring': 2})
+        self.assertEqual(data['inventory'], {'total_items': 1, 'total_stock': 7})
+        self.assertEqual(data['total_users'], 1)
+
+    def test_snapshot_is_cached_until_a_source_changes(self):
+        first, _ = self.get_snapshot()
+        again, queries = self.get_snapshot()
+        self.assertEqual(queries, 0)
+        self.assertEqual(again, first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(5):
+                self.add_equipment(f'PUMP{n}', 'functional', 'therapeutic')
+
+        data, queries = self.get_snapshot()
+        self.assertEqual(queries, 2)
+        self.assertEqual(data['total_equipment'], 7)
+        self.assertEqual(self.get_snapshot()[1], 0)
+
+    def test_evicted_version_does_not_revive_a_stale_snapshot(self):
+        self.get_snapshot()
+        # A change whose version bump is then lost, as when Redis evicts the version key.
+        AggregateCounter.add({'inventory:stock': 5})
+        cache.delete(VERSION_KEY)
+
+        with mock.patch('dashboard.snapshot.time.time', return_value=cache.get('dashboard:snapshot')['version'] + 60):
+            data, queries = self.get_snapshot()
+        self.assertEqual(queries, 2)
+        self.assertEqual(data['inventory']['total_stock'], 12)
+
+    @override_settings(DASHBOARD_SNAPSHOT_MIN_AGE=60)
+    def test_recent_snapshot_absorbs_a_burst_of_changes(self):
+        self.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_equipment('PUMP1', 'functional', 'therapeutic')
+
+        data, queries = self.get_snapshot()
+        self.assertEqual(queries, 0)
+        self.assertEqual(data['total_equipment'], 2)
+
+
+class AggregateCounterTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='admin@example.com', first_name='Ada', user_role=CustomUser.UserRole.ADMIN
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def make_equipment(self, serial, **kwargs):
+        return Equipment.objects.create(
+            name='Monitor', department='icu', model='MX', manufacturer='Philips', serial_number=serial,
+            manufacturing_date=datetime.date(2020, 1, 1), device_type='monitoring', **kwargs
+        )
+
+    def counters(self, prefix):
+        return AggregateCounter.get_group(prefix)
+
+    def test_equipment_counters_follow_creates_updates_and_deletes(self):
+        monitor = self.make_equipment('MON0001')
+        pump = self.make_equipment('PUMP0001', operational_status='non_functional')
+        self.assertEqual(AggregateCounter.get_value('equipment:total'), 2)
+        self.assertEqual(self.counters('equipment:status'), {'functional': 1, 'non_functional': 1})
+
+        pump.operational_status = 'under_maintenance'
+        pump.save()
+        monitor = Equipment.objects.get(pk=monitor.pk)
+        monitor.department = 'radiology'
+        monitor.save(update_fields=['department'])
+        self.assertEqual(self.counters('equipment:status'), {'functional': 1, 'under_maintenance': 1})
+        self.assertEqual(self.counters('equipment:department'), {'icu': 1, 'radiology': 1})
+
+        Equipment.objects.filter(pk=pump.pk).delete()
+        self.assertEqual(AggregateCounter.get_value('equipment:total'), 1)
+        self.assertEqual(self.counters('equipment:status'), {'functional': 1})
+        self.assertEqual(self.counters('equipment:type'), {'monitoring': 1})
+
+    def test_inventory_and_user_counters(self):
+        item = Item.objects.create(name='Fuse', item_code='F-1', category='consumable', quantity=7, location='Store')
+        item.quantity = 3
+        item.save()
+        Item.objects.create(name='Lamp', item_code='L-1', category='replacement', quantity=10, location='Store')
+        CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+
+        response = self.client.get(reverse('total-inventory'))
+        self.assertEqual((response.data['total_items'], response.data['total_stock']), (2, 13))
+        self.assertEqual(self.client.get(reverse('total-users')).data['total_users'], 2)
+        self.assertEqual(
+            self.counters('users:role'),
+            {str(CustomUser.UserRole.ADMIN): 1, str(CustomUser.UserRole.TECHNICIAN): 1}
+        )
+
+    def test_total_views_are_single_lookups(self):
+        for n in range(3):
+            self.make_equipment(f'MON{n}')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('total-equipment'))
+        self.assertEqual(response.data['total_equipment'], 3)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        response = self.client.get(reverse('equipment-status-summary'))
+        self.assertEqual(response.data, {'functional': 3, 'total_equipment': 3})
+
+    def test_concurrent_edits_drift_until_reconciled(self):
+        monitor = self.make_equipment('MON0001')
+        first, second = Equipment.objects.get(pk=monitor.pk), Equipment.objects.get(pk=monitor.pk)
+        first.operational_status = 'non_functional'
+        first.save()
+        second.operational_status = 'under_maintenance'
+        second.save()
+        # Both saves moved the row out of 'functional', as loaded.
+        self.assertEqual(self.counters('equipment:status'), {'non_functional': 1, 'under_maintenance': 1})
+
+        self.assertEqual(reconcile_counters(), 2)
+        self.assertEqual(self.counters('equipment:status'), {'under_maintenance': 1})
+        self.assertEqual(AggregateCounter.get_value('equipment:status:functional'), 0)
+
+    def test_reconcile_keeps_increments_made_during_the_recount(self):
+        self.make_equipment('MON0001')
+        AggregateCounter.objects.filter(key='equipment:total').update(value=5)
+        recount = compute_all
+
+        def recount_then_write():
+            counts = recount()
+            # A writer whose row the recount didn't see moves the counter meanwhile.
+            AggregateCounter.add({'equipment:total': 1})
+            return counts
+
+        with mock.patch('dashboard.counters.compute_all', side_effect=recount_then_write):
+            drift = reconcile()
+        self.assertEqual(drift['equipment:total'], (5, 1))
+        self.assertEqual(AggregateCounter.get_value('equipment:total'), 2)
+
+    def test_bulk_paths_and_reconcile(self):
+        self.make_equipment('MON0001', operational_status='non_functional')
+        record_created([Equipment(
+            name='Pump', department='icu', model='V', manufacturer='F', serial_number='P1',
+            manufacturing_date=datetime.date(2020, 1, 1), equipment_id='FXXVXX0000P1'
+        )])
+        update_counted(Equipment.objects.all(), operational_status='functional')
+        self.assertEqual(self.counters('equipment:status'), {'functional': 2})
+
+        # The Pump above was only counted, never saved, so reconcile corrects the drift.
+        AggregateCounter.objects.filter(key='users:total').update(value=40)
+        drift = reconcile()
+        self.assertEqual(drift['equipment:total'], (2, 1))
+        self.assertEqual(drift['users:total'], (40, 1))
+        self.assertEqual(self.counters('equipment:status'), {'functional': 1})
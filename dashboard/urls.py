@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+
+urlpatterns = [
+    path('dashboard/snapshot/', views.DashboardSnapshotView.as_view(), name='dashboard-snapshot'),
+]
@@ -0,0 +1,84 @@
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
+
+from .snapshot import get_snapshot
+
+
+class DashboardSnapshotView(APIView):
+    """
+    Return every dashboard figure in one response.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get Dashboard Snapshot",
+        description=(
+            "Equipment totals by status and device type, inventory totals, the user count and the "
+            "last 30 days of maintenance activity, in one call. The snapshot is cached and "
+            "rebuilt after the underlying data changes."
+        ),
+        responses={
+            200: OpenApiResponse(
+                description="Dashboard snapshot retrieved successfully.",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "total_equipment": {"type": "integer"},
+                        "equipment_status_summary": {"type": "object", "additionalProperties": {"type": "integer"}},
+                        "equipment_type_summary": {"type": "object", "additionalProperties": {"type": "integer"}},
+                        "inventory": {
+                            "type": "object",
+                            "properties": {
+                                "total_items": {"type": "integer"},
+                                "total_stock": {"type": "integer"}
+                            }
+                        },
+                        "total_users": {"type": "integer"},
+                        "maintenance_overview": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "date": {"type": "string", "format": "date"},
+                                    "preventive_maintenance": {"type": "integer"},
+                                    "repair": {"type": "integer"},
+                                    "calibration": {"type": "integer"}
+                                }
+                            }
+                        },
+                        "generated_at": {"type": "string", "format": "date-time"}
+                    }
+                },
+                examples=[
+                    OpenApiExample(
+                        "Dashboard Snapshot Example",
+                        value={
+                            "total_equipment": 170,
+                            "equipment_status_summary": {"functional": 150, "under_maintenance": 20, "total_equipment": 170},
+                            "equipment_type_summary": {"diagnostic": 90, "therapeutic": 80},
+                            "inventory": {"total_items": 42, "total_stock": 1310},
+                            "total_users": 25,
+                            "maintenance_overview": [
+                                {"date": "2025-01-01", "preventive_maintenance": 2, "repair": 1, "calibration": 0}
+                            ],
+                            "generated_at": "2025-01-02T08:00:00+00:00"
+                        },
+                        response_only=True,
+                    )
+                ]
+            ),
+            401: OpenApiResponse(
+                description="Unauthorized access.",
+                examples=[OpenApiExample(
+                    "Unauthorized",
+                    value={"detail": "Authentication credentials were not provided."},
+                    response_only=True
+                )]
+            )
+        },
+        tags=["Dashboard"]
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(get_snapshot())
@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django import forms
-from .models import Equipment, EquipmentMaintenanceActivity, MaintenanceSchedule, Supplier
+from django.db import transaction
+from django.utils import timezone
+from .models import Equipment, EquipmentMaintenanceActivity, EquipmentStatusHistory, MaintenanceSchedule, Supplier
+from dashboard.counters import update_counted
+from dashboard.snapshot import invalidate_snapshot
 
 
 
@@ -68,13 +72,35 @@ class EquipmentAdmin(admin.ModelAdmin):
             obj.added_by_name = obj.added_by.get_full_name()
         else:
             obj.added_by_name = 'Unknown'
+        obj.tag_status_change('admin', changed_by=request.user)
         super().save_model(request, obj, form, change)
 
     def mark_as_active(self, request, queryset):
-        queryset.update(operational_status='functional')
+        with transaction.atomic():
+            # update() skips post_save, so the status history is written here, before the rows change.
+            EquipmentStatusHistory.record_bulk(queryset, 'functional', 'admin', changed_by=request.user)
+            # update() doesn't touch `modified`; set it so conditional GETs see the change.
+            update_counted(queryset, operational_status='functional', modified=timezone.now())
+        # update() skips post_save, so tell the dashboard directly.
+        invalidate_snapshot()
     mark_as_active.short_description = "Mark selected equipment as functional"
 
 
+@admin.register(EquipmentStatusHistory)
+class EquipmentStatusHistoryAdmin(admin.ModelAdmin):
+    list_display = ('equipment', 'from_status', 'to_status', 'changed_at', 'source', 'changed_by')
+    list_filter = ('source', 'to_status')
+    search_fields = ('equipment__name', 'equipment__equipment_id')
+    list_select_related = ('equipment', 'changed_by')
+
+    # The history is append-only; entries are written by the status-changing code paths.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # ---------------------------
 # Equipment Maintenance Activity Admin
 # ---------------------------
@@ -0,0 +1,106 @@
+"""
+Fleet reliability metrics: MTBF, MTTR and availability per device type and
+department.
+
+Read from the per-equipment EquipmentReliability accumulators, so a report
+costs one pass over one row per equipment however long the status history
+is. The state each equipment is currently in is counted up to `now`.
+"""
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .models import EquipmentReliability
+from .reliability import DOWN, UP
+
+ACCUMULATOR_FIELDS = (
+    'state', 'state_since', 'uptime_seconds', 'downtime_seconds', 'repair_seconds', 'failures', 'repairs'
+)
+TOTAL_FIELDS = ('equipment', 'failures', 'repairs', 'uptime_seconds', 'downtime_seconds', 'repair_seconds')
+
+
+def _hours(seconds):
+    return round(seconds / 3600, 2)
+
+
+def _new_totals():
+    return dict.fromkeys(TOTAL_FIELDS, 0)
+
+
+def _totals(now, state, state_since, uptime_seconds, downtime_seconds, repair_seconds, failures, repairs):
+    # The current state isn't booked until it ends; count it up to now.
+    current = max((now - state_since).total_seconds(), 0) if state_since else 0
+    return {
+        'equipment': 1,
+        'failures': failures,
+        'repairs': repairs,
+        'uptime_seconds': uptime_seconds + (current if state == UP else 0),
+        'downtime_seconds': downtime_seconds + (current if state == DOWN else 0),
+        'repair_seconds': repair_seconds,
+    }
+
+
+def _metrics(totals):
+    """
+    MTBF is operating time per failure, MTTR the mean length of the down
+    spells that ended in a repair; either is None until there is one.
+    """
+    uptime, downtime = totals['uptime_seconds'], totals['downtime_seconds']
+    return {
+        'equipment': totals['equipment'],
+        'failures': totals['failures'],
+        'repairs': totals['repairs'],
+        'uptime_hours': _hours(uptime),
+        'downtime_hours': _hours(downtime),
+        'mtbf_hours': _hours(uptime / totals['failures']) if totals['failures'] else None,
+        'mttr_hours': _hours(totals['repair_seconds'] / totals['repairs']) if totals['repairs'] else None,
+        'availability': round(100 * uptime / (uptime + downtime), 2) if uptime + downtime else None,
+    }
+
+
+def build_reliability_report(department=None, device_type=None, now=None):
+    """
+    Reliability metrics overall, per device type and per department,
+    optionally restricted to one department and/or device type.
+    """
+    now = now or timezone.now()
+    accumulators = EquipmentReliability.objects.all()
+    if department:
+        accumulators = accumulators.filter(equipment__department=department)
+    if device_type:
+        accumulators = accumulators.filter(equipment__device_type=device_type)
+    rows = accumulators.values_list(
+        'equipment__device_type', 'equipment__department', *ACCUMULATOR_FIELDS
+    ).iterator(chunk_size=2000)
+
+    overall = _new_totals()
+    by_device_type = defaultdict(_new_totals)
+    by_department = defaultdict(_new_totals)
+    for equipment_type, equipment_department, *accumulated in rows:
+        values = _totals(now, *accumulated)
+        for totals in (overall, by_device_type[equipment_type], by_department[equipment_department]):
+            for field, value in values.items():
+                totals[field] += value
+
+    return {
+        'overall': _metrics(overall),
+        'device_types': [
+            {'device_type': name, **_metrics(totals)} for name, totals in sorted(by_device_type.items())
+        ],
+        'departments': [
+            {'department': name, **_metrics(totals)} for name, totals in sorted(by_department.items())
+        ],
+        'generated_at': now.isoformat(),
+    }
+
+
+def equipment_reliability(equipment_id, now=None):
+    """
+    Reliability metrics of a single equipment, or None if it has no status history.
+    """
+    now = now or timezone.now()
+    accumulated = EquipmentReliability.objects.filter(pk=equipment_id).values_list(*ACCUMULATOR_FIELDS).first()
+    if accumulated is None:
+        return None
+    state, state_since = accumulated[:2]
+    return {'state': state, 'state_since': state_since, **_metrics(_totals(now, *accumulated))}
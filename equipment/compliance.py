@@ -0,0 +1,236 @@
+"""
+Preventive maintenance compliance: which scheduled occurrences were done.
+
+A planned occurrence (a materialized MaintenanceOccurrence, fanned out to
+every active equipment for `for_all_equipment` schedules) counts as done when
+an EquipmentMaintenanceActivity of the same type was logged on that equipment
+within MAINTENANCE_COMPLIANCE_TOLERANCE_DAYS of it. Each activity satisfies at
+most one occurrence.
+
+The report is a merge join, not a nested loop: equipment, their scheduled
+occurrences and their activities are each streamed from the database ordered
+by equipment id and consumed together, so only one equipment's rows are in
+memory at a time. Within an equipment, occurrences and activities are sorted by
+(activity type, time) and paired with a single forward sweep.
+"""
+import heapq
+import time
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Equipment, EquipmentMaintenanceActivity, MaintenanceOccurrence
+
+VERSION_KEY = 'maintenance:compliance:version'
+
+DONE = 'done'
+MISSED = 'missed'
+PENDING = 'pending'
+
+
+def get_tolerance():
+    return timedelta(days=getattr(settings, 'MAINTENANCE_COMPLIANCE_TOLERANCE_DAYS', 7))
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time()), timeout=None)
+
+
+def invalidate_compliance():
+    """
+    Mark cached compliance reports stale once the current transaction commits.
+    """
+    transaction.on_commit(_bump_version)
+
+
+def _grouped_by_equipment(rows):
+    # {equipment_id: [rows]} lazily, from rows ordered by equipment id (the first column).
+    return ((equipment_id, list(group)) for equipment_id, group in groupby(rows, key=itemgetter(0)))
+
+
+class _Cursor:
+    """
+    Steps through an equipment-ordered group stream alongside the equipment list.
+    """
+
+    def __init__(self, groups):
+        self._groups = groups
+        self._current = next(self._groups, None)
+
+    def take(self, equipment_id):
+        # Groups for equipment the outer stream doesn't include (filtered out) are skipped.
+        while self._current is not None and self._current[0] < equipment_id:
+            self._current = next(self._groups, None)
+        if self._current is not None and self._current[0] == equipment_id:
+            rows = self._current[1]
+            self._current = next(self._groups, None)
+            return rows
+        return []
+
+
+def _sweep(planned, performed, tolerance):
+    """
+    Pair planned (activity_type, occurrence_at, schedule_id) rows with
+    performed (activity_type, date_time, activity_id) rows, both sorted by
+    (activity_type, time). Yields (planned row, activity_id or None).
+
+    Every occurrence takes the earliest unused activity inside its window;
+    activities too early for one occurrence are too early for every later one,
+    so the activity pointer only moves forward.
+    """
+    index = 0
+    for row in planned:
+        activity_type, occurrence_at = row[0], row[1]
+        window_start, window_end = occurrence_at - tolerance, occurrence_at + tolerance
+        while index < len(performed) and (performed[index][0], performed[index][1]) < (activity_type, window_start):
+            index += 1
+        if index < len(performed) and performed[index][0] == activity_type and performed[index][1] <= window_end:
+            yield row, performed[index][2]
+            index += 1
+        else:
+            yield row, None
+
+
+def iter_compliance(start, end, department=None, equipment_id=None, tolerance=None, now=None):
+    """
+    Yield (equipment, occurrences) for every equipment with planned
+    maintenance between `start` and `end`, where `equipment` is a dict of
+    id/name/department and `occurrences` is a list of dicts with
+    schedule_id, activity_type, occurrence_at, activity_id and status
+    ('done', 'missed', or 'pending' while the tolerance window is still open).
+    """
+    tolerance = tolerance or get_tolerance()
+    now = now or timezone.now()
+
+    equipment = Equipment.objects.order_by('id')
+    occurrences = MaintenanceOccurrence.objects.filter(occurrence_at__gte=start, occurrence_at__lte=end)
+    activities = EquipmentMaintenanceActivity.objects.filter(
+        date_time__gte=start - tolerance, date_time__lte=end + tolerance
+    )
+    if department:
+        equipment = equipment.filter(department=department)
+        activities = activities.filter(equipment__department=department)
+    if equipment_id is not None:
+        equipment = equipment.filter(pk=equipment_id)
+        activities = activities.filter(equipment_id=equipment_id)
+
+    # Schedules for all equipment are few; they are held in memory and fanned out per equipment.
+    for_all = list(
+        occurrences.filter(schedule__for_all_equipment=True)
+        .order_by('schedule__activity_type', 'occurrence_at')
+        .values_list('schedule__activity_type', 'occurrence_at', 'schedule_id')
+    )
+    specific = occurrences.filter(schedule__for_all_equipment=False, schedule__equipment__in=equipment.values('pk'))
+
+    specific_cursor = _Cursor(_grouped_by_equipment(
+        specific.order_by('schedule__equipment_id', 'occurrence_at')
+        .values_list('schedule__equipment_id', 'schedule__activity_type', 'occurrence_at', 'schedule_id')
+        .iterator(chunk_size=2000)
+    ))
+    activity_cursor = _Cursor(_grouped_by_equipment(
+        activities.order_by('equipment_id', 'date_time')
+        .values_list('equipment_id', 'activity_type', 'date_time', 'id')
+        .iterator(chunk_size=2000)
+    ))
+    rows = equipment.values_list('id', 'name', 'department', 'created', 'decommission_date').iterator(chunk_size=2000)
+
+    for pk, name, equipment_department, created, decommission_date in rows:
+        # Sorting the equipment's time-ordered rows by type (a stable sort) gives (type, time) order.
+        own = sorted((row[1:] for row in specific_cursor.take(pk)), key=itemgetter(0))
+        shared = [
+            row for row in for_all
+            if row[1] >= created and (decommission_date is None or row[1].date() <= decommission_date)
+        ]
+        planned = list(heapq.merge(own, shared, key=itemgetter(0, 1)))
+        performed = sorted((row[1:] for row in activity_cursor.take(pk)), key=itemgetter(0))
+        if not planned:
+            continue
+
+        results = []
+        for (activity_type, occurrence_at, schedule_id), activity_id in _sweep(planned, performed, tolerance):
+            if activity_id is not None:
+                status = DONE
+            elif occurrence_at + tolerance < now:
+                status = MISSED
+            else:
+                status = PENDING
+            results.append({
+                'schedule_id': schedule_id,
+                'activity_type': activity_type,
+                'occurrence_at': occurrence_at,
+                'activity_id': activity_id,
+                'status': status,
+            })
+        yield {'id': pk, 'name': name, 'department': equipment_department}, results
+
+
+def _percentage(done, missed):
+    due = done + missed
+    return round(100 * done / due, 1) if due else None
+
+
+def _summary(counts):
+    return {
+        'planned': counts[DONE] + counts[MISSED] + counts[PENDING],
+        'done': counts[DONE],
+        'missed': counts[MISSED],
+        'pending': counts[PENDING],
+        'compliance': _percentage(counts[DONE], counts[MISSED]),
+    }
+
+
+def build_compliance_report(start, end, department=None):
+    """
+    Compliance percentages overall, per department and per equipment.
+    Compliance is done / (done + missed); pending occurrences don't count yet.
+    """
+    overall = defaultdict(int)
+    by_department = defaultdict(lambda: defaultdict(int))
+    equipment_rows = []
+
+    for equipment, occurrences in iter_compliance(start, end, department=department):
+        counts = defaultdict(int)
+        for occurrence in occurrences:
+            counts[occurrence['status']] += 1
+        for status, count in counts.items():
+            overall[status] += count
+            by_department[equipment['department']][status] += count
+        equipment_rows.append({**equipment, **_summary(counts)})
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'tolerance_days': get_tolerance().days,
+        'overall': _summary(overall),
+        'departments': [
+            {'department': name, **_summary(counts)} for name, counts in sorted(by_department.items())
+        ],
+        'equipment': equipment_rows,
+        'generated_at': timezone.now().isoformat(),
+    }
+
+
+def get_compliance_report(start, end, department=None):
+    """
+    The compliance report for the period, cached until a schedule, activity
+    or equipment changes (or MAINTENANCE_COMPLIANCE_CACHE_TIMEOUT passes, as
+    occurrences become due with time).
+    """
+    # Seeded from the clock like _bump_version(), so an evicted counter cannot
+    # restart at a version a stale cached report was built at.
+    version = cache.get_or_set(VERSION_KEY, lambda: int(time.time()), timeout=None)
+    key = f"maintenance:compliance:{version}:{start.isoformat()}:{end.isoformat()}:{department or ''}"
+    return cache.get_or_set(
+        key,
+        lambda: build_compliance_report(start, end, department=department),
+        timeout=getattr(settings, 'MAINTENANCE_COMPLIANCE_CACHE_TIMEOUT', 900)
+    )
@@ -0,0 +1,148 @@
+import csv
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Equipment, EquipmentMaintenanceActivity, MaintenanceSchedule, full_name_expression
+
+User = get_user_model()
+
+
+class Echo:
+    """
+    File-like object whose write() just hands the line back, so csv.writer can
+    format rows without buffering them.
+    """
+    def write(self, value):
+        return value
+
+
+class Export:
+    """
+    Describes one export: the queryset's `.values()` columns (with any joined
+    names annotated in SQL) in output order, and optionally which rows a
+    given user may see.
+    """
+    def __init__(self, name, queryset, columns, visible_to=None):
+        self.name = name
+        self.queryset = queryset
+        self.columns = columns
+        self.visible_to = visible_to
+
+    def rows(self, chunk_size, user=None):
+        queryset = self.queryset()
+        if self.visible_to is not None:
+            queryset = self.visible_to(queryset, user)
+        # values() + iterator() keeps memory flat: rows are fetched chunk by chunk
+        # (a server-side cursor on PostgreSQL) and never become model instances.
+        return queryset.values(*self.columns).iterator(chunk_size=chunk_size)
+
+
+def _schedules_visible_to(queryset, user):
+    # Same rule as the schedule list: technicians only see their own and fleet-wide schedules.
+    if user is not None and user.user_role in (User.UserRole.ADMIN, User.UserRole.SUPERADMIN):
+        return queryset
+    if user is None or not user.is_authenticated:
+        return queryset.none()
+    return queryset.filter(Q(technician=user) | Q(for_all_equipment=True))
+
+
+EXPORTS = {
+    'equipment': Export(
+        'equipment',
+        lambda: Equipment.objects.annotate(
+            supplier_name=F('supplier__company_name'),
+            added_by_full_name=full_name_expression('added_by'),
+        ).order_by('id'),
+        [
+            'id', 'equipment_id', 'name', 'device_type', 'department', 'operational_status',
+            'manufacturer', 'model', 'serial_number', 'supplier', 'supplier_name', 'location',
+            'manufacturing_date', 'decommission_date', 'added_by', 'added_by_full_name',
+            'created', 'modified',
+        ]
+    ),
+    'maintenance-reports': Export(
+        'maintenance-reports',
+        lambda: EquipmentMaintenanceActivity.objects.with_names().annotate(
+            equipment_code=F('equipment__equipment_id'),
+        ).order_by('date_time', 'id'),
+        [
+            'id', 'equipment', 'equipment_code', 'equipment_name', 'activity_type', 'date_time',
+            'technician', 'technician_name', 'pre_status', 'post_status', 'notes',
+            'created', 'modified',
+        ]
+    ),
+    'maintenance-schedules': Export(
+        'maintenance-schedules',
+        lambda: MaintenanceSchedule.objects.annotate(
+            equipment_name=F('equipment__name'),
+            technician_name=full_name_expression('technician'),
+        ).order_by('start_date', 'id'),
+        [
+            'id', 'title', 'activity_type', 'for_all_equipment', 'equipment', 'equipment_name',
+            'technician', 'technician_name', 'description', 'start_date', 'end_date', 'frequency',
+            'interval', 'recurring_end', 'next_occurrence', 'created', 'modified',
+        ],
+        visible_to=_schedules_visible_to
+    ),
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _grouped(lines, lines_per_chunk):
+    # Yield a few hundred lines per chunk rather than one write per row.
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= lines_per_chunk:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def csv_lines(export, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(export.columns)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[column]) for column in export.columns])
+
+
+def ndjson_lines(export, rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def stream_export(export_name, export_format='csv', chunk_size=None, user=None):
+    """
+    Build a StreamingHttpResponse for one of the EXPORTS in 'csv' or 'ndjson',
+    limited to the rows `user` may see.
+    """
+    export = EXPORTS[export_name]
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    lines = (csv_lines if export_format == 'csv' else ndjson_lines)(export, export.rows(chunk_size, user=user))
+
+    response = StreamingHttpResponse(
+        _grouped(lines, lines_per_chunk=min(chunk_size, 500)),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    filename = f"{export.name}-{timezone.localdate():%Y%m%d}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
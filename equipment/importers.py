@@ -0,0 +1,199 @@
+import codecs
+import csv
+import json
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from dashboard.counters import record_created
+from dashboard.snapshot import invalidate_snapshot
+
+from .models import Equipment, EquipmentIdSequence, EquipmentStatusHistory, Supplier
+from .search import index_equipment
+from .compliance import invalidate_compliance
+from .serializers import EquipmentImportRowSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class ImportFormatError(ValueError):
+    """
+    Raised when the uploaded file can't be parsed at all (as opposed to
+    individual rows failing validation, which end up in the error report).
+    """
+
+
+def iter_csv_rows(stream):
+    # `stream` yields raw byte lines (an UploadedFile or the request body).
+    try:
+        for row in csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig')):
+            yield row
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFormatError(f"Invalid CSV: {e}")
+
+
+def iter_ndjson_rows(stream):
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ImportFormatError(f"Invalid JSON on line {line_number}: {e}")
+        if not isinstance(row, dict):
+            raise ImportFormatError(f"Line {line_number} is not a JSON object.")
+        yield row
+
+
+ROW_READERS = {
+    'csv': iter_csv_rows,
+    'ndjson': iter_ndjson_rows,
+}
+
+
+class EquipmentImporter:
+    """
+    Create Equipment rows in bulk from a CSV or NDJSON stream.
+
+    Rows are read lazily and processed `chunk_size` at a time: each chunk is
+    validated in memory, checked for serial-number clashes with one query,
+    given a range of equipment IDs per prefix and inserted with a single
+    bulk_create inside its own transaction. Rows that fail are reported by
+    row number and don't stop the rest of the import.
+    """
+
+    def __init__(self, user, chunk_size=None):
+        self.user = user
+        self.chunk_size = chunk_size or getattr(settings, 'EQUIPMENT_IMPORT_CHUNK_SIZE', 500)
+        self.created = 0
+        self.errors = []
+        self._seen_serials = set()
+        self._suppliers = None
+        # Built once: constructing a ModelSerializer's fields per row dominates the import time.
+        self.row_serializer = EquipmentImportRowSerializer()
+
+    @property
+    def suppliers(self):
+        # One lookup map for the whole import instead of a query per row.
+        if self._suppliers is None:
+            self._suppliers = {
+                name.strip().lower(): pk
+                for name, pk in Supplier.objects.values_list('company_name', 'id')
+            }
+        return self._suppliers
+
+    def run(self, stream, input_format):
+        try:
+            reader = ROW_READERS[input_format]
+        except KeyError:
+            raise ImportFormatError(f"Unsupported import format '{input_format}'.")
+
+        rows = enumerate(reader(stream), start=1)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+    def add_error(self, row_number, errors):
+        self.errors.append({'row': row_number, 'errors': errors})
+
+    @staticmethod
+    def clean_row(row):
+        # Blank cells mean "not given", so model defaults apply.
+        return {
+            key.strip(): value.strip() if isinstance(value, str) else value
+            for key, value in row.items()
+            if key and value not in ('', None)
+        }
+
+    def import_chunk(self, chunk):
+        valid = []
+        for row_number, row in chunk:
+            try:
+                data = dict(self.row_serializer.run_validation(self.clean_row(row)))
+            except ValidationError as exc:
+                self.add_error(row_number, as_serializer_error(exc))
+                continue
+
+            supplier_name = data.pop('supplier', None)
+            if supplier_name:
+                supplier_id = self.suppliers.get(supplier_name.lower())
+                if supplier_id is None:
+                    self.add_error(row_number, {'supplier': [f"Unknown supplier '{supplier_name}'."]})
+                    continue
+                data['supplier_id'] = supplier_id
+
+            serial = data['serial_number']
+            if serial in self._seen_serials:
+                self.add_error(row_number, {'serial_number': ["Duplicate serial number in this file."]})
+                continue
+            self._seen_serials.add(serial)
+            valid.append((row_number, data))
+
+        existing = set(
+            Equipment.objects
+            .filter(serial_number__in=[data['serial_number'] for _, data in valid])
+            .values_list('serial_number', flat=True)
+        )
+
+        pending = []
+        for row_number, data in valid:
+            if data['serial_number'] in existing:
+                self.add_error(row_number, {'serial_number': ["Equipment with this serial number already exists."]})
+                continue
+            pending.append((row_number, self.build_equipment(data)))
+
+        if pending:
+            self.save_chunk(pending)
+
+    def build_equipment(self, data):
+        equipment = Equipment(**data, added_by=self.user)
+        if self.user is not None:
+            equipment.added_by_name = self.user.get_full_name()
+        if equipment.operational_status == Equipment.OPERATIONAL_STATUS.decommissioned:
+            equipment.decommission_date = timezone.now().date()
+        return equipment
+
+    def save_chunk(self, pending):
+        instances = [equipment for _, equipment in pending]
+        try:
+            with transaction.atomic():
+                EquipmentIdSequence.assign(instances)
+                Equipment.objects.bulk_create(instances)
+                record_created(instances)
+                EquipmentStatusHistory.record_created(instances, 'import', changed_by=self.user)
+                index_equipment(instances)
+        except IntegrityError:
+            # A concurrent writer took one of these serial numbers; isolate the offending rows.
+            logger.warning("Bulk equipment insert conflicted; retrying chunk row by row.")
+            for row_number, equipment in pending:
+                equipment.pk = None
+                equipment.equipment_id = ''
+                equipment.tag_status_change('import', changed_by=self.user)
+                try:
+                    with transaction.atomic():
+                        equipment.save()
+                except IntegrityError:
+                    self.add_error(row_number, {'serial_number': ["Equipment with this serial number already exists."]})
+                else:
+                    self.created += 1
+            return
+        self.created += len(instances)
+        # bulk_create doesn't send post_save, so counters, search tokens and the snapshot are updated here.
+        invalidate_snapshot()
+        invalidate_compliance()
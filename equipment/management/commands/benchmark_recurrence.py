@@ -0,0 +1,40 @@
+import timeit
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from equipment.recurrence import Recurrence
+
+
+class Command(BaseCommand):
+    help = (
+        "Time next-occurrence lookups with rrule (the previous between(now, now + horizon) approach) "
+        "against the closed-form Recurrence, for schedules of increasing age and look-ahead horizon."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help="Calls timed per case (default: 200).")
+        parser.add_argument(
+            '--years',
+            type=int,
+            nargs='+',
+            default=[1, 5, 20],
+            help="Schedule ages / horizons to time, in years (default: 1 5 20)."
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        repeat = options['repeat']
+        self.stdout.write(f"{'frequency':<10}{'years':>6}{'rrule (us)':>14}{'closed form (us)':>20}")
+        for frequency in ('daily', 'weekly', 'monthly'):
+            for years in options['years']:
+                span = timedelta(days=365 * years)
+                recurrence = Recurrence(frequency, now - span, until=now + span)
+                rule = recurrence.to_rrule()
+
+                rrule_time = timeit.timeit(lambda: rule.between(now, now + span, inc=False)[:1], number=repeat)
+                closed_time = timeit.timeit(lambda: recurrence.next_after(now), number=repeat)
+                self.stdout.write(
+                    f"{frequency:<10}{years:>6}{rrule_time / repeat * 1e6:>14.1f}{closed_time / repeat * 1e6:>20.1f}"
+                )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from equipment.models import EquipmentReliability
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-equipment reliability accumulators (uptime, downtime, failures, repairs) "
+        "by replaying the full equipment status history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of accumulator rows written per INSERT (default: 1000)."
+        )
+
+    def handle(self, *args, **options):
+        written = EquipmentReliability.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt equipment reliability: {written} accumulators written."))
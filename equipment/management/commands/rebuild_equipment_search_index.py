@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from equipment.search import rebuild_search_index, uses_postgres_search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the equipment search token index from scratch. "
+        "Only needed on databases without PostgreSQL full-text search, after raw SQL writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if uses_postgres_search():
+            self.stdout.write("PostgreSQL search uses GIN indexes maintained by the database; nothing to rebuild.")
+            return
+        indexed = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} equipment."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from equipment.models import MaintenanceDailyRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the MaintenanceDailyRollup table from the full maintenance activity history. "
+        "Use after bulk imports or if the incremental counts ever drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of rollup rows written per INSERT (default: 1000)."
+        )
+
+    def handle(self, *args, **options):
+        written = MaintenanceDailyRollup.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt maintenance rollup: {written} daily buckets written."))
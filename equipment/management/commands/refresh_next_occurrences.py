@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from equipment.tasks import refresh_stale_next_occurrences
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute next_occurrence for every maintenance schedule whose stored value is in the past. "
+        "Runs the same sweep as the periodic Celery task, in the foreground."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Schedules recomputed and written per transaction (default: 1000)."
+        )
+
+    def handle(self, *args, **options):
+        refreshed = refresh_stale_next_occurrences(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed next_occurrence for {refreshed} maintenance schedules."))
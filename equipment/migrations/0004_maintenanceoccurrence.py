@@ -0,0 +1,68 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:20
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from dateutil import rrule
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def materialize_existing_schedules(apps, schema_editor):
+    MaintenanceSchedule = apps.get_model('equipment', 'MaintenanceSchedule')
+    MaintenanceOccurrence = apps.get_model('equipment', 'MaintenanceOccurrence')
+
+    horizon = timezone.now() + timedelta(days=getattr(settings, 'MAINTENANCE_OCCURRENCE_HORIZON_DAYS', 365))
+    freq_map = {
+        'daily': rrule.DAILY,
+        'weekly': rrule.WEEKLY,
+        'biweekly': rrule.WEEKLY,
+        'monthly': rrule.MONTHLY,
+    }
+
+    pending = []
+    for schedule in MaintenanceSchedule.objects.iterator():
+        if schedule.frequency == 'once':
+            occurrences = [schedule.start_date] if schedule.start_date <= horizon else []
+        else:
+            interval = 2 if schedule.frequency == 'biweekly' else schedule.interval
+            rule = rrule.rrule(
+                freq_map.get(schedule.frequency, rrule.DAILY),
+                dtstart=schedule.start_date,
+                interval=interval,
+                until=schedule.recurring_end
+            )
+            occurrences = rule.between(schedule.start_date, horizon, inc=True)
+        pending.extend(
+            MaintenanceOccurrence(schedule_id=schedule.pk, occurrence_at=occ) for occ in occurrences
+        )
+        if len(pending) >= 1000:
+            MaintenanceOccurrence.objects.bulk_create(pending, ignore_conflicts=True)
+            pending = []
+    if pending:
+        MaintenanceOccurrence.objects.bulk_create(pending, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_alter_equipment_image_alter_equipment_manual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurrence_at', models.DateTimeField()),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='equipment.maintenanceschedule')),
+            ],
+            options={
+                'ordering': ['occurrence_at'],
+                'indexes': [models.Index(fields=['occurrence_at', 'schedule'], name='equipment_m_occurre_9b72db_idx')],
+                'constraints': [models.UniqueConstraint(fields=('schedule', 'occurrence_at'), name='unique_schedule_occurrence')],
+            },
+        ),
+        migrations.RunPython(materialize_existing_schedules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_maintenanceoccurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['modified', 'id'], name='equipment_e_modifie_be7597_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_rollup(apps, schema_editor):
+    EquipmentMaintenanceActivity = apps.get_model('equipment', 'EquipmentMaintenanceActivity')
+    MaintenanceDailyRollup = apps.get_model('equipment', 'MaintenanceDailyRollup')
+
+    grouped = (
+        EquipmentMaintenanceActivity.objects
+        .annotate(day=TruncDate('date_time'))
+        .values('day', 'activity_type', 'equipment_id', 'equipment__department')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    MaintenanceDailyRollup.objects.bulk_create(
+        (
+            MaintenanceDailyRollup(
+                day=row['day'],
+                activity_type=row['activity_type'],
+                equipment_id=row['equipment_id'],
+                department=row['equipment__department'],
+                count=row['total'],
+            )
+            for row in grouped.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0005_equipment_modified_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('activity_type', models.CharField(choices=[('preventive maintenance', 'Preventive Maintenance'), ('repair', 'Repair'), ('calibration', 'Calibration')], max_length=30)),
+                ('department', models.CharField(choices=[('emergency', 'Emergency Department'), ('opd', 'Outpatient Department'), ('inpatient', 'Inpatient Department'), ('maternity', 'Maternity Ward'), ('laboratory', 'Laboratory Department'), ('pediatric', 'Pediatric  Department'), ('icu', 'Intensive Care Unit'), ('radiology', 'Radiology Department'), ('oncology', 'Oncology Department'), ('physiotherapy', 'Physiotherapy Department'), ('surgical', 'Surgical Department'), ('dental', 'Dental Clinic'), ('cardiology', 'Cardiology Department'), ('orthopedic', 'Orthopedic Department'), ('urology', 'Urology Department'), ('neurology', 'Neurology Department'), ('gynecology', 'Gynecology Department')], max_length=255)),
+                ('count', models.IntegerField(default=0)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='equipment.equipment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'activity_type'], name='equipment_m_day_9d6182_idx'), models.Index(fields=['equipment', 'day'], name='equipment_m_equipme_d0d503_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'activity_type', 'equipment'), name='unique_daily_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:28
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    EquipmentIdSequence = apps.get_model('equipment', 'EquipmentIdSequence')
+
+    next_values = {}
+    for equipment_id in Equipment.objects.values_list('equipment_id', flat=True).iterator():
+        prefix, sep, suffix = equipment_id.partition('-')
+        if len(prefix) != 12 or (sep and not suffix.isdigit()):
+            continue
+        value = int(suffix) if sep else 0
+        next_values[prefix] = max(next_values.get(prefix, 0), value + 1)
+
+    EquipmentIdSequence.objects.bulk_create(
+        [EquipmentIdSequence(prefix=prefix, next_value=value) for prefix, value in next_values.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0006_maintenancedailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=12, unique=True)),
+                ('next_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:41
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+SEARCH_FIELDS = {
+    'equipment_id': 4,
+    'serial_number': 4,
+    'name': 3,
+    'manufacturer': 2,
+    'model': 2,
+}
+SEARCH_VECTOR_FIELDS = ('name', 'serial_number', 'manufacturer', 'model', 'equipment_id')
+TRIGRAM_FIELDS = ('name', 'serial_number', 'equipment_id')
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def postgres_indexes():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    from django.contrib.postgres.search import SearchVector
+
+    indexes = [
+        GinIndex(SearchVector(*SEARCH_VECTOR_FIELDS, config='simple'), name='equipment_search_vector_gin'),
+    ]
+    for field in TRIGRAM_FIELDS:
+        indexes.append(GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=f'equipment_{field}_trgm'))
+    return indexes
+
+
+def tokenize(text):
+    if not text:
+        return []
+    parts = [part.lower() for part in TOKEN_RE.findall(text)]
+    tokens = list(dict.fromkeys(parts))
+    compact = ''.join(parts)
+    if len(parts) > 1 and compact not in tokens:
+        tokens.append(compact)
+    return [token[:64] for token in tokens]
+
+
+def build_search_index(apps, schema_editor):
+    Equipment = apps.get_model('equipment', 'Equipment')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index in postgres_indexes():
+            schema_editor.add_index(Equipment, index)
+        return
+
+    EquipmentSearchToken = apps.get_model('equipment', 'EquipmentSearchToken')
+    tokens = []
+    for equipment in Equipment.objects.only('id', *SEARCH_FIELDS).iterator(chunk_size=1000):
+        weights = {}
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize(getattr(equipment, field)):
+                weights[token] = max(weights.get(token, 0), weight)
+        tokens.extend(
+            EquipmentSearchToken(equipment_id=equipment.pk, token=token, weight=weight)
+            for token, weight in weights.items()
+        )
+    EquipmentSearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        Equipment = apps.get_model('equipment', 'Equipment')
+        for index in postgres_indexes():
+            schema_editor.remove_index(Equipment, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0007_equipmentidsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='equipment.equipment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'equipment'], name='equipment_e_token_9c1e4d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('equipment', 'token'), name='unique_equipment_search_token')],
+            },
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_status_history(apps, schema_editor):
+    """
+    Reconstruct each equipment's transitions from the pre/post statuses of
+    its maintenance activities: the status it started with, then every
+    activity that changed it, then its current status if that still differs.
+    """
+    Equipment = apps.get_model('equipment', 'Equipment')
+    Activity = apps.get_model('equipment', 'EquipmentMaintenanceActivity')
+    History = apps.get_model('equipment', 'EquipmentStatusHistory')
+
+    activities = {}
+    for row in (
+        Activity.objects.exclude(post_status__isnull=True).exclude(post_status='')
+        .order_by('equipment_id', 'date_time', 'id')
+        .values_list('equipment_id', 'id', 'date_time', 'pre_status', 'post_status', 'technician_id')
+        .iterator(chunk_size=2000)
+    ):
+        activities.setdefault(row[0], []).append(row[1:])
+
+    pending = []
+    for pk, status, created, modified, added_by_id in (
+        Equipment.objects.order_by('id')
+        .values_list('id', 'operational_status', 'created', 'modified', 'added_by_id')
+        .iterator(chunk_size=2000)
+    ):
+        changes = activities.get(pk, [])
+        current = (changes[0][2] if changes else None) or status
+        changed_at = created
+        pending.append(History(
+            equipment_id=pk, to_status=current, changed_at=created, source='backfill', changed_by_id=added_by_id
+        ))
+        for activity_id, date_time, _pre_status, post_status, technician_id in changes:
+            if post_status != current:
+                changed_at = max(date_time, changed_at)
+                pending.append(History(
+                    equipment_id=pk, from_status=current, to_status=post_status, changed_at=changed_at,
+                    source='backfill', activity_id=activity_id, changed_by_id=technician_id
+                ))
+                current = post_status
+        if current != status:
+            pending.append(History(
+                equipment_id=pk, from_status=current, to_status=status, changed_at=max(modified, changed_at),
+                source='backfill'
+            ))
+        if len(pending) >= 1000:
+            History.objects.bulk_create(pending)
+            pending = []
+    History.objects.bulk_create(pending)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0008_equipment_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('functional', 'Functional'), ('non_functional', 'Non-Functional'), ('under_maintenance', 'Under Maintenance'), ('decommissioned', 'Decommissioned')], max_length=20, null=True)),
+                ('to_status', models.CharField(choices=[('functional', 'Functional'), ('non_functional', 'Non-Functional'), ('under_maintenance', 'Under Maintenance'), ('decommissioned', 'Decommissioned')], max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('source', models.CharField(choices=[('api', 'API'), ('activity', 'Maintenance Activity'), ('admin', 'Admin'), ('import', 'Bulk Import'), ('backfill', 'Backfill'), ('system', 'System')], default='system', max_length=20)),
+                ('activity', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='status_changes', to='equipment.equipmentmaintenanceactivity')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='equipment_status_changes', to=settings.AUTH_USER_MODEL)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='equipment.equipment')),
+            ],
+            options={
+                'verbose_name_plural': 'Equipment status history',
+                'ordering': ['-changed_at', '-id'],
+                'indexes': [models.Index(fields=['equipment', '-changed_at', '-id'], name='equipment_status_as_of_idx'), models.Index(fields=['changed_at'], name='equipment_e_changed_a364c1_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_status_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:03
+
+import django.db.models.deletion
+from itertools import groupby
+
+from django.db import migrations, models
+
+from equipment.reliability import fold_transition
+
+
+def build_accumulators(apps, schema_editor):
+    History = apps.get_model('equipment', 'EquipmentStatusHistory')
+    EquipmentReliability = apps.get_model('equipment', 'EquipmentReliability')
+
+    rows = (
+        History.objects.order_by('equipment_id', 'changed_at', 'id')
+        .values_list('equipment_id', 'to_status', 'changed_at')
+        .iterator(chunk_size=2000)
+    )
+    pending = []
+    for equipment_id, transitions in groupby(rows, key=lambda row: row[0]):
+        accumulator = EquipmentReliability(equipment_id=equipment_id)
+        for _, to_status, changed_at in transitions:
+            fold_transition(accumulator, to_status, changed_at)
+        pending.append(accumulator)
+        if len(pending) >= 1000:
+            EquipmentReliability.objects.bulk_create(pending)
+            pending = []
+    EquipmentReliability.objects.bulk_create(pending)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0009_equipmentstatushistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentReliability',
+            fields=[
+                ('equipment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reliability', serialize=False, to='equipment.equipment')),
+                ('state', models.CharField(choices=[('up', 'Up'), ('down', 'Down'), ('out', 'Out of Service')], default='up', max_length=10)),
+                ('state_since', models.DateTimeField(null=True)),
+                ('uptime_seconds', models.FloatField(default=0)),
+                ('downtime_seconds', models.FloatField(default=0)),
+                ('repair_seconds', models.FloatField(default=0)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('repairs', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_accumulators, migrations.RunPython.noop),
+    ]
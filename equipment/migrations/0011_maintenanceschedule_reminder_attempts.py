@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0010_equipmentreliability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenanceschedule',
+            name='reminder_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Coalesce, Concat, Substr, Trim, TruncDate
+from itertools import groupby
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
+from django.conf import settings
 from datetime import timedelta
 from django.utils import timezone
 from model_utils.models import TimeStampedModel
@@ -8,6 +12,8 @@ from model_utils import Choices
 from cloudinary.models import CloudinaryField
 from django.core.exceptions import ValidationError
 from dateutil import rrule 
+from .recurrence import RRULE_FREQUENCIES, Recurrence
+from .reliability import DOWN, OUT, UP, fold_transition
 
 User = get_user_model()
 
@@ -116,6 +122,7 @@ class Equipment(TimeStampedModel):
         indexes = [
             models.Index(fields=['name', 'department', 'operational_status']),
             models.Index(fields=['equipment_id']),
+            models.Index(fields=['modified', 'id']),
         ]
 
     
@@ -150,15 +157,207 @@ class Equipment(TimeStampedModel):
     def save(self, *args, **kwargs):
         # Only generate the equipment_id if it hasn't been set.
         if not self.equipment_id:
-            base_id = self._generate_equipment_id()
-            candidate = base_id
-            counter = 1
-            # Check for collisions and append a suffix (e.g., "-1") if needed.
-            while Equipment.objects.filter(equipment_id=candidate).exclude(pk=self.pk).exists():
-                candidate = f"{base_id}-{counter}"
-                counter += 1
-            self.equipment_id = candidate
-        super().save(*args, **kwargs) 
+            # The prefix sequence hands out the base ID first, then "-1", "-2", ...
+            self.equipment_id = EquipmentIdSequence.allocate(self._generate_equipment_id())[0]
+        elif self._state.adding or self.equipment_id != getattr(self, '_loaded_equipment_id', None):
+            # Entered by hand (e.g. in the admin): make sure the sequence never hands it out again.
+            EquipmentIdSequence.skip_past(self.equipment_id)
+        super().save(*args, **kwargs)
+        self._loaded_equipment_id = self.equipment_id
+
+    def tag_status_change(self, source, changed_by=None, activity=None, changed_at=None):
+        """
+        Say where (and, if not now, when) the next save's operational_status
+        change comes from; the post_save signal records it in EquipmentStatusHistory.
+        """
+        self._status_change = {
+            'source': source, 'changed_by': changed_by, 'activity': activity, 'changed_at': changed_at
+        }
+
+
+class EquipmentIdSequence(models.Model):
+    """
+    Per-prefix counter for equipment IDs.
+
+    `next_value` is the next suffix to hand out for a manufacturer/model/serial
+    prefix: 0 stands for the bare prefix, n for "<prefix>-n". The row is locked
+    while a value (or a range of values) is taken, so concurrent inserts never
+    receive the same ID and no collision probing is needed. Rows are locked in
+    prefix order so batches touching several prefixes can't deadlock.
+    """
+    prefix = models.CharField(max_length=12, unique=True)
+    next_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}: {self.next_value}"
+
+    @staticmethod
+    def format_id(prefix, value):
+        return prefix if value == 0 else f"{prefix}-{value}"
+
+    @staticmethod
+    def parse_id(equipment_id):
+        """
+        Split a generated ID into (prefix, suffix value); returns None for IDs
+        that don't follow the generated format.
+        """
+        prefix, sep, suffix = equipment_id.partition('-')
+        if len(prefix) != 12:
+            return None
+        if not sep:
+            return prefix, 0
+        if suffix.isdigit():
+            return prefix, int(suffix)
+        return None
+
+    @classmethod
+    def _seed_values(cls, prefixes):
+        """
+        First free suffix for prefixes that have no sequence row yet, based on
+        IDs that already exist (e.g. entered by hand).
+        """
+        seeds = dict.fromkeys(prefixes, 0)
+        existing = (
+            Equipment.objects
+            .annotate(id_prefix=Substr('equipment_id', 1, 12))
+            .filter(id_prefix__in=seeds)
+            .values_list('equipment_id', flat=True)
+        )
+        for parsed in map(cls.parse_id, existing):
+            if parsed and parsed[0] in seeds:
+                seeds[parsed[0]] = max(seeds[parsed[0]], parsed[1] + 1)
+        return seeds
+
+    @classmethod
+    def allocate_many(cls, counts):
+        """
+        Reserve IDs for several prefixes at once. `counts` maps prefix -> number
+        of IDs wanted; returns prefix -> list of IDs in order.
+
+        Costs a fixed number of queries however many prefixes are involved.
+        """
+        counts = {prefix: count for prefix, count in counts.items() if count > 0}
+        if not counts:
+            return {}
+        with transaction.atomic():
+            sequences = {
+                sequence.prefix: sequence
+                for sequence in cls.objects.select_for_update().filter(prefix__in=counts).order_by('prefix')
+            }
+            missing = [prefix for prefix in counts if prefix not in sequences]
+            if missing:
+                # ignore_conflicts: a concurrent writer may seed the same prefix; we then wait on their row.
+                cls.objects.bulk_create(
+                    [cls(prefix=prefix, next_value=value) for prefix, value in cls._seed_values(missing).items()],
+                    ignore_conflicts=True
+                )
+                sequences.update(
+                    (sequence.prefix, sequence)
+                    for sequence in cls.objects.select_for_update().filter(prefix__in=missing).order_by('prefix')
+                )
+
+            allocated = {}
+            for prefix, count in counts.items():
+                sequence = sequences[prefix]
+                start = sequence.next_value
+                sequence.next_value = start + count
+                allocated[prefix] = [cls.format_id(prefix, value) for value in range(start, start + count)]
+            cls.objects.bulk_update(sequences.values(), ['next_value'])
+        return allocated
+
+    @classmethod
+    def skip_past(cls, equipment_id):
+        """
+        Move the sequence of a hand-entered `equipment_id`'s prefix past it, so
+        it isn't allocated again. IDs outside the generated format, and
+        prefixes without a sequence row yet (seeded from existing IDs on first
+        use), need nothing.
+        """
+        parsed = cls.parse_id(equipment_id)
+        if parsed:
+            prefix, value = parsed
+            cls.objects.filter(prefix=prefix, next_value__lte=value).update(next_value=value + 1)
+
+    @classmethod
+    def allocate(cls, prefix, count=1):
+        """
+        Reserve `count` consecutive IDs for `prefix` and return them in order.
+        """
+        return cls.allocate_many({prefix: count}).get(prefix, [])
+
+    @classmethod
+    def assign(cls, equipment_list):
+        """
+        Fill in `equipment_id` on unsaved Equipment instances ahead of a
+        bulk_create, taking one range per distinct prefix.
+        """
+        by_prefix = {}
+        for equipment in equipment_list:
+            if not equipment.equipment_id:
+                by_prefix.setdefault(equipment._generate_equipment_id(), []).append(equipment)
+        allocated = cls.allocate_many({prefix: len(pending) for prefix, pending in by_prefix.items()})
+        for prefix, pending in by_prefix.items():
+            for equipment, equipment_id in zip(pending, allocated[prefix]):
+                equipment.equipment_id = equipment_id
+        return equipment_list
+
+
+class EquipmentSearchToken(models.Model):
+    """
+    One searchable token of an equipment's name, serial number, manufacturer,
+    model or equipment ID, with a weight for ranking.
+
+    Used as the search index on databases without full-text search support
+    (SQLite, MySQL); on PostgreSQL equipment.search queries GIN indexes over
+    the Equipment table instead and this table stays empty. See equipment.search.
+    """
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='search_tokens'
+    )
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'equipment']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['equipment', 'token'], name='unique_equipment_search_token'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> equipment {self.equipment_id}"
+
+
+def full_name_expression(relation):
+    """
+    SQL expression for "<first_name> <last_name>" of the user behind `relation`,
+    or NULL when the relation is empty.
+    """
+    return Case(
+        When(**{f'{relation}__isnull': True}, then=Value(None)),
+        default=Trim(Concat(
+            Coalesce(f'{relation}__first_name', Value('')),
+            Value(' '),
+            Coalesce(f'{relation}__last_name', Value('')),
+        )),
+        output_field=models.CharField()
+    )
+
+
+class EquipmentMaintenanceActivityQuerySet(models.QuerySet):
+
+    def with_names(self):
+        """
+        Annotate `equipment_name` and `technician_name` in SQL so read
+        serializers don't need to load the related rows.
+        """
+        return self.annotate(
+            equipment_name=F('equipment__name'),
+            technician_name=full_name_expression('technician'),
+        )
 
 
 class EquipmentMaintenanceActivity(TimeStampedModel):
@@ -203,6 +402,8 @@ class EquipmentMaintenanceActivity(TimeStampedModel):
     )
     notes = models.TextField(blank=True, null=True)
 
+    objects = EquipmentMaintenanceActivityQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date_time']
         indexes = [
@@ -213,17 +414,389 @@ class EquipmentMaintenanceActivity(TimeStampedModel):
         # Auto-assign pre_status on creation
         if not self.pk and not self.pre_status: 
             self.pre_status = self.equipment.operational_status
-            
-        super().save(*args, **kwargs)
-        
-        # Only update Equipment operational_status if post_status is set
-        if self.post_status and self.post_status.strip():  # Ensures it's not empty or None
-            self.equipment.operational_status = self.post_status
-            self.equipment.save(update_fields=['operational_status'])
+
+        # Remember which rollup bucket this activity was counted in before the update
+        previous = None
+        if self.pk:
+            previous = (
+                EquipmentMaintenanceActivity.objects
+                .filter(pk=self.pk)
+                .values('date_time', 'activity_type', 'equipment_id')
+                .first()
+            )
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            current = {
+                'date_time': self.date_time,
+                'activity_type': self.activity_type,
+                'equipment_id': self.equipment_id,
+            }
+            if previous != current:
+                if previous:
+                    MaintenanceDailyRollup.record(**previous, delta=-1)
+                MaintenanceDailyRollup.record(**current, department=self.equipment.department, delta=1)
+
+            # Only update Equipment operational_status if post_status is set
+            if self.post_status and self.post_status.strip():  # Ensures it's not empty or None
+                self.equipment.operational_status = self.post_status
+                # Stamped with when the work was done, which may be earlier than when it was logged
+                # (but never before the equipment's latest transition; see EquipmentStatusHistory.record).
+                self.equipment.tag_status_change(
+                    'activity', changed_by=self.technician, activity=self, changed_at=self.date_time
+                )
+                self.equipment.save(update_fields=['operational_status'])
 
     def __str__(self):
         return f"{self.get_activity_type_display()} on {self.equipment.name}"
 
+
+class MaintenanceDailyRollup(models.Model):
+    """
+    Pre-aggregated count of maintenance activities per day, activity type and
+    equipment, so dashboard overviews don't have to scan the activity history.
+
+    Kept up to date incrementally by EquipmentMaintenanceActivity.save() and the
+    post_delete signal; `manage.py rebuild_maintenance_rollup` recomputes it from scratch.
+    """
+    day = models.DateField()
+    activity_type = models.CharField(
+        max_length=30,
+        choices=EquipmentMaintenanceActivity.ACTIVITY_TYPE_CHOICES
+    )
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups'
+    )
+    department = models.CharField(max_length=255, choices=Equipment.DEPARTMENT)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'activity_type']),
+            models.Index(fields=['equipment', 'day']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'activity_type', 'equipment'], name='unique_daily_rollup_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.activity_type} on equipment {self.equipment_id}: {self.count}"
+
+    @classmethod
+    def record(cls, date_time, activity_type, equipment_id, delta, department=None):
+        """
+        Atomically add `delta` to the bucket that an activity at `date_time` falls into.
+        """
+        bucket = {
+            'day': timezone.localtime(date_time).date(),
+            'activity_type': activity_type,
+            'equipment_id': equipment_id,
+        }
+        if cls.objects.filter(**bucket).update(count=F('count') + delta) or delta <= 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**bucket, department=department or '', count=delta)
+        except IntegrityError:
+            # Another writer created the bucket first; add to theirs.
+            cls.objects.filter(**bucket).update(count=F('count') + delta)
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """
+        Recompute every bucket from the activity table. Returns the number of buckets written.
+        """
+        grouped = (
+            EquipmentMaintenanceActivity.objects
+            .annotate(day=TruncDate('date_time'))
+            .values('day', 'activity_type', 'equipment_id', 'equipment__department')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        written = 0
+        with transaction.atomic():
+            cls.objects.all().delete()
+            pending = []
+            for row in grouped.iterator(chunk_size=batch_size):
+                pending.append(cls(
+                    day=row['day'],
+                    activity_type=row['activity_type'],
+                    equipment_id=row['equipment_id'],
+                    department=row['equipment__department'],
+                    count=row['total'],
+                ))
+                if len(pending) >= batch_size:
+                    written += len(cls.objects.bulk_create(pending))
+                    pending = []
+            if pending:
+                written += len(cls.objects.bulk_create(pending))
+        return written
+
+
+
+class EquipmentStatusHistoryQuerySet(models.QuerySet):
+
+    def statuses_as_of(self, moment):
+        """
+        Return {equipment_id: operational_status} as it stood at `moment`,
+        for every equipment that existed then.
+
+        Answered from one range scan of the (equipment, -changed_at) index: on
+        PostgreSQL DISTINCT ON keeps the first row per equipment, elsewhere the
+        rows arrive in the same order and the first per equipment is kept here.
+        """
+        rows = self.filter(changed_at__lte=moment).order_by('equipment_id', '-changed_at', '-id')
+        if connection.vendor == 'postgresql':
+            rows = rows.distinct('equipment_id')
+        statuses = {}
+        for equipment_id, status in rows.values_list('equipment_id', 'to_status').iterator(chunk_size=2000):
+            statuses.setdefault(equipment_id, status)
+        return statuses
+
+    def counts_as_of(self, moment):
+        """
+        Number of equipment per operational status at `moment`.
+        """
+        counts = {}
+        for status in self.statuses_as_of(moment).values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+
+class EquipmentStatusHistory(models.Model):
+    """
+    Append-only log of Equipment.operational_status transitions.
+
+    A row is written for every status an equipment takes, starting with the
+    one it was created with (`from_status` is null then), by the Equipment
+    post_save signal or, for bulk paths that bypass it, by record_bulk().
+    """
+    SOURCE_CHOICES = Choices(
+        ('api', 'API'),
+        ('activity', 'Maintenance Activity'),
+        ('admin', 'Admin'),
+        ('import', 'Bulk Import'),
+        ('backfill', 'Backfill'),
+        ('system', 'System'),
+    )
+
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='status_history'
+    )
+    from_status = models.CharField(max_length=20, choices=Equipment.OPERATIONAL_STATUS, null=True, blank=True)
+    to_status = models.CharField(max_length=20, choices=Equipment.OPERATIONAL_STATUS)
+    changed_at = models.DateTimeField(default=timezone.now)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=SOURCE_CHOICES.system)
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='equipment_status_changes'
+    )
+    activity = models.ForeignKey(
+        EquipmentMaintenanceActivity,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='status_changes'
+    )
+
+    objects = EquipmentStatusHistoryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-changed_at', '-id']
+        verbose_name_plural = _('Equipment status history')
+        indexes = [
+            # Serves both "history of one equipment" and "status of the fleet as of X".
+            models.Index(fields=['equipment', '-changed_at', '-id'], name='equipment_status_as_of_idx'),
+            models.Index(fields=['changed_at']),
+        ]
+
+    def __str__(self):
+        return f"Equipment {self.equipment_id}: {self.from_status or '-'} -> {self.to_status} at {self.changed_at}"
+
+    @classmethod
+    def record(cls, equipment, from_status, source=None, changed_by=None, activity=None, changed_at=None):
+        """
+        Log `equipment` moving from `from_status` (None when just created) to
+        its current status at `changed_at` (default now). Nothing is written
+        if the status didn't change.
+
+        `changed_at` is kept between the equipment's latest transition and
+        now: the newest row must hold the status the equipment has, so an
+        activity dated before a later change, or in the future, is logged at
+        the latest transition or now instead.
+        """
+        if from_status == equipment.operational_status:
+            return None
+        if changed_by is not None and not changed_by.is_authenticated:
+            changed_by = None
+        now = timezone.now()
+        with transaction.atomic():
+            if changed_at is None or changed_at > now:
+                changed_at = now
+            else:
+                latest = (
+                    cls.objects.filter(equipment=equipment).order_by('-changed_at')
+                    .values_list('changed_at', flat=True).first()
+                )
+                if latest is not None and latest > changed_at:
+                    changed_at = latest
+            entry = cls.objects.create(
+                equipment=equipment,
+                from_status=from_status,
+                to_status=equipment.operational_status,
+                source=source or cls.SOURCE_CHOICES.system,
+                changed_by=changed_by,
+                activity=activity,
+                changed_at=changed_at
+            )
+            EquipmentReliability.apply([entry])
+        return entry
+
+    @classmethod
+    def record_created(cls, instances, source, changed_by=None):
+        """
+        Log the initial status of equipment inserted with bulk_create, which doesn't send post_save.
+        """
+        now = timezone.now()
+        entries = cls.objects.bulk_create([
+            cls(
+                equipment_id=equipment.pk,
+                to_status=equipment.operational_status,
+                changed_at=equipment.created or now,
+                source=source,
+                changed_by=changed_by
+            )
+            for equipment in instances
+        ])
+        EquipmentReliability.apply(entries)
+        return entries
+
+    @classmethod
+    def record_bulk(cls, queryset, status, source, changed_by=None):
+        """
+        Log the transitions queryset.update(operational_status=status) is
+        about to make. Call it in the same transaction, before the update.
+        """
+        now = timezone.now()
+        moving = queryset.exclude(operational_status=status).values_list('pk', 'operational_status').order_by()
+        entries = cls.objects.bulk_create([
+            cls(
+                equipment_id=pk,
+                from_status=from_status,
+                to_status=status,
+                changed_at=now,
+                source=source,
+                changed_by=changed_by
+            )
+            for pk, from_status in moving.iterator(chunk_size=2000)
+        ], batch_size=1000)
+        EquipmentReliability.apply(entries)
+        return entries
+
+
+class EquipmentReliability(models.Model):
+    """
+    Running uptime / downtime / failure / repair totals of one equipment,
+    folded from its status history (see equipment.reliability).
+
+    Kept up to date by EquipmentStatusHistory as transitions are appended;
+    `manage.py rebuild_equipment_reliability` replays the history from scratch.
+    Time in the current state is not included until the state ends, so
+    reports add `now - state_since` themselves.
+    """
+    STATE_CHOICES = Choices(
+        (UP, 'Up'),
+        (DOWN, 'Down'),
+        (OUT, 'Out of Service'),
+    )
+    FOLDED_FIELDS = [
+        'state', 'state_since', 'uptime_seconds', 'downtime_seconds', 'repair_seconds', 'failures', 'repairs'
+    ]
+
+    equipment = models.OneToOneField(
+        Equipment,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='reliability'
+    )
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_CHOICES.up)
+    state_since = models.DateTimeField(null=True)
+    uptime_seconds = models.FloatField(default=0)
+    downtime_seconds = models.FloatField(default=0)
+    # Downtime of the spells that ended in a repair (rather than in decommissioning)
+    repair_seconds = models.FloatField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    repairs = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Equipment {self.equipment_id}: {self.failures} failures, {self.repairs} repairs"
+
+    @classmethod
+    def apply(cls, entries):
+        """
+        Fold newly appended EquipmentStatusHistory entries (in the order they
+        happened) into the accumulators: one locking read and one write per
+        batch. Equipment hit by an out-of-order entry are replayed instead.
+        """
+        if not entries:
+            return
+        with transaction.atomic():
+            accumulators = cls.objects.select_for_update().order_by('pk').in_bulk({entry.equipment_id for entry in entries})
+            created, stale = {}, set()
+            for entry in entries:
+                accumulator = accumulators.get(entry.equipment_id)
+                if accumulator is None:
+                    accumulator = accumulators[entry.equipment_id] = created[entry.equipment_id] = cls(
+                        equipment_id=entry.equipment_id
+                    )
+                if not fold_transition(accumulator, entry.to_status, entry.changed_at):
+                    stale.add(entry.equipment_id)
+            cls.objects.bulk_create([accumulator for pk, accumulator in created.items() if pk not in stale])
+            cls.objects.bulk_update(
+                [accumulator for pk, accumulator in accumulators.items() if pk not in created and pk not in stale],
+                cls.FOLDED_FIELDS
+            )
+            if stale:
+                cls.rebuild(equipment_ids=stale)
+
+    @classmethod
+    def rebuild(cls, equipment_ids=None, batch_size=1000):
+        """
+        Replay the status history, in one ordered pass, into fresh
+        accumulators for `equipment_ids` (or every equipment). Returns the
+        number of accumulators written.
+        """
+        history = EquipmentStatusHistory.objects.order_by('equipment_id', 'changed_at', 'id')
+        existing = cls.objects.all()
+        if equipment_ids is not None:
+            history = history.filter(equipment_id__in=equipment_ids)
+            existing = existing.filter(pk__in=equipment_ids)
+        rows = history.values_list('equipment_id', 'to_status', 'changed_at').iterator(chunk_size=2000)
+
+        written = 0
+        with transaction.atomic():
+            existing.delete()
+            pending = []
+            for equipment_id, transitions in groupby(rows, key=lambda row: row[0]):
+                accumulator = cls(equipment_id=equipment_id)
+                for _, to_status, changed_at in transitions:
+                    fold_transition(accumulator, to_status, changed_at)
+                pending.append(accumulator)
+                if len(pending) >= batch_size:
+                    written += len(cls.objects.bulk_create(pending))
+                    pending = []
+            if pending:
+                written += len(cls.objects.bulk_create(pending))
+        return written
+
     
     
 
@@ -319,6 +892,11 @@ class MaintenanceSchedule(TimeStampedModel):
     # Additional fields often used for internal logic
     last_notification = models.DateTimeField(blank=True, null=True)
     next_occurrence = models.DateTimeField(blank=True, null=True)
+    # Failed sends of the reminder for next_occurrence; reset once it is sent or given up on.
+    reminder_attempts = models.PositiveSmallIntegerField(default=0)
+
+    # Fields that affect which occurrences get materialized
+    RECURRENCE_FIELDS = ('start_date', 'frequency', 'interval', 'recurring_end')
 
     class Meta:
         indexes = [
@@ -368,19 +946,19 @@ class MaintenanceSchedule(TimeStampedModel):
         """
         Return the (freq, interval) tuple needed to construct an rrule.
         """
-        freq_map = {
-            'daily': rrule.DAILY,
-            'weekly': rrule.WEEKLY,
-            'biweekly': rrule.WEEKLY,  # 'biweekly' also uses WEEKLY
-            'monthly': rrule.MONTHLY,
-        }
-        freq = freq_map.get(self.frequency, rrule.DAILY)
+        freq = RRULE_FREQUENCIES.get(self.frequency, rrule.DAILY)
 
         # If 'biweekly', interval is forced to 2 (set in clean() as well)
         effective_interval = 2 if self.frequency == 'biweekly' else self.interval
 
         return freq, effective_interval
 
+    def get_recurrence(self):
+        """
+        Return the Recurrence for this schedule's current recurrence fields.
+        """
+        return Recurrence.for_schedule(self)
+
     def get_next_occurrences(self, count=1, lookahead_days=1):
         """
         Retrieve the next `count` occurrences within `lookahead_days` days from now.
@@ -392,16 +970,7 @@ class MaintenanceSchedule(TimeStampedModel):
         if self.frequency == 'once':
             return [self.start_date] if self.start_date > now else []
 
-        freq, effective_interval = self.get_rrule_params()
-        rule = rrule.rrule(
-            freq,
-            dtstart=self.start_date,
-            interval=effective_interval,
-            until=self.recurring_end
-        )
-
-        occurrences = rule.between(now, now + timedelta(days=lookahead_days), inc=True)
-        return occurrences[:count]
+        return self.get_recurrence().between(now, now + timedelta(days=lookahead_days), inc=True, limit=count)
 
     def compute_next_occurrence(self):
         """
@@ -412,17 +981,11 @@ class MaintenanceSchedule(TimeStampedModel):
         if self.frequency == 'once':
             return self.start_date if self.start_date > now else None
 
-        freq, effective_interval = self.get_rrule_params()
-        rule = rrule.rrule(
-            freq,
-            dtstart=self.start_date,
-            interval=effective_interval,
-            until=self.recurring_end
-        )
-
-        # Look up to 5 years ahead for the next occurrence
-        next_occurrences = rule.between(now, now + timedelta(days=365 * 5), inc=False)
-        return next_occurrences[0] if next_occurrences else None
+        # Computed directly rather than by expanding the rule; only look up to 5 years ahead.
+        next_occurrence = self.get_recurrence().next_after(now)
+        if next_occurrence is None or next_occurrence >= now + timedelta(days=365 * 5):
+            return None
+        return next_occurrence
     
     def get_occurrences_in_range(self, start, end):
         """
@@ -434,24 +997,96 @@ class MaintenanceSchedule(TimeStampedModel):
                 return [self.start_date]
             return []
 
-        # For recurring schedules, use rrule to compute occurrences between start and end.
-        freq, effective_interval = self.get_rrule_params()
-        rule = rrule.rrule(
-            freq,
-            dtstart=self.start_date,
-            interval=effective_interval,
-            until=self.recurring_end
-        )
-        occurrences = rule.between(start, end, inc=True)
-        
-        return occurrences
+        return self.get_recurrence().between(start, end, inc=True)
+
+    def get_occurrence_horizon(self):
+        """
+        Return the furthest date/time up to which occurrences are materialized.
+        """
+        horizon_days = getattr(settings, 'MAINTENANCE_OCCURRENCE_HORIZON_DAYS', 365)
+        horizon = timezone.now() + timedelta(days=horizon_days)
+        if self.recurring_end and self.recurring_end < horizon:
+            return self.recurring_end
+        return horizon
+
+    def build_occurrences(self, after=None, until=None):
+        """
+        Build (unsaved) MaintenanceOccurrence rows for this schedule, strictly after
+        `after` (or from start_date if omitted) and up to `until` (or the horizon).
+        """
+        until = until or self.get_occurrence_horizon()
+        occurrences = self.get_occurrences_in_range(after or self.start_date, until)
+        return [
+            MaintenanceOccurrence(schedule=self, occurrence_at=occ)
+            for occ in occurrences
+            if after is None or occ > after
+        ]
+
+    def materialize_occurrences(self):
+        """
+        Replace the persisted occurrences of this schedule with freshly computed ones.
+        """
+        with transaction.atomic():
+            self.occurrences.all().delete()
+            MaintenanceOccurrence.objects.bulk_create(self.build_occurrences(), batch_size=1000)
 
     def save(self, *args, **kwargs):
         """
-        Override save() to update self.next_occurrence right before saving.
+        Override save() to update self.next_occurrence right before saving and
+        keep the materialized occurrences in sync with the recurrence settings.
         """
         self.next_occurrence = self.compute_next_occurrence()
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        rematerialize = self._recurrence_changed() and (
+            update_fields is None or set(update_fields) & set(self.RECURRENCE_FIELDS)
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if rematerialize:
+                self.materialize_occurrences()
+        self._loaded_recurrence = {field: getattr(self, field) for field in self.RECURRENCE_FIELDS}
+
+    def _recurrence_changed(self):
+        """
+        Whether any recurrence field differs from the value loaded from the
+        database (see equipment.signals). New schedules, and fields that
+        weren't loaded, count as changed.
+        """
+        if self._state.adding:
+            return True
+        loaded = getattr(self, '_loaded_recurrence', {})
+        return any(
+            field not in loaded or loaded[field] != getattr(self, field)
+            for field in self.RECURRENCE_FIELDS
+        )
+
+
+class MaintenanceOccurrence(models.Model):
+    """
+    A single materialized occurrence of a MaintenanceSchedule.
+
+    Rows are rebuilt whenever the schedule is saved and extended periodically by
+    the `extend_maintenance_occurrence_horizon` task, so calendar views can use a
+    plain indexed range query instead of expanding recurrence rules per request.
+    """
+    schedule = models.ForeignKey(
+        MaintenanceSchedule,
+        on_delete=models.CASCADE,
+        related_name='occurrences'
+    )
+    occurrence_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['occurrence_at']
+        indexes = [
+            models.Index(fields=['occurrence_at', 'schedule']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['schedule', 'occurrence_at'], name='unique_schedule_occurrence'),
+        ]
+
+    def __str__(self):
+        return f"{self.schedule.title} @ {self.occurrence_at:%Y-%m-%d %H:%M}"
         
         
             
@@ -0,0 +1,27 @@
+from core.pagination import KeysetCursorPagination
+
+
+class EquipmentCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination for the equipment list, ordered on (modified, id).
+
+    Unlike offset pagination, each page is fetched with an indexed range
+    condition on the last row seen, so page cost stays flat however deep the
+    client scrolls through the fleet, and rows sharing a `modified` timestamp
+    are neither repeated nor skipped.
+    """
+    ordering = ('-modified', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class EquipmentStatusHistoryCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination for an equipment's status history, newest first, served
+    from the (equipment, -changed_at, -id) index.
+    """
+    ordering = ('-changed_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,142 @@
+"""
+Closed-form recurrence arithmetic for MaintenanceSchedule.
+
+dateutil's rrule finds "the next occurrence after now" by generating every
+occurrence from dtstart onwards, so its cost grows with the schedule's age and
+with how far ahead it is asked to look. For the frequencies schedules support
+the occurrence after any moment can be computed directly:
+
+- daily / weekly / biweekly: start + k * step, with k = ceil((moment - start) / step)
+- monthly: start shifted by k * interval months, skipping months without the
+  start's day-of-month (as rrule does, e.g. the 31st only falls in 31-day months)
+
+Results match rrule exactly: microseconds are dropped from the start,
+`until` is inclusive and date arithmetic is done in the start's wall clock
+time. Unknown frequencies and pathological monthly rules fall back to rrule.
+"""
+from datetime import timedelta
+
+from dateutil import rrule
+
+RRULE_FREQUENCIES = {
+    'daily': rrule.DAILY,
+    'weekly': rrule.WEEKLY,
+    'biweekly': rrule.WEEKLY,
+    'monthly': rrule.MONTHLY,
+}
+STEP_DAYS = {
+    'daily': 1,
+    'weekly': 7,
+    'biweekly': 7,
+}
+
+# Monthly rules whose day-of-month is missing from this many consecutive
+# candidate months (e.g. Feb 29 every 100 years) are left to rrule.
+MAX_SKIPPED_MONTHS = 48
+
+
+class Recurrence:
+    """
+    The occurrences of a repeating schedule: `start`, then every `interval`
+    days, weeks or months, up to and including `until`.
+    """
+
+    def __init__(self, frequency, start, interval=1, until=None):
+        self.frequency = frequency
+        self.start = start.replace(microsecond=0)
+        self.interval = 2 if frequency == 'biweekly' else max(interval or 1, 1)
+        self.until = until
+        if frequency in STEP_DAYS:
+            self.step = timedelta(days=STEP_DAYS[frequency] * self.interval)
+
+    @classmethod
+    def for_schedule(cls, schedule):
+        return cls(schedule.frequency, schedule.start_date, schedule.interval, schedule.recurring_end)
+
+    def to_rrule(self):
+        return rrule.rrule(
+            RRULE_FREQUENCIES.get(self.frequency, rrule.DAILY),
+            dtstart=self.start,
+            interval=self.interval,
+            until=self.until
+        )
+
+    def _local(self, moment):
+        # Compare and subtract in the start's time zone so wall clock arithmetic matches rrule.
+        if moment.tzinfo is not None and self.start.tzinfo is not None:
+            return moment.astimezone(self.start.tzinfo)
+        return moment
+
+    def _within_until(self, occurrence):
+        return occurrence if self.until is None or occurrence <= self.until else None
+
+    def _next_fixed_step(self, moment, inclusive):
+        if moment < self.start or (inclusive and moment == self.start):
+            return self.start
+        steps, remainder = divmod(moment - self.start, self.step)
+        if remainder or not inclusive:
+            steps += 1
+        try:
+            return self.start + steps * self.step
+        except OverflowError:
+            return None
+
+    def _monthly(self, index):
+        # The start shifted by `index * interval` months, or None if that month lacks the day.
+        month = self.start.month - 1 + index * self.interval
+        try:
+            return self.start.replace(year=self.start.year + month // 12, month=month % 12 + 1)
+        except ValueError:
+            return None
+
+    def _next_monthly(self, moment, inclusive):
+        elapsed = (moment.year - self.start.year) * 12 + moment.month - self.start.month
+        index = max(elapsed // self.interval, 0)
+        skipped = 0
+        while skipped <= MAX_SKIPPED_MONTHS:
+            try:
+                occurrence = self._monthly(index)
+            except OverflowError:
+                return None
+            if occurrence is None:
+                skipped += 1
+            elif occurrence > moment or (inclusive and occurrence == moment):
+                return occurrence
+            else:
+                skipped = 0
+            index += 1
+            if self.until is not None and occurrence is not None and occurrence > self.until:
+                return None
+        return self._rrule_after(moment, inclusive)
+
+    def _rrule_after(self, moment, inclusive):
+        return self.to_rrule().after(moment, inc=inclusive)
+
+    def next_after(self, moment, inclusive=False):
+        """
+        The first occurrence after `moment` (or at it, if `inclusive`), or None.
+        """
+        moment = self._local(moment)
+        if self.frequency in STEP_DAYS:
+            occurrence = self._next_fixed_step(moment, inclusive)
+        elif self.frequency == 'monthly':
+            occurrence = self._next_monthly(moment, inclusive)
+        else:
+            occurrence = self._rrule_after(moment, inclusive)
+        return self._within_until(occurrence) if occurrence is not None else None
+
+    def between(self, after, before, inc=False, limit=None):
+        """
+        Occurrences between `after` and `before` like rrule.between(), optionally
+        stopping after `limit` of them. Cost is proportional to the number
+        returned, not to how far `after` is from the start.
+        """
+        before = self._local(before)
+        occurrences = []
+        occurrence = self.next_after(after, inclusive=inc)
+        while occurrence is not None and (occurrence < before or (inc and occurrence == before)):
+            occurrences.append(occurrence)
+            if limit is not None and len(occurrences) >= limit:
+                break
+            occurrence = self.next_after(occurrence)
+        return occurrences
@@ -0,0 +1,60 @@
+"""
+Reliability accounting for equipment: uptime, downtime, failures and repairs.
+
+Each equipment's status history is folded, transition by transition, into a
+small accumulator (EquipmentReliability), so fleet-wide MTBF / MTTR reports
+read one row per equipment instead of replaying the whole history.
+
+Statuses map onto three states: functional equipment is up, non-functional
+or under-maintenance equipment is down, and decommissioned equipment is out
+of service (its time counts towards neither). A failure is a move from up to
+down; a repair is a move from down back to up.
+"""
+UP = 'up'
+DOWN = 'down'
+OUT = 'out'
+
+STATE_OF_STATUS = {
+    'functional': UP,
+    'non_functional': DOWN,
+    'under_maintenance': DOWN,
+    'decommissioned': OUT,
+}
+
+
+def state_of(status):
+    return STATE_OF_STATUS.get(status, OUT)
+
+
+def fold_transition(accumulator, to_status, at):
+    """
+    Advance `accumulator` (anything with state, state_since, uptime_seconds,
+    downtime_seconds, repair_seconds, failures and repairs attributes) by a
+    move to `to_status` at `at`. A state's time is booked when it ends; moves
+    within a state (e.g. non-functional to under maintenance) don't end it.
+
+    Returns False, leaving the accumulator untouched, if the transition is
+    older than the state it would end; such out-of-order transitions need a
+    replay of the history instead.
+    """
+    state = state_of(to_status)
+    if accumulator.state_since is None:
+        accumulator.state, accumulator.state_since = state, at
+        return True
+    if at < accumulator.state_since:
+        return False
+    if state == accumulator.state:
+        return True
+
+    elapsed = (at - accumulator.state_since).total_seconds()
+    if accumulator.state == UP:
+        accumulator.uptime_seconds += elapsed
+        if state == DOWN:
+            accumulator.failures += 1
+    elif accumulator.state == DOWN:
+        accumulator.downtime_seconds += elapsed
+        if state == UP:
+            accumulator.repairs += 1
+            accumulator.repair_seconds += elapsed
+    accumulator.state, accumulator.state_since = state, at
+    return True
@@ -0,0 +1,218 @@
+"""
+Indexed equipment search over name, serial number, manufacturer, model and
+equipment ID.
+
+On PostgreSQL the search uses a GIN index over a `simple`-config SearchVector of
+those fields plus pg_trgm GIN indexes for substring and fuzzy matches (both
+created by migration 0008). Other databases get a portable token index: every
+equipment is split into lowercase alphanumeric tokens stored in
+EquipmentSearchToken, and query terms are matched as token prefixes with
+B-tree range scans. Both backends return results ranked best-first.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Max, Q, Value, When
+from rest_framework.filters import SearchFilter
+
+from .models import Equipment, EquipmentSearchToken
+
+# Field -> token weight. IDs and serials are the most specific identifiers.
+SEARCH_FIELDS = {
+    'equipment_id': 4,
+    'serial_number': 4,
+    'name': 3,
+    'manufacturer': 2,
+    'model': 2,
+}
+SEARCH_VECTOR_FIELDS = ('name', 'serial_number', 'manufacturer', 'model', 'equipment_id')
+TRIGRAM_FIELDS = ('name', 'serial_number', 'equipment_id')
+
+TOKEN_MAX_LENGTH = 64
+MAX_QUERY_TERMS = 8
+EXACT_MATCH_BONUS = 1
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """
+    Lowercase alphanumeric runs of `text`, plus the whole value with
+    punctuation removed (so "SN-00123" is found by "sn00" as well as "00123").
+    """
+    if not text:
+        return []
+    parts = [part.lower() for part in _TOKEN_RE.findall(text)]
+    tokens = list(dict.fromkeys(parts))
+    compact = ''.join(parts)
+    if len(parts) > 1 and compact not in tokens:
+        tokens.append(compact)
+    return [token[:TOKEN_MAX_LENGTH] for token in tokens]
+
+
+def query_terms(query):
+    return [term[:TOKEN_MAX_LENGTH] for term in dict.fromkeys(_TOKEN_RE.findall(query.lower()))][:MAX_QUERY_TERMS]
+
+
+def equipment_tokens(equipment):
+    """
+    {token: weight} for one equipment, keeping the highest weight per token.
+    """
+    tokens = {}
+    for field, weight in SEARCH_FIELDS.items():
+        for token in tokenize(getattr(equipment, field, None)):
+            tokens[token] = max(tokens.get(token, 0), weight)
+    return tokens
+
+
+def index_equipment(equipment_list):
+    """
+    (Re)build the search tokens of the given saved equipment. A no-op on
+    PostgreSQL, where the GIN indexes are maintained by the database.
+    """
+    if uses_postgres_search() or not equipment_list:
+        return
+    with transaction.atomic():
+        EquipmentSearchToken.objects.filter(equipment__in=[equipment.pk for equipment in equipment_list]).delete()
+        EquipmentSearchToken.objects.bulk_create(
+            [
+                EquipmentSearchToken(equipment_id=equipment.pk, token=token, weight=weight)
+                for equipment in equipment_list
+                for token, weight in equipment_tokens(equipment).items()
+            ]
+        )
+
+
+def rebuild_search_index(batch_size=1000):
+    """
+    Rebuild the token table for every equipment. Returns the number indexed.
+    """
+    if uses_postgres_search():
+        return 0
+    indexed = 0
+    with transaction.atomic():
+        EquipmentSearchToken.objects.all().delete()
+        batch = []
+        for equipment in Equipment.objects.only('id', *SEARCH_FIELDS).iterator(chunk_size=batch_size):
+            batch.append(equipment)
+            if len(batch) >= batch_size:
+                index_equipment(batch)
+                indexed += len(batch)
+                batch = []
+        index_equipment(batch)
+        indexed += len(batch)
+    return indexed
+
+
+def _prefix_match(term):
+    # A range instead of startswith so every backend can use the (token, equipment) index.
+    return Q(token__gte=term, token__lt=term + '\uffff')
+
+
+def _ranked_token_matches(terms):
+    """
+    (equipment_id, score) rows for equipment matching every term, best first.
+    Each term scores the weight of the best token it prefixes, plus a bonus
+    when it matches a token exactly.
+    """
+    matches = [_prefix_match(term) for term in terms]
+    per_term = {}
+    for index, (term, match) in enumerate(zip(terms, matches)):
+        per_term[f'term_{index}'] = Max(Case(When(match, then='weight'), default=Value(0), output_field=IntegerField()))
+        per_term[f'exact_{index}'] = Max(Case(
+            When(token=term, then=Value(EXACT_MATCH_BONUS)), default=Value(0), output_field=IntegerField()
+        ))
+
+    score = reduce(lambda total, name: total + per_term[name], per_term, Value(0))
+    return (
+        EquipmentSearchToken.objects
+        .filter(reduce(or_, matches))
+        .values('equipment_id')
+        .annotate(**per_term)
+        .filter(**{f'term_{index}__gt': 0 for index in range(len(terms))})
+        .annotate(score=score)
+        .order_by('-score', 'equipment_id')
+    )
+
+
+def _postgres_search(queryset, query, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+    from django.db.models.functions import Greatest
+
+    vector = SearchVector(*SEARCH_VECTOR_FIELDS, config='simple')
+    ts_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+    substring = reduce(or_, (Q(**{f'{field}__icontains': query}) for field in TRIGRAM_FIELDS))
+    return (
+        queryset
+        .annotate(search_document=vector)
+        .filter(Q(search_document=ts_query) | substring)
+        .annotate(search_rank=SearchRank(vector, ts_query) + Greatest(
+            *(TrigramSimilarity(field, query) for field in TRIGRAM_FIELDS)
+        ))
+        .order_by('-search_rank', 'id')
+    )
+
+
+def search_equipment(query, limit=20, queryset=None):
+    """
+    Return up to `limit` Equipment matching `query`, best match first, each
+    with a `search_rank` attribute.
+    """
+    queryset = Equipment.objects.all() if queryset is None else queryset
+    terms = query_terms(query or '')
+    if not terms:
+        return []
+
+    if uses_postgres_search():
+        return list(_postgres_search(queryset, query.strip(), terms)[:limit])
+
+    ranked = list(_ranked_token_matches(terms).values_list('equipment_id', 'score')[:limit])
+    found = queryset.in_bulk([equipment_id for equipment_id, _ in ranked])
+    results = []
+    for equipment_id, score in ranked:
+        equipment = found.get(equipment_id)
+        if equipment is not None:
+            equipment.search_rank = score
+            results.append(equipment)
+    return results
+
+
+def filter_equipment(queryset, query):
+    """
+    Narrow an Equipment queryset to rows matching `query` using the search
+    index, without changing its ordering.
+    """
+    terms = query_terms(query or '')
+    if not terms:
+        return queryset
+    if uses_postgres_search():
+        return queryset.filter(pk__in=_postgres_search(Equipment.objects.all(), query.strip(), terms).values('pk'))
+    return queryset.filter(pk__in=_ranked_token_matches(terms).order_by().values('equipment_id'))
+
+
+class EquipmentSearchFilter(SearchFilter):
+    """
+    `?search=` for equipment lists, backed by the search index instead of
+    unindexed icontains scans.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return filter_equipment(queryset, ' '.join(terms))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': "Search name, serial number, manufacturer, model and equipment ID.",
+            'schema': {'type': 'string'},
+        }]
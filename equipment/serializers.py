@@ -3,11 +3,36 @@ from django.utils import timezone
 from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from .models import Equipment, EquipmentMaintenanceActivity, MaintenanceSchedule, Supplier
+from .models import Equipment, EquipmentMaintenanceActivity, EquipmentStatusHistory, MaintenanceSchedule, Supplier
 
 User = get_user_model()
 
 
+class SparseFieldsetMixin:
+    """
+    Let clients request a subset of fields with ?fields=id,name,equipment_id.
+    Unknown field names are ignored; without the parameter all fields are returned.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.get_requested_fields()
+        if requested:
+            for field_name in set(self.fields) - requested:
+                self.fields.pop(field_name)
+
+    def get_requested_fields(self):
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return None
+        raw = request.query_params.get(self.fields_query_param)
+        if not raw:
+            return None
+        requested = {name.strip() for name in raw.split(',') if name.strip()}
+        return requested & set(self.fields) or None
+
+
 # -------------------------------
 # SUPPLIER SERIALIZERS
 # -------------------------------
@@ -91,18 +116,22 @@ class EquipmentWriteSerializer(serializers.ModelSerializer):
         if validated_data.get('operational_status') == 'decommissioned':
             validated_data['decommission_date'] = timezone.now()
 
-        equipment = super().create(validated_data)
+        equipment = Equipment(**validated_data)
+        equipment.tag_status_change('api', changed_by=request.user)
+        equipment.save()
         return equipment
 
     def update(self, instance, validated_data):
         new_status = validated_data.get('operational_status', instance.operational_status)
         if new_status == 'decommissioned' and instance.operational_status != 'decommissioned':
             instance.decommission_date = timezone.now()
+        request = self.context.get('request')
+        instance.tag_status_change('api', changed_by=getattr(request, 'user', None))
         instance = super().update(instance, validated_data)
         return instance
 
 
-class EquipmentReadSerializer(serializers.ModelSerializer):
+class EquipmentReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     added_by_name = serializers.SerializerMethodField()
     supplier_name = serializers.SerializerMethodField()
 
@@ -140,6 +169,36 @@ class EquipmentReadSerializer(serializers.ModelSerializer):
         return obj.added_by.get_full_name() if obj.added_by else "Unknown"
 
 
+class EquipmentImportRowSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk equipment import.
+
+    The supplier is given by company name and resolved by the importer, which
+    also checks serial-number uniqueness for a whole chunk in one query, so
+    validating a row here never touches the database.
+    """
+    supplier = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    class Meta:
+        model = Equipment
+        fields = [
+            'name',
+            'device_type',
+            'department',
+            'operational_status',
+            'serial_number',
+            'manufacturer',
+            'model',
+            'supplier',
+            'location',
+            'description',
+            'image',
+            'manual',
+            'manufacturing_date',
+        ]
+        extra_kwargs = {'serial_number': {'validators': []}}
+
+
 # -------------------------------
 # EQUIPMENT MAINTENANCE ACTIVITY SERIALIZERS
 # -------------------------------
@@ -168,8 +227,11 @@ class EquipmentMaintenanceActivityWriteSerializer(serializers.ModelSerializer):
 
 
 class EquipmentMaintenanceActivityReadSerializer(serializers.ModelSerializer):
-    technician_name = serializers.CharField(read_only=True)
-    equipment_name = serializers.CharField(source='equipment.name')
+    """
+    Expects a queryset built with EquipmentMaintenanceActivity.objects.with_names().
+    """
+    technician_name = serializers.CharField(read_only=True, allow_null=True)
+    equipment_name = serializers.CharField(read_only=True)
 
     class Meta:
         model = EquipmentMaintenanceActivity
@@ -277,3 +339,57 @@ class MaintenanceScheduleReadSerializer(serializers.ModelSerializer):
 
     def get_technician_name(self, obj):
         return obj.technician.get_full_name() if obj.technician else None
+
+
+class EquipmentStatusHistoryReadSerializer(serializers.ModelSerializer):
+    """
+    Serializer for reading EquipmentStatusHistory instances.
+    """
+    changed_by_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EquipmentStatusHistory
+        fields = [
+            'id', 'equipment', 'from_status', 'to_status', 'changed_at', 'source',
+            'changed_by', 'changed_by_name', 'activity'
+        ]
+
+    def get_changed_by_name(self, obj) -> str:
+        return obj.changed_by.get_full_name() if obj.changed_by else ''
+
+
+class MaintenanceComplianceQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the maintenance compliance endpoints.
+    """
+    start = serializers.DateField(required=False, help_text="First day of the period (default: 90 days before end).")
+    end = serializers.DateField(required=False, help_text="Last day of the period (default: today).")
+    department = serializers.ChoiceField(choices=Equipment.DEPARTMENT, required=False)
+
+    MAX_DAYS = 731
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or end - timezone.timedelta(days=90)
+        if start > end:
+            raise ValidationError({"start": "The start date must not be after the end date."})
+        if (end - start).days > self.MAX_DAYS:
+            raise ValidationError({"start": f"The period cannot be longer than {self.MAX_DAYS} days."})
+        return {**attrs, 'start': start, 'end': end}
+
+    def get_period(self):
+        """
+        Return the validated period as aware datetimes spanning whole days.
+        """
+        combine = timezone.datetime.combine
+        start = timezone.make_aware(combine(self.validated_data['start'], timezone.datetime.min.time()))
+        end = timezone.make_aware(combine(self.validated_data['end'], timezone.datetime.max.time()))
+        return start, end
+
+
+class MaintenanceComplianceOccurrenceSerializer(serializers.Serializer):
+    schedule_id = serializers.IntegerField()
+    activity_type = serializers.CharField()
+    occurrence_at = serializers.DateTimeField()
+    activity_id = serializers.IntegerField(allow_null=True)
+    status = serializers.ChoiceField(choices=['done', 'missed', 'pending'])
@@ -1,12 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.urls import reverse
-from .models import MaintenanceSchedule
+from .models import (
+    Equipment, MaintenanceSchedule, EquipmentMaintenanceActivity, MaintenanceDailyRollup, EquipmentStatusHistory
+)
+from .search import SEARCH_FIELDS, index_equipment
+from .compliance import invalidate_compliance
 from notification.models import Notification
 from django.db import transaction
-from datetime import timedelta
 import logging
-from .tasks import send_maintenance_reminder  # Import the task
 
 logger = logging.getLogger(__name__)
 
@@ -47,30 +49,69 @@ def send_maintenance_notification(sender, instance, created, **kwargs):
 
 
 
+@receiver(post_delete, sender=EquipmentMaintenanceActivity)
+def remove_activity_from_daily_rollup(sender, instance, **kwargs):
+    """
+    Decrement the daily rollup bucket the deleted activity was counted in.
+    """
+    MaintenanceDailyRollup.record(
+        date_time=instance.date_time,
+        activity_type=instance.activity_type,
+        equipment_id=instance.equipment_id,
+        delta=-1
+    )
+
+
+@receiver(post_save, sender=Equipment)
+def refresh_equipment_search_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Re-tokenize the saved equipment, unless the save didn't touch a searchable field.
+    """
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_equipment([instance])
+
+
+@receiver(post_init, sender=Equipment)
+def remember_loaded_status(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred status (or ID) isn't fetched just for this.
+    instance._loaded_status = instance.__dict__.get('operational_status')
+    instance._loaded_equipment_id = instance.__dict__.get('equipment_id')
+
+
+@receiver(post_init, sender=MaintenanceSchedule)
+def remember_loaded_recurrence(sender, instance, **kwargs):
+    # Read from __dict__ so deferred recurrence fields aren't fetched just for this.
+    instance._loaded_recurrence = {
+        field: instance.__dict__[field] for field in sender.RECURRENCE_FIELDS if field in instance.__dict__
+    }
+
+
+@receiver(post_save, sender=Equipment)
+def record_status_history(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Append the saved equipment's status change (or initial status) to its
+    status history, attributed as set by Equipment.tag_status_change().
+    """
+    if update_fields is not None and 'operational_status' not in update_fields:
+        return
+    # A status that wasn't loaded counts as unknown, so a change made after a deferred load is still logged.
+    previous = None if created else instance._loaded_status
+    instance._loaded_status = instance.operational_status
+    change = instance.__dict__.pop('_status_change', None) or {}
+    if created and 'changed_by' not in change:
+        change['changed_by'] = instance.added_by
+    EquipmentStatusHistory.record(instance, previous, **change)
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
 @receiver(post_save, sender=MaintenanceSchedule)
-def schedule_reminder_task(sender, instance, created, **kwargs):
-    logger.info(f"Signal triggered for MaintenanceSchedule: ID={instance.id}, Title={instance.title}, Created={created}")
+@receiver(post_delete, sender=MaintenanceSchedule)
+@receiver(post_save, sender=EquipmentMaintenanceActivity)
+@receiver(post_delete, sender=EquipmentMaintenanceActivity)
+def invalidate_maintenance_compliance(sender, **kwargs):
     """
-    Dynamically schedule reminder task when a maintenance schedule is created or updated.
+    Planned or performed maintenance changed; cached compliance reports are stale.
     """
-    # Get the next occurrence of the maintenance schedule
-    occurrences = instance.get_next_occurrences()
-    
-    if not occurrences:
-        logger.info("No upcoming occurrences found; skipping reminder scheduling.")
-        return  # No occurrences to schedule
-
-    next_occurrence = occurrences[0]
-
-    # Schedule the reminder task 24 hours before the next occurrence
-    reminder_time = next_occurrence - timedelta(hours=24)
-    logger.info(f"Scheduling task for {next_occurrence}, reminder time: {reminder_time}")
-
-    try:
-        send_maintenance_reminder.apply_async(
-            args=[instance.id, next_occurrence],
-            eta=reminder_time
-        )
-        logger.info("Reminder task scheduled successfully.")
-    except Exception as e:
-        logger.error(f"Error scheduling reminder task: {e}")
\ No newline at end of file
+    invalidate_compliance()
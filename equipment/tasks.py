@@ -2,9 +2,12 @@ from celery import shared_task
 from datetime import timedelta
 from django.utils import timezone
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
 from django.template.loader import render_to_string
-from .models import MaintenanceSchedule
+from django.db.models import F, Max, Q
+from .models import MaintenanceSchedule, MaintenanceOccurrence
+from django.utils.dateparse import parse_datetime
 from django.utils.html import strip_tags
 from celery.utils.log import get_task_logger
 from notification.models import Notification
@@ -13,11 +16,50 @@ from notification.models import Notification
 logger = get_task_logger(__name__)
 
 
+def _build_reminder_email(schedule, occurrence):
+    """
+    Build (but don't send) the reminder email for one schedule occurrence.
+    """
+    technician = schedule.technician
+    subject = f"Reminder: {schedule.title}"
+    context = {
+        'technician': technician,
+        'schedule': schedule,
+        'occurrence': occurrence,
+        'current_year': timezone.now().year,  # Ensure you have the current year
+        'equipment_name': schedule.equipment.name if schedule.equipment else "For All Equipment",
+
+    }
+    html_content = render_to_string('equipment/maintenance_reminder.html', context)
+    text_content = strip_tags(html_content)
+
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=text_content,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[technician.email],
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+
+def _reminder_message(schedule, occurrence):
+    return f"Reminder: {schedule.title} scheduled for {occurrence.strftime('%Y-%m-%d %H:%M')}."
+
+
+def _parse_occurrence(occurrence):
+    # Task arguments go through the JSON serializer, so datetimes arrive as ISO strings.
+    if isinstance(occurrence, str):
+        return parse_datetime(occurrence)
+    return occurrence
+
+
 @shared_task
 def send_maintenance_reminder(schedule_id, occurrence):
     """
     Send a maintenance reminder email and notification.
     """
+    occurrence = _parse_occurrence(occurrence)
     try:
         schedule = MaintenanceSchedule.objects.select_related('technician', 'equipment').get(id=schedule_id)
     except MaintenanceSchedule.DoesNotExist:
@@ -30,29 +72,7 @@ def send_maintenance_reminder(schedule_id, occurrence):
         return
 
     try:
-        # Prepare email content
-        subject = f"Reminder: {schedule.title}"
-        context = {
-            'technician': technician,
-            'schedule': schedule,
-            'occurrence': occurrence,
-            'current_year': timezone.now().year,  # Ensure you have the current year
-            'equipment_name': schedule.equipment.name if schedule.equipment else "For All Equipment",
-
-        }
-        html_content = render_to_string('equipment/maintenance_reminder.html', context)
-        text_content = strip_tags(html_content)
-
-        # Send email
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[technician.email],
-        )
-        email.attach_alternative(html_content, "text/html")
-        email.send()
-
+        _build_reminder_email(schedule, occurrence).send()
         logger.info(f"Reminder email sent for schedule {schedule_id} to {technician.email}")
     except Exception as e:
         logger.error(f"Failed to send reminder email for schedule {schedule_id}: {e}")
@@ -61,9 +81,224 @@ def send_maintenance_reminder(schedule_id, occurrence):
     try:
         Notification.objects.create(
             user=technician,
-            message=f"Reminder: {schedule.title} scheduled for {occurrence.strftime('%Y-%m-%d %H:%M')}.",
+            message=_reminder_message(schedule, occurrence),
             link=f'/maintenance-schedules/{schedule.id}/'
         )
         logger.info(f"Notification created for schedule {schedule_id}.")
     except Exception as e:
-        logger.error(f"Failed to create notification for schedule {schedule_id}: {e}")
\ No newline at end of file
+        logger.error(f"Failed to create notification for schedule {schedule_id}: {e}")
+
+
+@shared_task
+def send_maintenance_reminder_batch(reminders):
+    """
+    Send reminders for a batch of (schedule_id, occurrence, previous
+    last_notification) triples claimed by `dispatch_due_maintenance_reminders`,
+    in a single send_messages() call so the email backend can batch and
+    parallelize them.
+
+    The in-app notification is only created once the email was accepted. A
+    reminder whose email fails has its claim released (last_notification goes
+    back to the previous value) so the next sweep sends it again, until it has
+    failed MAINTENANCE_REMINDER_MAX_ATTEMPTS times; then the claim is kept and
+    that occurrence's reminder is given up on.
+    """
+    claims = {
+        schedule_id: (_parse_occurrence(occurrence), _parse_occurrence(previous[0] if previous else None))
+        for schedule_id, occurrence, *previous in reminders
+    }
+    schedules = {
+        schedule.id: schedule
+        for schedule in MaintenanceSchedule.objects
+        .select_related('technician', 'equipment')
+        .filter(id__in=claims, technician__isnull=False)
+    }
+    emails = {
+        schedule_id: _build_reminder_email(schedule, claims[schedule_id][0])
+        for schedule_id, schedule in schedules.items()
+    }
+
+    try:
+        with get_connection() as connection:
+            accepted = connection.send_messages(list(emails.values())) or 0
+    except Exception as e:
+        logger.error(f"Failed to send maintenance reminders for schedules {list(emails)}: {e}")
+        accepted = 0
+    # Backends that don't mark each message (e.g. SMTP) only tell us whether all went out.
+    all_accepted = accepted == len(emails)
+    sent = [schedule_id for schedule_id, email in emails.items() if getattr(email, 'accepted', all_accepted)]
+    failed = [schedule_id for schedule_id in emails if schedule_id not in sent]
+
+    for schedule_id in sent:
+        schedule = schedules[schedule_id]
+        try:
+            Notification.objects.create(
+                user=schedule.technician,
+                message=_reminder_message(schedule, claims[schedule_id][0]),
+                link=f'/maintenance-schedules/{schedule_id}/'
+            )
+        except Exception as e:
+            logger.error(f"Failed to create notification for schedule {schedule_id}: {e}")
+    MaintenanceSchedule.objects.filter(id__in=sent, reminder_attempts__gt=0).update(reminder_attempts=0)
+
+    if failed:
+        now = timezone.now()
+        max_attempts = getattr(settings, 'MAINTENANCE_REMINDER_MAX_ATTEMPTS', 5)
+        exhausted = MaintenanceSchedule.objects.filter(id__in=failed, reminder_attempts__gte=max_attempts - 1)
+        given_up = list(exhausted.values_list('id', flat=True))
+        # Keep the claim, so the next reminder is the one for the following occurrence.
+        exhausted.update(reminder_attempts=0)
+        if given_up:
+            logger.error(f"Gave up on maintenance reminders after {max_attempts} failed sends: {given_up}")
+
+        released = [schedule_id for schedule_id in failed if schedule_id not in given_up]
+        for schedule_id in released:
+            MaintenanceSchedule.objects.filter(id=schedule_id).update(
+                last_notification=claims[schedule_id][1],
+                reminder_attempts=F('reminder_attempts') + 1,
+                modified=now
+            )
+        if released:
+            logger.warning(f"Released {len(released)} maintenance reminders for retry: {released}")
+    logger.info(f"Sent {len(sent)}/{len(claims)} maintenance reminder emails.")
+    return len(sent)
+
+
+@shared_task
+def dispatch_due_maintenance_reminders(batch_size=None, max_batches=100):
+    """
+    Periodic sweeper: find schedules whose next occurrence falls within the
+    reminder lead time and that haven't been reminded for it yet, claim them
+    and hand them to `send_maintenance_reminder_batch` in batches.
+
+    Claims use SELECT ... FOR UPDATE SKIP LOCKED and stamp `last_notification`
+    in the same transaction, so concurrent workers never pick the same schedule
+    and a schedule is reminded once per occurrence. The previous value travels
+    with the claim so the batch task can release reminders that failed to send.
+    """
+    batch_size = batch_size or getattr(settings, 'MAINTENANCE_REMINDER_BATCH_SIZE', 100)
+    lead = timedelta(hours=getattr(settings, 'MAINTENANCE_REMINDER_LEAD_HOURS', 24))
+    now = timezone.now()
+
+    dispatched = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            claimed = list(
+                MaintenanceSchedule.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    next_occurrence__gt=now,
+                    next_occurrence__lte=now + lead,
+                    technician__isnull=False
+                )
+                .filter(
+                    Q(last_notification__isnull=True) |
+                    Q(last_notification__lt=F('next_occurrence') - lead)
+                )
+                .order_by('next_occurrence')
+                .values_list('id', 'next_occurrence', 'last_notification')[:batch_size]
+            )
+            if not claimed:
+                break
+            # modified too: last_notification is part of the schedule representation (and its ETag).
+            MaintenanceSchedule.objects.filter(id__in=[schedule_id for schedule_id, _, _ in claimed]).update(
+                last_notification=now, modified=now
+            )
+
+        send_maintenance_reminder_batch.delay([
+            (schedule_id, occurrence.isoformat(), previous and previous.isoformat())
+            for schedule_id, occurrence, previous in claimed
+        ])
+        dispatched += len(claimed)
+        if len(claimed) < batch_size:
+            break
+
+    logger.info(f"Dispatched {dispatched} maintenance reminders.")
+    return dispatched
+
+
+@shared_task
+def extend_maintenance_occurrence_horizon(batch_size=1000):
+    """
+    Roll the materialized occurrence window forward so every schedule has its
+    occurrences persisted up to MAINTENANCE_OCCURRENCE_HORIZON_DAYS from now.
+
+    Schedules that have never been materialized (e.g. created before the
+    occurrence table existed) are backfilled from their start date.
+    """
+    horizon = timezone.now() + timedelta(days=getattr(settings, 'MAINTENANCE_OCCURRENCE_HORIZON_DAYS', 365))
+
+    schedules = (
+        MaintenanceSchedule.objects
+        .annotate(last_materialized=Max('occurrences__occurrence_at'))
+        .filter(
+            Q(last_materialized__isnull=True) |
+            (
+                ~Q(frequency='once') &
+                Q(last_materialized__lt=horizon) &
+                (Q(recurring_end__isnull=True) | Q(recurring_end__gt=F('last_materialized')))
+            )
+        )
+    )
+
+    pending = []
+    created = 0
+    for schedule in schedules.iterator(chunk_size=batch_size):
+        pending.extend(schedule.build_occurrences(after=schedule.last_materialized, until=horizon))
+        if len(pending) >= batch_size:
+            created += len(MaintenanceOccurrence.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True))
+            pending = []
+    if pending:
+        created += len(MaintenanceOccurrence.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True))
+
+    logger.info(f"Materialized {created} maintenance occurrences up to {horizon:%Y-%m-%d}.")
+    return created
+
+
+
+@shared_task
+def refresh_stale_next_occurrences(batch_size=1000):
+    """
+    Periodic sweeper: recompute `next_occurrence` for schedules whose stored
+    value has already passed, so queries on the indexed column stay correct
+    without anyone re-saving the schedule.
+
+    Schedules are walked in (next_occurrence, id) keyset order, one chunk per
+    transaction: each chunk is one indexed SELECT and one bulk UPDATE, so a
+    sweep over 100k schedules never holds more than `batch_size` in memory.
+    Rows locked by a concurrent edit are skipped and left to that save.
+    """
+    now = timezone.now()
+    stale = (
+        MaintenanceSchedule.objects
+        .filter(next_occurrence__lt=now)
+        .only('id', 'frequency', 'interval', 'start_date', 'recurring_end', 'next_occurrence')
+        .order_by('next_occurrence', 'id')
+    )
+
+    refreshed = 0
+    last = None
+    while True:
+        with transaction.atomic():
+            chunk = stale.select_for_update(skip_locked=True)
+            if last is not None:
+                chunk = chunk.filter(
+                    Q(next_occurrence__gt=last[0]) | Q(next_occurrence=last[0], id__gt=last[1])
+                )
+            schedules = list(chunk[:batch_size])
+            if not schedules:
+                break
+            last = (schedules[-1].next_occurrence, schedules[-1].id)
+
+            modified = timezone.now()
+            for schedule in schedules:
+                schedule.next_occurrence = schedule.compute_next_occurrence()
+                # bulk_update skips save(); bump `modified` so conditional GETs see the change.
+                schedule.modified = modified
+            MaintenanceSchedule.objects.bulk_update(schedules, ['next_occurrence', 'modified'], batch_size=batch_size)
+        refreshed += len(schedules)
+        if len(schedules) < batch_size:
+            break
+
+    logger.info(f"Refreshed next_occurrence for {refreshed} maintenance schedules.")
+    return refreshed
@@ -63,3 +63,1217 @@
 
 #         # Close the connection
 #         await communicator.disconnect()
+
+
+import calendar
+import csv
+import datetime
+import io
+import json
+import random
+from unittest import mock
+
+from django.core import mail
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from accounts.models import CustomUser
+from equipment.admin import EquipmentAdmin
+from equipment.analytics import build_reliability_report
+from equipment.models import (
+    Equipment, EquipmentIdSequence, EquipmentMaintenanceActivity, EquipmentReliability, EquipmentSearchToken,
+    EquipmentStatusHistory, MaintenanceDailyRollup, MaintenanceOccurrence, MaintenanceSchedule, Supplier
+)
+from equipment.compliance import build_compliance_report, iter_compliance
+from equipment.recurrence import Recurrence
+from equipment.serializers import EquipmentReadSerializer
+from equipment.search import rebuild_search_index, search_equipment, tokenize
+from equipment.tasks import (
+    dispatch_due_maintenance_reminders, extend_maintenance_occurrence_horizon, refresh_stale_next_occurrences,
+    send_maintenance_reminder_batch
+)
+from equipment.views import EquipmentList
+from notification.models import Notification
+
+
+class ListEndpointQueryBudgetTests(APITestCase):
+    """
+    Guard the list endpoints against N+1 regressions: the number of queries
+    must stay within a fixed budget no matter how many rows are returned.
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='password123', first_name='Ada',
+            last_name='Admin', user_role=CustomUser.UserRole.ADMIN
+        )
+        self.client.force_authenticate(user=self.admin)
+        self._counter = 0
+
+    def add_rows(self, count):
+        """
+        Create `count` equipment rows, each with its own supplier, technician,
+        activity and schedule so every foreign key points at a distinct row.
+        """
+        now = timezone.now()
+        for _ in range(count):
+            self._counter += 1
+            n = self._counter
+            supplier = Supplier.objects.create(company_name=f'Supplier {n}', company_email=f's{n}@example.com')
+            technician = CustomUser.objects.create_user(email=f'tech{n}@example.com', first_name=f'Tech{n}')
+            equipment = Equipment.objects.create(
+                name=f'Device {n}', department='icu', model='Model', manufacturer='Maker',
+                serial_number=f'SN{n:06d}', manufacturing_date=datetime.date(2020, 1, 1),
+                supplier=supplier, added_by=technician
+            )
+            EquipmentMaintenanceActivity.objects.bulk_create([
+                EquipmentMaintenanceActivity(
+                    equipment=equipment, activity_type='repair', date_time=now, technician=technician
+                )
+            ])
+            MaintenanceSchedule.objects.bulk_create([
+                MaintenanceSchedule(
+                    equipment=equipment, technician=technician, title=f'Schedule {n}',
+                    activity_type='calibration', start_date=now
+                )
+            ])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assert_fixed_budget(self, url, budget):
+        self.add_rows(2)
+        few = self.count_queries(url)
+        self.add_rows(20)
+        many = self.count_queries(url)
+        self.assertEqual(few, many, f"{url} issues more queries as rows grow ({few} -> {many})")
+        self.assertLessEqual(many, budget)
+
+    def test_equipment_list_query_budget(self):
+        # The ETag validator aggregate plus the page itself.
+        self.assert_fixed_budget(reverse('equipment-list'), budget=2)
+
+    def test_maintenance_activity_list_query_budget(self):
+        self.assert_fixed_budget(reverse('maintenance-reports'), budget=1)
+
+    def test_equipment_activity_list_query_budget(self):
+        self.add_rows(1)
+        equipment = Equipment.objects.get()
+        EquipmentMaintenanceActivity.objects.bulk_create([
+            EquipmentMaintenanceActivity(equipment=equipment, activity_type='repair', date_time=timezone.now())
+            for _ in range(20)
+        ])
+        url = reverse('equipment-activities', kwargs={'equipment_id': equipment.pk})
+        self.assertLessEqual(self.count_queries(url), 1)
+
+    def test_maintenance_schedule_list_query_budget(self):
+        # The ETag validator aggregate plus the list itself.
+        self.assert_fixed_budget(reverse('maintenance-schedule-list-create'), budget=2)
+
+    def test_list_joins_load_only_rendered_columns(self):
+        self.add_rows(2)
+        unrendered = {
+            reverse('equipment-list'): ['"password"', '"company_email"'],
+            reverse('maintenance-schedule-list-create'): ['"password"', '"serial_number"'],
+        }
+        for url, columns in unrendered.items():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page_sql = ctx.captured_queries[-1]['sql']
+            for column in columns:
+                self.assertNotIn(column, page_sql, url)
+
+
+class MaintenanceActivityNameAnnotationTests(APITestCase):
+
+    def test_names_are_annotated_in_sql(self):
+        technician = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess', last_name='Tech')
+        self.client.force_authenticate(user=technician)
+        equipment = Equipment.objects.create(
+            name='Ventilator', department='icu', model='V60', manufacturer='Philips',
+            serial_number='VENT0001', manufacturing_date=datetime.date(2020, 1, 1)
+        )
+        EquipmentMaintenanceActivity.objects.bulk_create([
+            EquipmentMaintenanceActivity(equipment=equipment, activity_type='repair',
+                                         date_time=timezone.now(), technician=technician),
+            EquipmentMaintenanceActivity(equipment=equipment, activity_type='calibration',
+                                         date_time=timezone.now()),
+        ])
+
+        response = self.client.get(reverse('maintenance-reports'))
+
+        names = sorted((row['equipment_name'], row['technician_name'] or '') for row in response.data)
+        self.assertEqual(names, [('Ventilator', ''), ('Ventilator', 'Tess Tech')])
+
+
+class MaintenanceDailyRollupTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.equipment = Equipment.objects.create(
+            name='Monitor', department='icu', model='MX', manufacturer='Philips',
+            serial_number='MON0001', manufacturing_date=datetime.date(2020, 1, 1)
+        )
+
+    def add_activity(self, activity_type, date_time):
+        activity = EquipmentMaintenanceActivity(
+            equipment=self.equipment, activity_type=activity_type, date_time=date_time, technician=self.user
+        )
+        activity.save()
+        return activity
+
+    def test_rollup_tracks_create_update_and_delete(self):
+        today = timezone.now()
+        yesterday = today - datetime.timedelta(days=1)
+        repair = self.add_activity('repair', today)
+        self.add_activity('repair', today)
+        self.add_activity('calibration', yesterday)
+
+        repair.date_time = yesterday
+        repair.save()
+        repair.delete()
+
+        incremental = set(MaintenanceDailyRollup.objects.filter(count__gt=0).values_list('day', 'activity_type', 'count'))
+        MaintenanceDailyRollup.rebuild()
+        rebuilt = set(MaintenanceDailyRollup.objects.values_list('day', 'activity_type', 'count'))
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(rebuilt, {
+            (today.date(), 'repair', 1),
+            (yesterday.date(), 'calibration', 1),
+        })
+
+    def test_overview_reads_rollup(self):
+        self.add_activity('repair', timezone.now())
+        self.add_activity('preventive maintenance', timezone.now())
+
+        response = self.client.get(reverse('maintenance-reports-overview'), {'period': '7'})
+
+        self.assertEqual(response.data, [{
+            'date': timezone.now().strftime('%Y-%m-%d'),
+            'preventive_maintenance': 1,
+            'repair': 1,
+            'calibration': 0,
+        }])
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class MaintenanceReminderDispatchTests(TestCase):
+
+    def setUp(self):
+        self.technician = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.now = timezone.now()
+
+    def add_schedule(self, starts_in, title='Check'):
+        schedule = MaintenanceSchedule(
+            for_all_equipment=True, technician=self.technician, title=title,
+            activity_type='calibration', start_date=self.now + starts_in
+        )
+        schedule.save()
+        return schedule
+
+    @mock.patch('equipment.tasks.send_maintenance_reminder_batch.delay')
+    def test_due_schedules_are_claimed_once_in_batches(self, delay):
+        due = [self.add_schedule(datetime.timedelta(hours=h)) for h in (1, 2, 3)]
+        self.add_schedule(datetime.timedelta(days=3))  # outside the reminder window
+
+        self.assertEqual(dispatch_due_maintenance_reminders(batch_size=2), 3)
+        self.assertEqual(dispatch_due_maintenance_reminders(batch_size=2), 0)
+
+        batches = [call.args[0] for call in delay.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(sorted(sid for batch in batches for sid, _, _ in batch), sorted(s.id for s in due))
+        # Claiming changes last_notification, so it must move `modified` (and the ETag) too.
+        for schedule in due:
+            schedule.refresh_from_db()
+            self.assertEqual(schedule.modified, schedule.last_notification)
+
+    def test_batch_sends_one_email_per_schedule(self):
+        schedule = self.add_schedule(datetime.timedelta(hours=1))
+
+        sent = send_maintenance_reminder_batch([(schedule.id, schedule.next_occurrence.isoformat(), None)])
+
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox[0].to, [self.technician.email])
+
+    @mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', return_value=0)
+    def test_failed_send_is_released_for_the_next_sweep(self, send_messages):
+        schedule = self.add_schedule(datetime.timedelta(hours=1))
+        with mock.patch('equipment.tasks.send_maintenance_reminder_batch.delay') as delay:
+            dispatch_due_maintenance_reminders()
+        send_maintenance_reminder_batch(*delay.call_args.args)
+
+        schedule.refresh_from_db()
+        self.assertIsNone(schedule.last_notification)
+        self.assertFalse(Notification.objects.filter(message__startswith='Reminder:').exists())
+
+        send_messages.return_value = 1
+        with mock.patch('equipment.tasks.send_maintenance_reminder_batch.delay') as delay:
+            self.assertEqual(dispatch_due_maintenance_reminders(), 1)
+        self.assertEqual(send_maintenance_reminder_batch(*delay.call_args.args), 1)
+        self.assertEqual(Notification.objects.filter(message__startswith='Reminder:').count(), 1)
+        self.assertEqual(dispatch_due_maintenance_reminders(), 0)
+
+
+    def test_batch_is_sent_at_once_and_only_rejected_reminders_are_released(self):
+        accepted = self.add_schedule(datetime.timedelta(hours=1), title='Accepted')
+        rejected = self.add_schedule(datetime.timedelta(hours=2), title='Rejected')
+        with mock.patch('equipment.tasks.send_maintenance_reminder_batch.delay') as delay:
+            dispatch_due_maintenance_reminders()
+
+        def send_messages(messages):
+            for message in messages:
+                message.accepted = 'Accepted' in message.subject
+            return 1
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=send_messages
+        ) as send:
+            self.assertEqual(send_maintenance_reminder_batch(*delay.call_args.args), 1)
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(len(send.call_args.args[0]), 2)
+
+        accepted.refresh_from_db()
+        rejected.refresh_from_db()
+        self.assertIsNotNone(accepted.last_notification)
+        self.assertEqual((rejected.last_notification, rejected.reminder_attempts), (None, 1))
+        self.assertEqual(
+            list(Notification.objects.filter(message__startswith='Reminder:').values_list('link', flat=True)),
+            [f'/maintenance-schedules/{accepted.id}/']
+        )
+
+    @override_settings(MAINTENANCE_REMINDER_MAX_ATTEMPTS=3)
+    @mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', return_value=0)
+    def test_reminder_is_given_up_after_max_attempts(self, send_messages):
+        schedule = self.add_schedule(datetime.timedelta(hours=1))
+        for attempt in (1, 2, 3):
+            with mock.patch('equipment.tasks.send_maintenance_reminder_batch.delay') as delay:
+                self.assertEqual(dispatch_due_maintenance_reminders(), 1)
+            send_maintenance_reminder_batch(*delay.call_args.args)
+            schedule.refresh_from_db()
+            self.assertEqual(schedule.reminder_attempts, attempt % 3)
+
+        # The third failure keeps the claim: this occurrence isn't retried again.
+        self.assertIsNotNone(schedule.last_notification)
+        self.assertEqual(dispatch_due_maintenance_reminders(), 0)
+        self.assertEqual(send_messages.call_count, 3)
+
+
+class EquipmentIdAllocationTests(TestCase):
+
+    def setUp(self):
+        self._counter = 0
+
+    def make_equipment(self, serial='SN0001', **kwargs):
+        # Serial numbers are unique, but devices sharing the last six characters share a prefix.
+        self._counter += 1
+        return Equipment(
+            name='Pump', department='icu', model='Volumat', manufacturer='Fresenius',
+            serial_number=f'LOT{self._counter}-{serial}',
+            manufacturing_date=datetime.date(2020, 1, 1), **kwargs
+        )
+
+    def test_shared_prefix_gets_sequential_suffixes(self):
+        ids = []
+        for _ in range(3):
+            equipment = self.make_equipment()
+            equipment.save()
+            ids.append(equipment.equipment_id)
+        self.assertEqual(ids, ['FREVOLSN0001', 'FREVOLSN0001-1', 'FREVOLSN0001-2'])
+
+    def test_allocation_cost_does_not_grow_with_prefix_population(self):
+        Equipment.objects.bulk_create(
+            EquipmentIdSequence.assign([self.make_equipment() for _ in range(100)])
+        )
+        # Bulk-created rows aren't counted; save one so the counter rows exist.
+        self.make_equipment().save()
+        with CaptureQueriesContext(connection) as ctx:
+            self.make_equipment().save()
+        # Lock the sequence row, bump it and insert the equipment; then the
+        # search tokens, status history, reliability row and one counter UPDATE.
+        self.assertEqual(len(ctx.captured_queries), 17)
+        self.assertTrue(Equipment.objects.filter(equipment_id='FREVOLSN0001-101').exists())
+
+    def test_assign_reserves_one_range_per_prefix(self):
+        batch = [self.make_equipment() for _ in range(3)] + [self.make_equipment(serial='OTHER9')]
+        EquipmentIdSequence.assign(batch)
+        self.assertEqual(
+            [equipment.equipment_id for equipment in batch],
+            ['FREVOLSN0001', 'FREVOLSN0001-1', 'FREVOLSN0001-2', 'FREVOLOTHER9']
+        )
+        self.assertEqual(EquipmentIdSequence.objects.get(prefix='FREVOLSN0001').next_value, 3)
+
+    def test_existing_sequence_skips_ids_entered_by_hand(self):
+        self.make_equipment().save()  # seeds the sequence at FREVOLSN0001
+        self.make_equipment(equipment_id='FREVOLSN0001-3').save()
+        edited = self.make_equipment()
+        edited.save()
+        edited = Equipment.objects.get(pk=edited.pk)
+        edited.equipment_id = 'FREVOLSN0001-7'
+        edited.save()
+        self.make_equipment(equipment_id='FREVOLSN0001-2').save()  # below next_value: no change
+
+        equipment = self.make_equipment()
+        equipment.save()
+        self.assertEqual(equipment.equipment_id, 'FREVOLSN0001-8')
+
+    def test_new_sequence_skips_ids_entered_by_hand(self):
+        self.make_equipment(equipment_id='FREVOLSN0001-4').save()
+        equipment = self.make_equipment()
+        equipment.save()
+        self.assertEqual(equipment.equipment_id, 'FREVOLSN0001-5')
+
+
+class EquipmentBulkImportTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='admin@example.com', first_name='Ada')
+        self.client.force_authenticate(user=self.user)
+        self.supplier = Supplier.objects.create(company_name='MedSupply', company_email='sales@medsupply.com')
+        self.url = reverse('equipment-bulk-import')
+
+    def csv_body(self, rows):
+        header = 'name,department,manufacturer,model,serial_number,manufacturing_date,supplier\n'
+        return (header + ''.join(f'{row}\n' for row in rows)).encode()
+
+    def test_csv_rows_are_created_and_failures_reported(self):
+        body = self.csv_body([
+            'Pump A,icu,Fresenius,Volumat,PUMP-0001,2020-01-01,medsupply',
+            'Pump B,icu,Fresenius,Volumat,PUMP-0002,2020-01-01,',
+            'Pump C,icu,Fresenius,Volumat,PUMP-0001,2020-01-01,',
+            'Pump D,nowhere,Fresenius,Volumat,PUMP-0004,2020-01-01,',
+            'Pump E,icu,Fresenius,Volumat,PUMP-0005,2020-01-01,Unknown Ltd',
+        ])
+        response = self.client.post(self.url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [3, 4, 5])
+        self.assertIn('department', response.data['errors'][1]['errors'])
+        pump = Equipment.objects.get(serial_number='PUMP-0001')
+        self.assertEqual(pump.supplier, self.supplier)
+        self.assertEqual(pump.added_by, self.user)
+        self.assertEqual(pump.equipment_id, 'FREVOLMP0001')
+
+    def test_ndjson_upload_and_existing_serials(self):
+        Equipment.objects.create(
+            name='Old', department='icu', manufacturer='GE', model='Vivid',
+            serial_number='ECHO-1', manufacturing_date=datetime.date(2019, 1, 1)
+        )
+        lines = [
+            {'name': 'Echo', 'department': 'cardiology', 'manufacturer': 'GE', 'model': 'Vivid',
+             'serial_number': serial, 'manufacturing_date': '2021-05-01', 'operational_status': 'decommissioned'}
+            for serial in ('ECHO-1', 'ECHO-2')
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines).encode()
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertIsNotNone(Equipment.objects.get(serial_number='ECHO-2').decommission_date)
+
+    def test_multipart_upload_and_malformed_file(self):
+        upload = SimpleUploadedFile('devices.csv', self.csv_body([
+            'Pump A,icu,Fresenius,Volumat,PUMP-0001,2020-01-01,',
+        ]))
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+
+        response = self.client.post(self.url, b'{"name": "x"}\nnot json\n', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('line 2', response.data['detail'])
+
+    def import_queries(self, first_serial, rows):
+        body = self.csv_body([
+            f'Monitor {n},icu,Philips,IntelliVue,MX{n:06d},2020-01-01,MedSupply'
+            for n in range(first_serial, first_serial + rows)
+        ])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.data['created'], rows)
+        return len(ctx.captured_queries)
+
+    @override_settings(EQUIPMENT_IMPORT_CHUNK_SIZE=1000)
+    def test_queries_do_not_grow_with_rows(self):
+        # SQLite splits bulk INSERTs at 999 parameters; lift that cap (as on
+        # PostgreSQL) so only the importer's own statements are counted.
+        with mock.patch.object(connection.features, 'max_query_params', 100_000):
+            # The first import also creates the dashboard counter rows.
+            self.import_queries(0, 1)
+            few = self.import_queries(1, 300)
+            many = self.import_queries(301, 600)
+
+        # Supplier and serial lookups, ID allocation, one INSERT each for the
+        # equipment, status history, reliability and search tokens, one counter
+        # UPDATE, and their savepoints, however many rows the chunk holds.
+        self.assertEqual(few, many)
+        self.assertEqual(many, 22)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class StreamingExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='auditor@example.com', first_name='Ada', last_name='Audit')
+        self.client.force_authenticate(user=self.user)
+        self.equipment = Equipment.objects.create(
+            name='Monitor', department='icu', model='MX', manufacturer='Philips',
+            serial_number='MON0001', manufacturing_date=datetime.date(2020, 1, 1)
+        )
+        for hour in range(3):
+            EquipmentMaintenanceActivity.objects.create(
+                equipment=self.equipment, activity_type='repair', technician=self.user,
+                date_time=timezone.now() - datetime.timedelta(hours=hour + 1), notes='Line one,\nline "two"'
+            )
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_maintenance_history_csv_has_joined_names(self):
+        response = self.client.get(reverse('maintenance-reports-export'))
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['equipment_name'], 'Monitor')
+        self.assertEqual(rows[0]['technician_name'], 'Ada Audit')
+        self.assertEqual(rows[0]['notes'], 'Line one,\nline "two"')
+
+    def test_ndjson_exports(self):
+        MaintenanceSchedule.objects.create(
+            equipment=self.equipment, technician=self.user, title='Calibrate', activity_type='calibration',
+            start_date=timezone.now() + datetime.timedelta(days=1)
+        )
+        for name, expected in (('equipment-export', 1), ('maintenance-schedules-export', 1)):
+            response = self.client.get(reverse(name), {'export_format': 'ndjson'})
+            lines = [json.loads(line) for line in self.read(response).splitlines()]
+            self.assertEqual(len(lines), expected)
+        self.assertEqual(lines[0]['equipment_name'], 'Monitor')
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('equipment-export'), {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_schedule_export_is_limited_to_visible_schedules(self):
+        other = CustomUser.objects.create_user(email='other@example.com', first_name='Otto')
+        start = timezone.now() + datetime.timedelta(days=1)
+        for title, technician, for_all in (('Mine', self.user, False), ('Fleet', None, True), ('Theirs', other, False)):
+            MaintenanceSchedule.objects.create(
+                equipment=None if for_all else self.equipment, for_all_equipment=for_all, technician=technician,
+                title=title, activity_type='calibration', start_date=start
+            )
+
+        response = self.client.get(reverse('maintenance-schedules-export'), {'export_format': 'ndjson'})
+        titles = sorted(json.loads(line)['title'] for line in self.read(response).splitlines())
+        self.assertEqual(titles, ['Fleet', 'Mine'])
+
+        admin = CustomUser.objects.create_user(
+            email='admin@example.com', first_name='Ann', user_role=CustomUser.UserRole.ADMIN
+        )
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('maintenance-schedules-export'), {'export_format': 'ndjson'})
+        self.assertEqual(len(self.read(response).splitlines()), 3)
+
+
+class ConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.supplier = Supplier.objects.create(company_name='MedSupply', company_email='sales@medsupply.com')
+        self.equipment = Equipment.objects.create(
+            name='Monitor', department='icu', model='MX', manufacturer='Philips', serial_number='MON0001',
+            manufacturing_date=datetime.date(2020, 1, 1), supplier=self.supplier
+        )
+        self.list_url = reverse('equipment-list')
+
+    def test_unchanged_list_is_answered_with_304_before_serialization(self):
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(response['ETag'], etag)
+
+        # A different filter or field selection is a different representation.
+        response = self.client.get(self.list_url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_edits_and_related_edits_change_the_etag(self):
+        etag = self.client.get(self.list_url)['ETag']
+
+        self.supplier.company_name = 'MedSupply Ltd'
+        self.supplier.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        Equipment.objects.filter(pk=self.equipment.pk).delete()
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_renaming_related_users_changes_the_etag(self):
+        Equipment.objects.filter(pk=self.equipment.pk).update(added_by=self.user)
+        schedule, = MaintenanceSchedule.objects.bulk_create([MaintenanceSchedule(
+            for_all_equipment=True, technician=self.user, title='Check', activity_type='calibration',
+            start_date=timezone.now()
+        )])
+        urls = [
+            self.list_url,
+            reverse('equipment-detail', kwargs={'pk': self.equipment.pk}),
+            reverse('maintenance-schedule-list-create'),
+            reverse('maintenance-schedule-detail', kwargs={'pk': schedule.pk}),
+        ]
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+
+        # added_by_name and technician_name come from the user row.
+        self.user.last_name = 'Renamed'
+        self.user.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 200)
+
+    def test_detail_supports_if_modified_since(self):
+        url = reverse('equipment-detail', kwargs={'pk': self.equipment.pk})
+        last_modified = self.client.get(url)['Last-Modified']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get(reverse('equipment-detail', kwargs={'pk': 999})).status_code, 404)
+
+
+class EquipmentListPagingTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('equipment-list')
+        for n in range(7):
+            self.add_equipment(n)
+        # Ties on modified must be broken by id, or rows could repeat or vanish across pages.
+        Equipment.objects.update(modified=timezone.now() - datetime.timedelta(days=1))
+
+    def add_equipment(self, n):
+        return Equipment.objects.create(
+            name=f'Pump {n}', department='icu', model='Volumat', manufacturer='Fresenius',
+            serial_number=f'PUMP{n:04d}', manufacturing_date=datetime.date(2020, 1, 1), description='Long text'
+        )
+
+    def test_cursor_pages_are_stable(self):
+        expected = list(Equipment.objects.order_by('-modified', '-id').values_list('id', flat=True))
+        response = self.client.get(self.url, {'page_size': 3})
+        pages = [[row['id'] for row in response.data['results']]]
+
+        # A row added while paging doesn't shift the later pages.
+        self.add_equipment(99)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append([row['id'] for row in response.data['results']])
+
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+        # Paging back returns the same pages.
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], pages[1])
+
+    def test_every_allowed_ordering_pages_through_all_rows(self):
+        supplier = Supplier.objects.create(company_name='MedSupply', company_email='sales@medsupply.com')
+        Equipment.objects.filter(pk__in=Equipment.objects.order_by('pk').values('pk')[:3]).update(
+            supplier=supplier, decommission_date=datetime.date(2024, 1, 1)
+        )
+        for n, equipment in enumerate(Equipment.objects.order_by('pk')):
+            equipment.department = ['icu', 'radiology'][n % 2]
+            equipment.save()
+
+        for field in EquipmentList.ordering_fields:
+            for ordering in (field, f'-{field}'):
+                tiebreak = '-id' if ordering.startswith('-') else 'id'
+                expected = list(Equipment.objects.order_by(ordering, tiebreak).values_list('id', flat=True))
+                response = self.client.get(self.url, {'ordering': ordering, 'page_size': 2})
+                seen = [row['id'] for row in response.data['results']]
+                while response.data['next']:
+                    response = self.client.get(response.data['next'])
+                    self.assertEqual(response.status_code, 200, ordering)
+                    seen += [row['id'] for row in response.data['results']]
+                self.assertEqual(seen, expected, ordering)
+
+    def test_ordering_on_nullable_or_related_fields_is_ignored(self):
+        expected = list(Equipment.objects.order_by('-modified', '-id').values_list('id', flat=True))
+        for ordering in ('decommission_date', '-supplier', 'added_by'):
+            response = self.client.get(self.url, {'ordering': ordering, 'page_size': 5})
+            self.assertEqual(response.status_code, 200, ordering)
+            response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, 200, ordering)
+            self.assertEqual([row['id'] for row in response.data['results']], expected[5:], ordering)
+
+    def test_fields_trims_the_representation(self):
+        response = self.client.get(self.url, {'fields': 'id, name,unknown'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+
+        response = self.client.get(self.url, {'fields': 'unknown'})
+        self.assertIn('description', response.data['results'][0])
+
+    def test_fields_is_ignored_outside_get(self):
+        request = Request(APIRequestFactory().patch('/?fields=id'))
+        data = EquipmentReadSerializer(Equipment.objects.first(), context={'request': request}).data
+        self.assertIn('name', data)
+        self.assertIn('description', data)
+
+        supplier = Supplier.objects.create(company_name='MedSupply', company_email='sales@medsupply.com')
+        response = self.client.post(f'{self.url}?fields=id', {
+            'name': 'Monitor', 'department': 'icu', 'model': 'MX', 'manufacturer': 'Philips',
+            'serial_number': 'MON0001', 'manufacturing_date': '2020-01-01', 'supplier': supplier.pk
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn('name', response.data)
+
+
+class EquipmentSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.ventilator = self.make_equipment('Ventilator', 'Philips', 'Trilogy', 'VT-2001')
+        self.monitor = self.make_equipment('Patient Monitor', 'Philips', 'IntelliVue', 'PM-4410')
+        self.pump = self.make_equipment('Infusion Pump', 'Fresenius', 'Volumat', 'SN-PHIL-77')
+
+    def make_equipment(self, name, manufacturer, model, serial):
+        return Equipment.objects.create(
+            name=name, department='icu', manufacturer=manufacturer, model=model,
+            serial_number=serial, manufacturing_date=datetime.date(2020, 1, 1)
+        )
+
+    def test_tokenize_keeps_compact_identifiers(self):
+        self.assertEqual(tokenize('SN-00123'), ['sn', '00123', 'sn00123'])
+        self.assertEqual(tokenize(''), [])
+
+    def test_terms_match_word_prefixes_and_all_must_match(self):
+        self.assertEqual(search_equipment('vent'), [self.ventilator])
+        self.assertEqual(search_equipment('phil monitor'), [self.monitor])
+        self.assertEqual(search_equipment('pm4410'), [self.monitor])
+        self.assertEqual(search_equipment('ventilator volumat'), [])
+        self.assertEqual(search_equipment('   '), [])
+
+    def test_identifier_matches_rank_above_manufacturer_matches(self):
+        # "phil" prefixes the pump's serial number and the other two's manufacturer.
+        results = search_equipment('phil')
+        self.assertEqual(results[0], self.pump)
+        self.assertEqual(set(results), {self.pump, self.ventilator, self.monitor})
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    def test_saves_and_deletes_keep_the_index_current(self):
+        self.pump.name = 'Syringe Driver'
+        self.pump.save()
+        self.assertEqual(search_equipment('infusion'), [])
+        self.assertEqual(search_equipment('syringe'), [self.pump])
+
+        self.pump.delete()
+        self.assertEqual(search_equipment('syringe'), [])
+
+        EquipmentSearchToken.objects.all().delete()
+        self.assertEqual(rebuild_search_index(), 2)
+        self.assertEqual(search_equipment('trilogy'), [self.ventilator])
+
+    def test_bulk_imported_equipment_is_searchable(self):
+        body = (
+            'name,department,manufacturer,model,serial_number,manufacturing_date\n'
+            'Defibrillator,emergency,Zoll,R Series,DF-9001,2021-01-01\n'
+        ).encode()
+        self.client.post(reverse('equipment-bulk-import'), body, content_type='text/csv')
+        self.assertEqual([equipment.serial_number for equipment in search_equipment('zoll defib')], ['DF-9001'])
+
+    def test_search_endpoint_and_list_filter(self):
+        response = self.client.get(reverse('equipment-search'), {'q': 'philips', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(self.client.get(reverse('equipment-search')).status_code, 400)
+
+        response = self.client.get(reverse('equipment-list'), {'search': 'philips'})
+        self.assertEqual({row['id'] for row in response.data['results']}, {self.ventilator.pk, self.monitor.pk})
+
+
+class RecurrenceTests(TestCase):
+
+    def test_matches_rrule(self):
+        rng = random.Random(7)
+        utc = datetime.timezone.utc
+        for _ in range(500):
+            frequency = rng.choice(['daily', 'weekly', 'biweekly', 'monthly'])
+            start = datetime.datetime(2020, 1, 1, tzinfo=utc) + datetime.timedelta(
+                days=rng.randint(0, 1500), minutes=rng.randint(0, 1440), microseconds=rng.randint(0, 999999)
+            )
+            if frequency == 'monthly':
+                # Include days some months lack, which rrule skips.
+                day = rng.choice([1, 15, 29, 30, 31])
+                while True:
+                    try:
+                        start = start.replace(day=day)
+                        break
+                    except ValueError:
+                        day -= 1
+            until = start + datetime.timedelta(days=rng.randint(0, 2000))
+            recurrence = Recurrence(frequency, start, rng.randint(1, 4), until)
+            rule = recurrence.to_rrule()
+
+            moment = start + datetime.timedelta(days=rng.randint(-60, 2100), seconds=rng.randint(0, 86400))
+            if rng.random() < 0.3:
+                moment = rule.after(start) or moment
+            inclusive = rng.random() < 0.5
+            with self.subTest(frequency=frequency, start=start, until=until, moment=moment, inclusive=inclusive):
+                self.assertEqual(recurrence.next_after(moment, inclusive=inclusive), rule.after(moment, inc=inclusive))
+                end = moment + datetime.timedelta(days=rng.randint(0, 120))
+                self.assertEqual(recurrence.between(moment, end, inc=inclusive), rule.between(moment, end, inc=inclusive))
+
+    def test_monthly_skips_months_without_the_day(self):
+        start = datetime.datetime(2024, 1, 31, 9, 0, tzinfo=datetime.timezone.utc)
+        recurrence = Recurrence('monthly', start)
+        self.assertEqual(
+            recurrence.between(start, start + datetime.timedelta(days=130), inc=True),
+            [start, start.replace(month=3), start.replace(month=5)]
+        )
+
+    @mock.patch('equipment.recurrence.rrule.rrule', side_effect=AssertionError("rrule should not be used"))
+    def test_schedule_next_occurrence_is_computed_without_rrule(self, _rrule):
+        now = timezone.now()
+        schedule = MaintenanceSchedule(
+            title='Daily check', activity_type='preventive maintenance', frequency='daily', interval=1,
+            start_date=now - datetime.timedelta(days=3000, hours=1), recurring_end=now + datetime.timedelta(days=3000)
+        )
+        next_occurrence = schedule.compute_next_occurrence()
+        self.assertTrue(now < next_occurrence <= now + datetime.timedelta(days=1))
+        self.assertEqual(len(schedule.get_next_occurrences(count=5, lookahead_days=30)), 5)
+        self.assertEqual(len(schedule.get_occurrences_in_range(now, now + datetime.timedelta(days=7))), 7)
+
+
+class RefreshStaleNextOccurrenceTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.schedules = MaintenanceSchedule.objects.bulk_create([
+            MaintenanceSchedule(
+                for_all_equipment=True, title=f'Check {n}', activity_type='calibration',
+                frequency='daily', interval=1 + n % 3,
+                start_date=self.now - datetime.timedelta(days=30, hours=n),
+                recurring_end=self.now + datetime.timedelta(days=30),
+                next_occurrence=self.now - datetime.timedelta(days=n % 5 + 1)
+            )
+            for n in range(25)
+        ] + [
+            MaintenanceSchedule(
+                for_all_equipment=True, title='Done', activity_type='calibration', frequency='once',
+                start_date=self.now - datetime.timedelta(days=2), next_occurrence=self.now - datetime.timedelta(days=2)
+            ),
+            MaintenanceSchedule(
+                for_all_equipment=True, title='Upcoming', activity_type='calibration', frequency='once',
+                start_date=self.now + datetime.timedelta(days=2), next_occurrence=self.now + datetime.timedelta(days=2)
+            ),
+        ])
+
+    def test_stale_values_are_recomputed_in_chunks(self):
+        before = dict(MaintenanceSchedule.objects.values_list('id', 'modified'))
+        with CaptureQueriesContext(connection) as ctx:
+            refreshed = refresh_stale_next_occurrences(batch_size=10)
+
+        self.assertEqual(refreshed, 26)
+        # One SELECT per chunk of 10; each chunk is written back with a single bulk UPDATE.
+        selects = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 3)
+        self.assertFalse(MaintenanceSchedule.objects.filter(next_occurrence__lt=self.now).exists())
+
+        for schedule in MaintenanceSchedule.objects.exclude(title__in=['Done', 'Upcoming']):
+            self.assertEqual(schedule.next_occurrence, schedule.compute_next_occurrence())
+            self.assertNotEqual(schedule.modified, before[schedule.id])
+        self.assertIsNone(MaintenanceSchedule.objects.get(title='Done').next_occurrence)
+        upcoming = MaintenanceSchedule.objects.get(title='Upcoming')
+        self.assertEqual(upcoming.modified, before[upcoming.id])
+
+        self.assertEqual(refresh_stale_next_occurrences(batch_size=10), 0)
+
+
+class MaintenanceOccurrenceTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def create_schedule(self, **kwargs):
+        fields = {
+            'for_all_equipment': True, 'title': 'Daily check', 'activity_type': 'calibration',
+            'frequency': 'daily', 'interval': 1, 'start_date': self.now - datetime.timedelta(days=2),
+            'recurring_end': self.now + datetime.timedelta(days=10),
+        }
+        fields.update(kwargs)
+        return MaintenanceSchedule.objects.create(**fields)
+
+    def occurrences(self, schedule):
+        return list(schedule.occurrences.values_list('occurrence_at', flat=True))
+
+    def test_occurrences_are_materialized_on_save(self):
+        schedule = self.create_schedule()
+        self.assertEqual(
+            self.occurrences(schedule), schedule.get_occurrences_in_range(schedule.start_date, schedule.recurring_end)
+        )
+        self.assertEqual(len(self.occurrences(schedule)), 13)
+
+    def test_changing_a_recurrence_field_rebuilds_occurrences(self):
+        schedule = MaintenanceSchedule.objects.get(pk=self.create_schedule().pk)
+        schedule.interval = 3
+        schedule.save()
+
+        self.assertEqual(
+            self.occurrences(schedule), schedule.get_occurrences_in_range(schedule.start_date, schedule.recurring_end)
+        )
+        self.assertEqual(len(self.occurrences(schedule)), 5)
+
+    def test_other_changes_keep_occurrences(self):
+        schedule = MaintenanceSchedule.objects.get(pk=self.create_schedule().pk)
+        schedule.title = 'Renamed'
+        schedule.interval = 1  # assigned, but unchanged
+        with CaptureQueriesContext(connection) as ctx:
+            schedule.save()
+
+        self.assertFalse([q for q in ctx.captured_queries if 'equipment_maintenanceoccurrence' in q['sql']])
+        self.assertEqual(len(self.occurrences(schedule)), 13)
+
+    def test_horizon_is_extended_without_duplicates(self):
+        with override_settings(MAINTENANCE_OCCURRENCE_HORIZON_DAYS=5):
+            schedule = self.create_schedule(recurring_end=self.now + datetime.timedelta(days=60))
+        self.assertEqual(len(self.occurrences(schedule)), 8)
+
+        with override_settings(MAINTENANCE_OCCURRENCE_HORIZON_DAYS=20):
+            self.assertEqual(extend_maintenance_occurrence_horizon(), 15)
+            self.assertEqual(extend_maintenance_occurrence_horizon(), 0)
+
+        occurrences = self.occurrences(schedule)
+        self.assertEqual(len(occurrences), len(set(occurrences)))
+        self.assertEqual(
+            occurrences, schedule.get_occurrences_in_range(schedule.start_date, self.now + datetime.timedelta(days=20))
+        )
+
+    def test_upcoming_view_reads_the_month_with_one_range_query(self):
+        start_of_month = self.now.replace(day=1, hour=12, minute=0, second=0)
+        self.create_schedule(
+            start_date=start_of_month - datetime.timedelta(days=5),
+            recurring_end=start_of_month + datetime.timedelta(days=40)
+        )
+        self.create_schedule(title='Once', frequency='once', start_date=start_of_month + datetime.timedelta(days=50))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('upcoming-maintenance-schedules'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len([q for q in ctx.captured_queries if 'equipment_maintenanceoccurrence' in q['sql']]), 1
+        )
+        _, days_in_month = calendar.monthrange(self.now.year, self.now.month)
+        self.assertEqual(
+            [event['date'] for event in response.data],
+            [(start_of_month + datetime.timedelta(days=n)).strftime('%Y-%m-%d') for n in range(days_in_month)]
+        )
+        self.assertEqual(response.data[0]['equipment'], 'All Equipment')
+
+
+@override_settings(MAINTENANCE_COMPLIANCE_TOLERANCE_DAYS=2)
+class MaintenanceComplianceTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now().replace(microsecond=0)
+        self.days = lambda n: self.now + datetime.timedelta(days=n)
+        self.icu, self.opd, self.new = [
+            Equipment.objects.create(
+                name=name, department=department, model='MX', manufacturer='Philips',
+                serial_number=f'CMP000{n}', manufacturing_date=datetime.date(2020, 1, 1)
+            )
+            for n, (name, department) in enumerate([('Monitor', 'icu'), ('Scanner', 'opd'), ('Pump', 'icu')])
+        ]
+        # Only equipment in service when a shared schedule falls due are expected to meet it.
+        Equipment.objects.filter(pk__in=[self.icu.pk, self.opd.pk]).update(created=self.days(-120))
+
+        MaintenanceSchedule(
+            equipment=self.icu, title='Weekly PM', activity_type='preventive maintenance',
+            frequency='weekly', start_date=self.days(-28), recurring_end=self.days(30)
+        ).save()
+        MaintenanceSchedule(
+            for_all_equipment=True, title='Calibration', activity_type='calibration', start_date=self.days(-10)
+        ).save()
+
+        self.add_activity(self.icu, 'preventive maintenance', self.days(-27.5))
+        # Two reports for one occurrence; the spare one must not satisfy the next occurrence.
+        self.add_activity(self.icu, 'preventive maintenance', self.days(-21))
+        self.add_activity(self.icu, 'preventive maintenance', self.days(-21))
+        # Right day, wrong type.
+        self.add_activity(self.icu, 'repair', self.days(-14))
+        self.add_activity(self.opd, 'calibration', self.days(-9))
+
+    def add_activity(self, equipment, activity_type, date_time):
+        return EquipmentMaintenanceActivity.objects.create(
+            equipment=equipment, activity_type=activity_type, date_time=date_time, technician=self.user
+        )
+
+    def test_occurrences_are_matched_to_activities(self):
+        results = dict(
+            (equipment['id'], [(row['activity_type'], row['status']) for row in rows])
+            for equipment, rows in iter_compliance(self.days(-30), self.days(1))
+        )
+
+        self.assertEqual(results, {
+            self.icu.pk: [
+                ('calibration', 'missed'),
+                ('preventive maintenance', 'done'),
+                ('preventive maintenance', 'done'),
+                ('preventive maintenance', 'missed'),
+                ('preventive maintenance', 'missed'),
+                ('preventive maintenance', 'pending'),
+            ],
+            self.opd.pk: [('calibration', 'done')],
+        })
+
+    def test_report_percentages(self):
+        report = build_compliance_report(self.days(-30), self.days(1))
+
+        self.assertEqual(report['overall'], {'planned': 7, 'done': 3, 'missed': 3, 'pending': 1, 'compliance': 50.0})
+        self.assertEqual(
+            [(row['department'], row['compliance']) for row in report['departments']],
+            [('icu', 40.0), ('opd', 100.0)]
+        )
+        self.assertEqual([row['id'] for row in report['equipment']], [self.icu.pk, self.opd.pk])
+
+        icu_only = build_compliance_report(self.days(-30), self.days(1), department='icu')
+        self.assertEqual(icu_only['overall']['planned'], 6)
+
+    def test_cached_report_is_invalidated_by_new_activity(self):
+        url = reverse('maintenance-compliance')
+        params = {'start': self.days(-30).date(), 'end': self.now.date()}
+        self.assertEqual(self.client.get(url, params).data['overall']['done'], 3)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, params).data['overall']['done'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_activity(self.icu, 'calibration', self.days(-11))
+        self.assertEqual(self.client.get(url, params).data['overall']['done'], 4)
+
+    def test_equipment_compliance_endpoint(self):
+        response = self.client.get(reverse('equipment-maintenance-compliance', kwargs={'equipment_id': self.opd.pk}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['status'] for row in response.data], ['done'])
+        self.assertIsNotNone(response.data[0]['activity_id'])
+
+        response = self.client.get(reverse('maintenance-compliance'), {'start': '2025-02-01', 'end': '2025-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class EquipmentStatusHistoryTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.equipment = self.make_equipment('MON0001')
+
+    def make_equipment(self, serial):
+        return Equipment.objects.create(
+            name='Monitor', department='icu', model='MX', manufacturer='Philips', serial_number=serial,
+            manufacturing_date=datetime.date(2020, 1, 1), added_by=self.user
+        )
+
+    def transitions(self, equipment):
+        return list(
+            equipment.status_history.order_by('changed_at', 'id')
+            .values_list('from_status', 'to_status', 'source', 'changed_by')
+        )
+
+    def test_every_status_change_path_is_recorded(self):
+        # Saves that don't change the status add nothing.
+        self.equipment.name = 'Patient Monitor'
+        self.equipment.save()
+        self.equipment.save(update_fields=['name'])
+
+        activity = EquipmentMaintenanceActivity.objects.create(
+            equipment=self.equipment, activity_type='repair', date_time=timezone.now(),
+            technician=self.user, post_status='non_functional'
+        )
+        response = self.client.patch(
+            reverse('equipment-detail', kwargs={'pk': self.equipment.pk}), {'operational_status': 'under_maintenance'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        request = RequestFactory().post('/')
+        request.user = self.user
+        EquipmentAdmin(Equipment, site).mark_as_active(request, Equipment.objects.all())
+
+        self.assertEqual(self.transitions(self.equipment), [
+            (None, 'functional', 'system', self.user.pk),
+            ('functional', 'non_functional', 'activity', self.user.pk),
+            ('non_functional', 'under_maintenance', 'api', self.user.pk),
+            ('under_maintenance', 'functional', 'admin', self.user.pk),
+        ])
+        self.assertEqual(EquipmentStatusHistory.objects.get(source='activity').activity, activity)
+
+        response = self.client.get(reverse('equipment-status-history', kwargs={'equipment_id': self.equipment.pk}))
+        self.assertEqual([row['to_status'] for row in response.data['results']][:2], ['functional', 'under_maintenance'])
+
+    def test_backdated_activity_is_stamped_with_its_own_time(self):
+        now = timezone.now()
+        EquipmentStatusHistory.objects.update(changed_at=now - datetime.timedelta(days=10))
+        EquipmentReliability.rebuild()
+        activity = EquipmentMaintenanceActivity.objects.create(
+            equipment=self.equipment, activity_type='repair', date_time=now - datetime.timedelta(days=3),
+            technician=self.user, post_status='non_functional'
+        )
+
+        entry = EquipmentStatusHistory.objects.get(source='activity')
+        self.assertEqual(entry.changed_at, activity.date_time)
+        history = EquipmentStatusHistory.objects
+        self.assertEqual(history.statuses_as_of(now - datetime.timedelta(days=4)), {self.equipment.pk: 'functional'})
+        self.assertEqual(history.statuses_as_of(now - datetime.timedelta(days=2)), {self.equipment.pk: 'non_functional'})
+        self.assertEqual(EquipmentReliability.objects.get(pk=self.equipment.pk).state_since, activity.date_time)
+
+    def test_out_of_order_activity_keeps_the_current_status_current(self):
+        now = timezone.now()
+        EquipmentStatusHistory.objects.update(changed_at=now - datetime.timedelta(days=10))
+        self.equipment.operational_status = 'under_maintenance'
+        self.equipment.save()
+        latest = self.equipment.status_history.get(to_status='under_maintenance').changed_at
+
+        # Logged after the change above, but dated before it.
+        EquipmentMaintenanceActivity.objects.create(
+            equipment=self.equipment, activity_type='repair', date_time=now - datetime.timedelta(days=3),
+            technician=self.user, post_status='non_functional'
+        )
+        self.assertEqual(EquipmentStatusHistory.objects.get(source='activity').changed_at, latest)
+        history = EquipmentStatusHistory.objects
+        self.assertEqual(history.statuses_as_of(timezone.now()), {self.equipment.pk: 'non_functional'})
+        self.assertEqual(history.counts_as_of(timezone.now()), {'non_functional': 1})
+
+        # A future-dated activity is logged now, not hidden until its date.
+        EquipmentMaintenanceActivity.objects.create(
+            equipment=self.equipment, activity_type='repair', date_time=now + datetime.timedelta(days=3),
+            technician=self.user, post_status='functional'
+        )
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.operational_status, 'functional')
+        self.assertEqual(history.statuses_as_of(timezone.now()), {self.equipment.pk: 'functional'})
+
+    def test_fleet_status_as_of(self):
+        other = self.make_equipment('MON0002')
+        start = timezone.now() - datetime.timedelta(days=10)
+        EquipmentStatusHistory.objects.update(changed_at=start)
+        for equipment, status, days in ((self.equipment, 'non_functional', 3), (other, 'decommissioned', 6)):
+            equipment.operational_status = status
+            equipment.save()
+            equipment.status_history.filter(to_status=status).update(changed_at=start + datetime.timedelta(days=days))
+
+        history = EquipmentStatusHistory.objects
+        self.assertEqual(history.counts_as_of(start - datetime.timedelta(days=1)), {})
+        self.assertEqual(history.counts_as_of(start), {'functional': 2})
+        self.assertEqual(
+            history.statuses_as_of(start + datetime.timedelta(days=4)),
+            {self.equipment.pk: 'non_functional', other.pk: 'functional'}
+        )
+        self.assertEqual(history.counts_as_of(timezone.now()), {'non_functional': 1, 'decommissioned': 1})
+
+        response = self.client.get(
+            reverse('equipment-status-summary'), {'as_of': (start + datetime.timedelta(days=4)).date().isoformat()}
+        )
+        self.assertEqual(response.data, {'non_functional': 1, 'functional': 1, 'total_equipment': 2})
+        self.assertEqual(self.client.get(reverse('equipment-status-summary'), {'as_of': '2025-02-30'}).status_code, 400)
+
+
+class EquipmentReliabilityTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now()
+        self.start = self.now - datetime.timedelta(hours=400)
+        self.scanner = self.make_equipment('SCN0001', 'diagnostic', 'icu')
+        self.pump = self.make_equipment('PMP0001', 'therapeutic', 'opd')
+        EquipmentStatusHistory.objects.filter(equipment=self.scanner).update(changed_at=self.start)
+        EquipmentStatusHistory.objects.filter(equipment=self.pump).update(
+            changed_at=self.now - datetime.timedelta(hours=50)
+        )
+        EquipmentReliability.rebuild()
+
+    def make_equipment(self, serial, device_type, department):
+        return Equipment.objects.create(
+            name='Device', device_type=device_type, department=department, model='MX', manufacturer='Philips',
+            serial_number=serial, manufacturing_date=datetime.date(2020, 1, 1)
+        )
+
+    def transition(self, equipment, to_status, hours):
+        entry = EquipmentStatusHistory.objects.create(
+            equipment=equipment, to_status=to_status, changed_at=self.start + datetime.timedelta(hours=hours)
+        )
+        EquipmentReliability.apply([entry])
+
+    def folded(self):
+        return list(EquipmentReliability.objects.order_by('pk').values(*EquipmentReliability.FOLDED_FIELDS))
+
+    def test_metrics_are_accumulated_per_transition(self):
+        self.transition(self.scanner, 'non_functional', 100)
+        self.transition(self.scanner, 'under_maintenance', 104)
+        self.transition(self.scanner, 'functional', 110)
+        self.transition(self.scanner, 'non_functional', 310)
+        self.transition(self.scanner, 'decommissioned', 312)
+
+        incremental = self.folded()
+        EquipmentReliability.rebuild()
+        self.assertEqual(incremental, self.folded())
+
+        report = build_reliability_report(now=self.now)
+        self.assertEqual(report['device_types'][0], {
+            'device_type': 'diagnostic', 'equipment': 1, 'failures': 2, 'repairs': 1,
+            'uptime_hours': 300.0, 'downtime_hours': 12.0, 'mtbf_hours': 150.0, 'mttr_hours': 10.0,
+            'availability': 96.15,
+        })
+        # The pump has been up for 50 hours and is still running.
+        self.assertEqual(report['departments'][1]['department'], 'opd')
+        self.assertEqual(report['departments'][1]['uptime_hours'], 50.0)
+        self.assertIsNone(report['departments'][1]['mtbf_hours'])
+        self.assertEqual(report['overall']['uptime_hours'], 350.0)
+
+        with self.assertNumQueries(1):
+            build_reliability_report(department='icu', now=self.now)
+
+    def test_out_of_order_transition_replays_history(self):
+        self.transition(self.scanner, 'non_functional', 100)
+        self.transition(self.scanner, 'functional', 50)
+
+        incremental = self.folded()
+        EquipmentReliability.rebuild()
+        self.assertEqual(incremental, self.folded())
+        self.assertEqual(EquipmentReliability.objects.get(pk=self.scanner.pk).failures, 1)
+
+    def test_activity_status_change_updates_accumulator_and_endpoints(self):
+        EquipmentMaintenanceActivity.objects.create(
+            equipment=self.pump, activity_type='repair', date_time=timezone.now(),
+            technician=self.user, post_status='non_functional'
+        )
+
+        response = self.client.get(reverse('equipment-reliability-detail', kwargs={'equipment_id': self.pump.pk}))
+        self.assertEqual(response.data['state'], 'down')
+        self.assertEqual(response.data['failures'], 1)
+
+        response = self.client.get(reverse('equipment-reliability'), {'device_type': 'therapeutic'})
+        self.assertEqual(response.data['overall']['failures'], 1)
+        self.assertEqual(self.client.get(reverse('equipment-reliability'), {'department': 'mars'}).status_code, 400)
@@ -12,6 +12,11 @@ urlpatterns = [
     # Equipment endpoints
     path('equipment/', views.EquipmentList.as_view(), name='equipment-list'),
     path('equipment/<int:pk>/', views.EquipmentDetail.as_view(), name='equipment-detail'),
+    path('equipment/bulk-import/', views.EquipmentBulkImportView.as_view(), name='equipment-bulk-import'),
+    path('equipment/export/', views.EquipmentExportView.as_view(), name='equipment-export'),
+    path('equipment/search/', views.EquipmentSearchView.as_view(), name='equipment-search'),
+    path('equipment/<int:equipment_id>/status-history/', views.EquipmentStatusHistoryView.as_view(), name='equipment-status-history'),
+    path('equipment/<int:equipment_id>/reliability/', views.EquipmentReliabilityView.as_view(), name='equipment-reliability-detail'),
     
     # Total equipment count
     path('equipment/total/', views.TotalEquipmentView.as_view(), name='total-equipment'),
@@ -22,6 +27,9 @@ urlpatterns = [
     # Equipment type breakdown (diagnostic, therapeutic, etc.)
     path('equipment-type/summary/', views.EquipmentTypeSummaryView.as_view(), name='equipment-type-summary'),
 
+    # Reliability (MTBF / MTTR / availability) per device type and department
+    path('equipment-reliability/', views.EquipmentReliabilityReportView.as_view(), name='equipment-reliability'),
+
     
     # Maintenance activity overview (daily counts over a chosen period)
     path('maintenance-reports/overview/', views.MaintenanceActivityOverviewView.as_view(), name='maintenance-reports-overview'),
@@ -29,11 +37,16 @@ urlpatterns = [
     # Report
     path('maintenance-reports/', views.MaintenanceActivitiesListCreateView.as_view(), name='maintenance-reports'),
     path('maintenance-reports/<int:pk>/', views.MaintenanceActivitiesDetailView.as_view(), name='maintenance-report-detail'),
+    path('maintenance-reports/export/', views.MaintenanceActivityExportView.as_view(), name='maintenance-reports-export'),
     
     # # Equipment Maintenance Reports
     path('equipment/<int:equipment_id>/maintenance-reports/', views.MaintenanceActivitiesByEquipmentView.as_view(), name='equipment-activities'),
     path('equipment/<int:equipment_id>/maintenance-reports/<int:activity_id>/', views.MaintenanceActivitiesDetailByEquipmentView.as_view(), name='equipment-activity-detail-by-equipment'),
     path('equipment/<int:equipment_id>/maintenance-reports/yearly-overview/', views.EquipmentMaintenanceActivityYearlyOverviewView.as_view(), name='equipment-activity-yearly-overview'),
+    path('equipment/<int:equipment_id>/maintenance-compliance/', views.EquipmentMaintenanceComplianceView.as_view(), name='equipment-maintenance-compliance'),
+    
+    # Preventive maintenance compliance (planned vs. performed)
+    path('maintenance/compliance/', views.MaintenanceComplianceView.as_view(), name='maintenance-compliance'),
     
     # Upcoming maintenance schedules for the current month
     path('maintenance/upcoming-schedules/', views.UpcomingMaintenanceScheduleView.as_view(), name='upcoming-maintenance-schedules'),
@@ -41,6 +54,7 @@ urlpatterns = [
     # Maintenance schedule endpoints
     path('maintenance-schedules/', views.MaintenanceScheduleListCreateView.as_view(), name='maintenance-schedule-list-create'),
     path('maintenance-schedules/<int:pk>/', views.MaintenanceScheduleDetailView.as_view(), name='maintenance-schedule-detail'),
+    path('maintenance-schedules/export/', views.MaintenanceScheduleExportView.as_view(), name='maintenance-schedules-export'),
     path('maintenance-schedules/<int:pk>/deactivate/', views.deactivate_schedule, name='schedule-deactivate'),
     
 ]
@@ -6,30 +6,43 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.parsers import MultiPartParser
 
 from .models import (
     Equipment, Supplier, EquipmentMaintenanceActivity,
-    MaintenanceSchedule
+    MaintenanceSchedule, MaintenanceOccurrence, MaintenanceDailyRollup, EquipmentStatusHistory
     )
 from .serializers import(
     SupplierWriteSerializer, SupplierReadSerializer,
     EquipmentWriteSerializer, EquipmentReadSerializer,
     EquipmentMaintenanceActivityReadSerializer, EquipmentMaintenanceActivityWriteSerializer,
     MaintenanceScheduleWriteSerializer, 
-    MaintenanceScheduleReadSerializer
+    MaintenanceScheduleReadSerializer,
+    MaintenanceComplianceQuerySerializer, MaintenanceComplianceOccurrenceSerializer,
+    EquipmentStatusHistoryReadSerializer
     )
 from .utils import get_object_by_id_or_slug
+from .importers import EquipmentImporter, ImportFormatError
+from .exports import EXPORT_FORMATS, stream_export
+from .search import EquipmentSearchFilter, search_equipment
+from .compliance import get_compliance_report, iter_compliance
+from .analytics import build_reliability_report, equipment_reliability
+from dashboard.models import AggregateCounter
+from .pagination import EquipmentCursorPagination, EquipmentStatusHistoryCursorPagination
+from core.mixins import ConditionalGetMixin
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 
 
 from accounts.permissions import IsAdminOrSuperAdmin
-from django.db.models import Q, Count, functions
+from django.db.models import Q, Sum, functions
 from django.db.models.functions import ExtractMonth
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 import logging
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 import datetime
 import calendar
 from collections import defaultdict
@@ -317,12 +330,36 @@ class SupplierDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 
-class EquipmentList(generics.ListCreateAPIView):
+class EquipmentList(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     List all equipment or create a new equipment entry.
     """
     permission_classes = [IsAuthenticated]
-    queryset = Equipment.objects.all()
+    # supplier_name and added_by_name are part of the representation.
+    conditional_related_fields = ('supplier__modified', 'added_by__updated_at')
+    # Only the columns EquipmentReadSerializer renders; the joined supplier and
+    # user rows are cut down to the names it shows.
+    queryset = Equipment.objects.select_related('supplier', 'added_by').only(
+        'id', 'created', 'modified', 'name', 'device_type', 'equipment_id', 'location', 'department',
+        'operational_status', 'model', 'manufacturer', 'serial_number', 'manufacturing_date',
+        'description', 'image', 'manual', 'decommission_date',
+        'supplier', 'supplier__company_name', 'added_by', 'added_by__first_name', 'added_by__last_name',
+    )
+    pagination_class = EquipmentCursorPagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter, EquipmentSearchFilter]
+    # Keyset cursors can only be built on non-null scalar columns.
+    ordering_fields = [
+        'id', 'name', 'device_type', 'equipment_id', 'department', 'operational_status',
+        'manufacturer', 'model', 'serial_number', 'manufacturing_date', 'created', 'modified',
+    ]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Skip loading the (potentially large) description column when the client didn't ask for it.
+        requested = self.request.query_params.get('fields') if self.request.method == 'GET' else None
+        if requested and 'description' not in {name.strip() for name in requested.split(',')}:
+            queryset = queryset.defer('description')
+        return queryset
 
     def get_serializer_class(self):
         method = getattr(self.request, 'method', None)
@@ -332,7 +369,21 @@ class EquipmentList(generics.ListCreateAPIView):
 
     @extend_schema(
         summary="List Equipment",
-        description="Retrieve a list of all equipment.",
+        description=(
+            "Retrieve a cursor-paginated list of equipment ordered by most recently modified. "
+            "Follow the 'next'/'previous' links to page through results. "
+            "Use '?fields=id,name,equipment_id' to return only the listed fields "
+            "and '?search=' to filter by name, serial number, manufacturer, model or equipment ID."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="fields",
+                location=OpenApiParameter.QUERY,
+                description="Comma-separated list of fields to include in each item.",
+                type=str,
+                required=False
+            ),
+        ],
         responses={
             200: EquipmentReadSerializer(many=True),
             401: OpenApiResponse(
@@ -391,12 +442,14 @@ class EquipmentList(generics.ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class EquipmentDetail(RetrieveUpdateDestroyAPIView):
+class EquipmentDetail(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete equipment.
     """
     permission_classes = [IsAuthenticated]
-    queryset = Equipment.objects.all()
+    # supplier_name and added_by_name are part of the representation.
+    conditional_related_fields = ('supplier__modified', 'added_by__updated_at')
+    queryset = Equipment.objects.select_related('supplier', 'added_by')
     lookup_field = 'pk'
 
     def get_serializer_class(self):
@@ -573,6 +626,185 @@ class EquipmentDetail(RetrieveUpdateDestroyAPIView):
 
 
 
+class EquipmentBulkImportView(APIView):
+    """
+    Create many equipment entries from one CSV or NDJSON upload.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    CONTENT_TYPE_FORMATS = {
+        'text/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+        'application/ndjson': 'ndjson',
+        'application/jsonl': 'ndjson',
+    }
+    EXTENSION_FORMATS = {
+        '.csv': 'csv',
+        '.ndjson': 'ndjson',
+        '.jsonl': 'ndjson',
+    }
+
+    def get_input_format(self, request, filename=''):
+        explicit = request.query_params.get('input_format')
+        if explicit:
+            return explicit.lower()
+        content_type = (request.content_type or '').split(';')[0].strip().lower()
+        if content_type in self.CONTENT_TYPE_FORMATS:
+            return self.CONTENT_TYPE_FORMATS[content_type]
+        for extension, input_format in self.EXTENSION_FORMATS.items():
+            if filename.lower().endswith(extension):
+                return input_format
+        return None
+
+    @extend_schema(
+        summary="Bulk Import Equipment",
+        description=(
+            "Create equipment in bulk from a CSV file (header row with model field names) or "
+            "newline-delimited JSON (one object per line). Send the file as the raw request body "
+            "with a 'text/csv' or 'application/x-ndjson' content type, or as the 'file' field of a "
+            "multipart upload. The 'supplier' column holds the supplier's company name. "
+            "Rows are inserted in chunks, each in its own transaction; rows that fail validation are "
+            "skipped and listed in the error report with their 1-based row number."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="input_format",
+                location=OpenApiParameter.QUERY,
+                description="'csv' or 'ndjson'. Defaults to the content type or the file extension.",
+                type=str,
+                required=False
+            ),
+        ],
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {'file': {'type': 'string', 'format': 'binary'}}
+            },
+            'text/csv': {'type': 'string'},
+            'application/x-ndjson': {'type': 'string'},
+        },
+        responses={
+            201: OpenApiResponse(
+                description="At least one equipment entry was created.",
+                examples=[OpenApiExample(
+                    "Import Report",
+                    value={
+                        "created": 2,
+                        "failed": 1,
+                        "errors": [{"row": 3, "errors": {"serial_number": ["Duplicate serial number in this file."]}}]
+                    },
+                    response_only=True
+                )]
+            ),
+            400: OpenApiResponse(
+                description="The file could not be read, or no rows were valid.",
+                examples=[OpenApiExample(
+                    "Unreadable File",
+                    value={"detail": "Invalid JSON on line 4: Expecting value: line 1 column 1 (char 0)"},
+                    response_only=True
+                )]
+            ),
+            401: OpenApiResponse(
+                description="Unauthorized - User is not authenticated.",
+                examples=[OpenApiExample(
+                    "Unauthorized",
+                    value={"detail": "Authentication credentials were not provided."},
+                    response_only=True
+                )]
+            )
+        },
+        tags=["Equipment"]
+    )
+    def post(self, request, *args, **kwargs):
+        """
+        Stream-parse the upload and create equipment in chunks.
+        """
+        if (request.content_type or '').startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"detail": "No file was uploaded in the 'file' field."}, status=status.HTTP_400_BAD_REQUEST)
+            stream, filename = upload, upload.name
+        else:
+            stream, filename = request.stream, ''
+            if stream is None:
+                return Response({"detail": "The request body is empty."}, status=status.HTTP_400_BAD_REQUEST)
+
+        input_format = self.get_input_format(request, filename)
+        if input_format is None:
+            return Response(
+                {"detail": "Could not tell the file format; send '?input_format=csv' or '?input_format=ndjson'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        importer = EquipmentImporter(request.user)
+        try:
+            report = importer.run(stream, input_format)
+        except ImportFormatError as e:
+            return Response({"detail": str(e), **importer.report()}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"Bulk equipment import by {request.user}: {report['created']} created, {report['failed']} failed.")
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+
+class EquipmentSearchView(APIView):
+    """
+    Ranked equipment search over the search index.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    @extend_schema(
+        summary="Search Equipment",
+        description=(
+            "Search equipment by name, serial number, manufacturer, model or equipment ID. "
+            "Every word in 'q' must match the start of a word in one of those fields "
+            "(e.g. 'vent phil' finds a Philips ventilator, 'SN-00' finds serial SN-00123). "
+            "Results are ordered best match first; exact ID and serial matches rank highest."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                location=OpenApiParameter.QUERY,
+                description="Search text.",
+                type=str,
+                required=True
+            ),
+            OpenApiParameter(
+                name="limit",
+                location=OpenApiParameter.QUERY,
+                description="Maximum number of results (default 20, at most 100).",
+                type=int,
+                required=False
+            ),
+        ],
+        responses={
+            200: EquipmentReadSerializer(many=True),
+            400: OpenApiResponse(description="Missing search text or invalid limit."),
+            401: OpenApiResponse(description="Unauthorized access."),
+        },
+        tags=["Equipment"]
+    )
+    def get(self, request, format=None):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "The 'q' query parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return Response({"detail": "'limit' must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_limit))
+
+        results = search_equipment(
+            query,
+            limit=limit,
+            queryset=Equipment.objects.select_related('supplier', 'added_by')
+        )
+        serializer = EquipmentReadSerializer(results, many=True, context={'request': request})
+        return Response(serializer.data)
+
+
 class TotalEquipmentView(APIView):
     """
     View to return the total number of equipment in the system.
@@ -606,7 +838,7 @@ class TotalEquipmentView(APIView):
         tags=["Equipment"]
     )
     def get(self, request, format=None):
-        total_equipment = Equipment.objects.count()
+        total_equipment = AggregateCounter.get_value('equipment:total')
         return Response({'total_equipment': total_equipment})
 
 
@@ -621,8 +853,18 @@ class EquipmentStatusSummaryView(APIView):
         description=(
             "Retrieve aggregated counts of equipment by operational status. "
             "The response is an object where each key is a status and the value is an integer count. "
-            "Additionally, the total equipment count is provided under the 'total_equipment' key."
+            "Additionally, the total equipment count is provided under the 'total_equipment' key. "
+            "Pass 'as_of' to get the counts as they stood at the end of that day, from the status history."
         ),
+        parameters=[
+            OpenApiParameter(
+                name="as_of",
+                location=OpenApiParameter.QUERY,
+                description="Date (YYYY-MM-DD) to report the fleet's statuses at. Defaults to now.",
+                type=OpenApiTypes.DATE,
+                required=False
+            )
+        ],
         responses={
             200: OpenApiResponse(
                 description="Equipment status summary retrieved successfully.",
@@ -664,20 +906,20 @@ class EquipmentStatusSummaryView(APIView):
         tags=["Equipment"]
     )
     def get(self, request, *args, **kwargs):
-        summary_qs = (
-            Equipment.objects
-            .values('operational_status')
-            .annotate(total=Count('id'))
-        )
-        
-        # Convert the QuerySet into a dict keyed by operational_status
-        summary = {}
-        total_equipment = 0
-        for item in summary_qs:
-            status = item['operational_status']
-            count = item['total']
-            summary[status] = count
-            total_equipment += count
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            try:
+                day = parse_date(as_of)
+            except ValueError:
+                day = None
+            if day is None:
+                raise ValidationError({"as_of": "Enter a valid date (YYYY-MM-DD)."})
+            moment = timezone.make_aware(datetime.datetime.combine(day, datetime.time.max))
+            summary = EquipmentStatusHistory.objects.counts_as_of(moment)
+        else:
+            # Counters are kept per operational_status by the dashboard signals
+            summary = AggregateCounter.get_group('equipment:status')
+        total_equipment = sum(summary.values())
 
         # Optionally add the total to the response
         summary['total_equipment'] = total_equipment
@@ -687,6 +929,123 @@ class EquipmentStatusSummaryView(APIView):
 
 
 
+RELIABILITY_METRIC_PROPERTIES = {
+    "equipment": {"type": "integer"},
+    "failures": {"type": "integer"},
+    "repairs": {"type": "integer"},
+    "uptime_hours": {"type": "number"},
+    "downtime_hours": {"type": "number"},
+    "mtbf_hours": {"type": "number", "nullable": True, "description": "Mean time between failures"},
+    "mttr_hours": {"type": "number", "nullable": True, "description": "Mean time to repair"},
+    "availability": {"type": "number", "nullable": True, "description": "Uptime / (uptime + downtime), in percent"},
+}
+
+
+class EquipmentReliabilityReportView(APIView):
+    """
+    Fleet reliability (MTBF, MTTR, availability) per device type and department.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get Equipment Reliability Report",
+        operation_id="equipment_reliability_report",
+        description=(
+            "Mean time between failures, mean time to repair and availability, overall, per device type "
+            "and per department, from the equipment status history. Functional equipment is up; "
+            "non-functional or under-maintenance equipment is down; decommissioned time is not counted. "
+            "A failure is a move from up to down, a repair a move back to up."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="department",
+                location=OpenApiParameter.QUERY,
+                description="Only include equipment of this department.",
+                type=str,
+                enum=[value for value, _ in Equipment.DEPARTMENT],
+                required=False
+            ),
+            OpenApiParameter(
+                name="device_type",
+                location=OpenApiParameter.QUERY,
+                description="Only include equipment of this device type.",
+                type=str,
+                enum=[value for value, _ in Equipment.DEVICE_TYPE],
+                required=False
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                description="Reliability metrics.",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "overall": {"type": "object", "properties": RELIABILITY_METRIC_PROPERTIES},
+                        "device_types": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {"device_type": {"type": "string"}, **RELIABILITY_METRIC_PROPERTIES}
+                            }
+                        },
+                        "departments": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {"department": {"type": "string"}, **RELIABILITY_METRIC_PROPERTIES}
+                            }
+                        },
+                        "generated_at": {"type": "string", "format": "date-time"},
+                    }
+                }
+            ),
+            400: OpenApiResponse(description="Unknown department or device type.")
+        },
+        tags=["Equipment"]
+    )
+    def get(self, request, *args, **kwargs):
+        department = request.query_params.get('department')
+        device_type = request.query_params.get('device_type')
+        if department and department not in Equipment.DEPARTMENT:
+            raise ValidationError({"department": f"'{department}' is not a valid department."})
+        if device_type and device_type not in Equipment.DEVICE_TYPE:
+            raise ValidationError({"device_type": f"'{device_type}' is not a valid device type."})
+        return Response(build_reliability_report(department=department, device_type=device_type))
+
+
+class EquipmentReliabilityView(APIView):
+    """
+    Reliability (MTBF, MTTR, availability) of a single equipment.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get Equipment Reliability",
+        description="MTBF, MTTR and availability of one equipment, from its status history.",
+        responses={
+            200: OpenApiResponse(
+                description="Reliability metrics of the equipment.",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "state": {"type": "string", "enum": ["up", "down", "out"]},
+                        "state_since": {"type": "string", "format": "date-time"},
+                        **RELIABILITY_METRIC_PROPERTIES
+                    }
+                }
+            ),
+            404: OpenApiResponse(description="Equipment not found.")
+        },
+        tags=["Equipment"]
+    )
+    def get(self, request, equipment_id):
+        get_object_or_404(Equipment, id=equipment_id)
+        metrics = equipment_reliability(equipment_id)
+        if metrics is None:
+            return Response({"detail": "No status history recorded for this equipment."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(metrics)
+
+
 class EquipmentTypeSummaryView(APIView):
     """
     Retrieve aggregated counts of equipment by device type.
@@ -734,14 +1093,8 @@ class EquipmentTypeSummaryView(APIView):
         tags=["Equipment"]
     )
     def get(self, request, *args, **kwargs):
-        # Aggregate by device_type and count the number of equipment in each category
-        summary_qs = (
-            Equipment.objects
-            .values('device_type') 
-            .annotate(total=Count('id'))
-        )
-        # Convert the QuerySet into a dictionary keyed by device_type
-        summary = {item['device_type']: item['total'] for item in summary_qs}
+        # Counters are kept per device_type by the dashboard signals
+        summary = AggregateCounter.get_group('equipment:type')
         return Response(summary)
 
 
@@ -831,18 +1184,16 @@ class MaintenanceActivityOverviewView(APIView):
         end_date = timezone.now()
         start_date = end_date - datetime.timedelta(days=period)
 
-        # Filter the activities within the chosen date range
-        queryset = EquipmentMaintenanceActivity.objects.filter(
-            date_time__gte=start_date,
-            date_time__lte=end_date
-        )
-
-        # Group by day and activity_type, and count
+        # Sum the pre-aggregated daily buckets within the chosen date range
         grouped_qs = (
-            queryset
-            .annotate(day=functions.TruncDay('date_time'))
+            MaintenanceDailyRollup.objects
+            .filter(
+                day__gte=timezone.localtime(start_date).date(),
+                day__lte=timezone.localtime(end_date).date(),
+                count__gt=0
+            )
             .values('day', 'activity_type')
-            .annotate(count=Count('id'))
+            .annotate(count=Sum('count'))
             .order_by('day')
         )
 
@@ -872,6 +1223,35 @@ class MaintenanceActivityOverviewView(APIView):
 
 
 
+class EquipmentStatusHistoryView(generics.ListAPIView):
+    """
+    The operational status transitions of one equipment, newest first.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = EquipmentStatusHistoryReadSerializer
+    pagination_class = EquipmentStatusHistoryCursorPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        get_object_or_404(Equipment, id=self.kwargs['equipment_id'])
+        return EquipmentStatusHistory.objects.filter(equipment_id=self.kwargs['equipment_id']).select_related('changed_by')
+
+    @extend_schema(
+        summary="List Equipment Status History",
+        description=(
+            "Cursor-paginated operational status transitions of an equipment, newest first. "
+            "The first entry has no from_status and records the status the equipment was added with."
+        ),
+        responses={
+            200: EquipmentStatusHistoryReadSerializer(many=True),
+            404: OpenApiResponse(description="Equipment not found.")
+        },
+        tags=["Equipment"]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 class MaintenanceActivitiesByEquipmentView(generics.ListCreateAPIView):
     """
     List all maintenance reports for a specific equipment or create a new report.
@@ -883,7 +1263,7 @@ class MaintenanceActivitiesByEquipmentView(generics.ListCreateAPIView):
         queryset = (
             EquipmentMaintenanceActivity.objects
             .filter(equipment_id=equipment_id)
-            .select_related('equipment', 'technician')
+            .with_names()
         )
         # Filter by 'year' query parameter if provided
         year_str = self.request.query_params.get('year')
@@ -993,7 +1373,11 @@ class MaintenanceActivitiesDetailByEquipmentView(generics.RetrieveAPIView):
 
     def get_queryset(self):
         equipment_id = self.kwargs.get('equipment_id')
-        return EquipmentMaintenanceActivity.objects.filter(equipment_id=equipment_id)
+        return (
+            EquipmentMaintenanceActivity.objects
+            .filter(equipment_id=equipment_id)
+            .with_names()
+        )
 
     def get_object(self):
         queryset = self.get_queryset()
@@ -1065,7 +1449,7 @@ class MaintenanceActivitiesListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return EquipmentMaintenanceActivity.objects.all()
+        return EquipmentMaintenanceActivity.objects.with_names()
 
     def get_serializer_class(self):
         method = getattr(self.request, 'method', None)
@@ -1141,7 +1525,7 @@ class MaintenanceActivitiesDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return EquipmentMaintenanceActivity.objects.all()
+        return EquipmentMaintenanceActivity.objects.with_names()
 
     def get_serializer_class(self):
         return EquipmentMaintenanceActivityReadSerializer
@@ -1267,17 +1651,17 @@ class EquipmentMaintenanceActivityYearlyOverviewView(APIView):
         else:
             year = timezone.now().year
 
-        # 3. Filter activities for this equipment and the given year
-        queryset = EquipmentMaintenanceActivity.objects.filter(
-            equipment_id=equipment_id, date_time__year=year
+        # 3. Filter the daily rollup buckets for this equipment and the given year
+        queryset = MaintenanceDailyRollup.objects.filter(
+            equipment_id=equipment_id, day__year=year
         )
 
-        # 4. Group by month using ExtractMonth and activity_type, then count
+        # 4. Group by month using ExtractMonth and activity_type, then sum the daily counts
         grouped_qs = (
             queryset
-            .annotate(month=ExtractMonth('date_time'))
+            .annotate(month=ExtractMonth('day'))
             .values('month', 'activity_type')
-            .annotate(count=Count('id'))
+            .annotate(count=Sum('count'))
             .order_by('month')
         )
 
@@ -1307,6 +1691,141 @@ class EquipmentMaintenanceActivityYearlyOverviewView(APIView):
         return Response(final_data)
 
 
+COMPLIANCE_SUMMARY_PROPERTIES = {
+    "planned": {"type": "integer"},
+    "done": {"type": "integer"},
+    "missed": {"type": "integer"},
+    "pending": {"type": "integer"},
+    "compliance": {"type": "number", "nullable": True, "description": "done / (done + missed), in percent"},
+}
+
+
+class MaintenanceComplianceView(APIView):
+    """
+    Preventive maintenance compliance (planned vs. performed) over a period,
+    overall, per department and per equipment.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get Maintenance Compliance Report",
+        description=(
+            "Compare the scheduled maintenance occurrences in a period with the maintenance reports "
+            "actually logged. An occurrence counts as done when a report of the same activity type was "
+            "logged on the equipment within the tolerance window (MAINTENANCE_COMPLIANCE_TOLERANCE_DAYS) "
+            "around it; each report satisfies one occurrence. Occurrences whose window is still open are "
+            "pending and left out of the compliance percentage. Defaults to the last 90 days."
+        ),
+        parameters=[MaintenanceComplianceQuerySerializer],
+        responses={
+            200: OpenApiResponse(
+                description="Compliance summary for the period.",
+                response={
+                    "type": "object",
+                    "properties": {
+                        "start": {"type": "string", "format": "date-time"},
+                        "end": {"type": "string", "format": "date-time"},
+                        "tolerance_days": {"type": "integer"},
+                        "overall": {"type": "object", "properties": COMPLIANCE_SUMMARY_PROPERTIES},
+                        "departments": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {"department": {"type": "string"}, **COMPLIANCE_SUMMARY_PROPERTIES}
+                            }
+                        },
+                        "equipment": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "id": {"type": "integer"},
+                                    "name": {"type": "string"},
+                                    "department": {"type": "string"},
+                                    **COMPLIANCE_SUMMARY_PROPERTIES
+                                }
+                            }
+                        },
+                        "generated_at": {"type": "string", "format": "date-time"},
+                    }
+                },
+                examples=[
+                    OpenApiExample(
+                        "Compliance Example",
+                        value={
+                            "start": "2025-03-01T00:00:00+00:00",
+                            "end": "2025-05-30T23:59:59.999999+00:00",
+                            "tolerance_days": 7,
+                            "overall": {"planned": 12, "done": 9, "missed": 2, "pending": 1, "compliance": 81.8},
+                            "departments": [
+                                {"department": "ICU", "planned": 12, "done": 9, "missed": 2, "pending": 1, "compliance": 81.8}
+                            ],
+                            "equipment": [
+                                {
+                                    "id": 1, "name": "Ventilator", "department": "ICU",
+                                    "planned": 12, "done": 9, "missed": 2, "pending": 1, "compliance": 81.8
+                                }
+                            ],
+                            "generated_at": "2025-05-30T10:00:00+00:00"
+                        },
+                        response_only=True
+                    )
+                ]
+            ),
+            400: OpenApiResponse(description="Invalid period or department.")
+        },
+        tags=["Maintenance Reports"]
+    )
+    def get(self, request, *args, **kwargs):
+        query = MaintenanceComplianceQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end = query.get_period()
+        return Response(get_compliance_report(start, end, department=query.validated_data.get('department')))
+
+
+class EquipmentMaintenanceComplianceView(APIView):
+    """
+    The scheduled maintenance occurrences of one equipment over a period and
+    the report (if any) that satisfied each of them.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get Maintenance Compliance For Equipment",
+        description=(
+            "List every scheduled maintenance occurrence of the equipment in the period with its status "
+            "(done, missed or pending) and the id of the maintenance report that satisfied it. "
+            "Defaults to the last 90 days."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="equipment_id",
+                location=OpenApiParameter.PATH,
+                description="ID of the equipment",
+                type=int,
+                required=True
+            ),
+            MaintenanceComplianceQuerySerializer,
+        ],
+        responses={
+            200: MaintenanceComplianceOccurrenceSerializer(many=True),
+            400: OpenApiResponse(description="Invalid period."),
+            404: OpenApiResponse(description="Equipment not found.")
+        },
+        tags=["Maintenance Reports"]
+    )
+    def get(self, request, equipment_id):
+        get_object_or_404(Equipment, id=equipment_id)
+        query = MaintenanceComplianceQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end = query.get_period()
+        occurrences = []
+        for _equipment, rows in iter_compliance(start, end, equipment_id=equipment_id):
+            occurrences.extend(rows)
+        occurrences.sort(key=lambda row: row['occurrence_at'])
+        return Response(MaintenanceComplianceOccurrenceSerializer(occurrences, many=True).data)
+
+
 class UpcomingMaintenanceScheduleView(APIView):
     """
     Lists all maintenance occurrences (including recurring ones)
@@ -1378,36 +1897,44 @@ class UpcomingMaintenanceScheduleView(APIView):
             day=last_day, hour=23, minute=59, second=59, microsecond=999999
         )
 
-        # 2. Retrieve all maintenance schedules.
-        schedules = MaintenanceSchedule.objects.all()
+        # 2. Fetch the materialized occurrences within the current month (already sorted by date).
+        occurrences = (
+            MaintenanceOccurrence.objects
+            .filter(occurrence_at__gte=start_of_month, occurrence_at__lte=end_of_month)
+            .select_related('schedule', 'schedule__equipment')
+            .only(
+                'occurrence_at',
+                'schedule__title', 'schedule__activity_type', 'schedule__for_all_equipment',
+                'schedule__equipment__name',
+            )
+            .order_by('occurrence_at', 'schedule_id')
+        )
 
-        # 3. Collect all occurrences within the current month.
+        # 3. Build one event per occurrence.
         events = []
-        for schedule in schedules:
-            occurrences = schedule.get_occurrences_in_range(start_of_month, end_of_month)
+        for occurrence in occurrences:
+            schedule = occurrence.schedule
             # Determine the equipment label.
             if schedule.for_all_equipment:
                 equipment_label = "All Equipment"
             else:
                 equipment_label = schedule.equipment.name if schedule.equipment else "No equipment linked"
-            for occ in occurrences:
-                events.append({
-                    "title": schedule.title,
-                    "activity_type": schedule.activity_type,
-                    "equipment": equipment_label,
-                    "date": occ.strftime('%Y-%m-%d'),
-                })
-
-        # 4. Sort the events by date.
-        events.sort(key=lambda e: e["date"])
+            events.append({
+                "title": schedule.title,
+                "activity_type": schedule.activity_type,
+                "equipment": equipment_label,
+                "date": occurrence.occurrence_at.strftime('%Y-%m-%d'),
+            })
 
         return Response(events)
 
-class MaintenanceScheduleListCreateView(generics.ListCreateAPIView):
+class MaintenanceScheduleListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     List all maintenance schedules or create a new one.
     """
     permission_classes = [IsAuthenticated]
+    # equipment_name and technician_name are part of the representation.
+    conditional_related_fields = ('equipment__modified', 'technician__updated_at')
 
     def get_queryset(self):
         """
@@ -1416,10 +1943,17 @@ class MaintenanceScheduleListCreateView(generics.ListCreateAPIView):
         if getattr(self, 'swagger_fake_view', False) or not self.request.user.is_authenticated:
             return MaintenanceSchedule.objects.none()
         user = self.request.user
+        # Only the joined names MaintenanceScheduleReadSerializer renders are loaded.
+        queryset = MaintenanceSchedule.objects.select_related('equipment', 'technician').only(
+            'id', 'created', 'modified', 'activity_type', 'for_all_equipment', 'title', 'description',
+            'start_date', 'end_date', 'frequency', 'interval', 'recurring_end', 'last_notification',
+            'next_occurrence', 'equipment', 'equipment__name', 'technician', 'technician__first_name',
+            'technician__last_name',
+        )
         if IsAdminOrSuperAdmin().has_permission(self.request, self):
-            return MaintenanceSchedule.objects.all()
+            return queryset
         else:
-            return MaintenanceSchedule.objects.filter(Q(technician=user) | Q(for_all_equipment=True))
+            return queryset.filter(Q(technician=user) | Q(for_all_equipment=True))
 
     def get_serializer_class(self):
         method = getattr(self.request, 'method', None)
@@ -1487,12 +2021,14 @@ class MaintenanceScheduleListCreateView(generics.ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 
-class MaintenanceScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class MaintenanceScheduleDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete a maintenance schedule.
     """
     lookup_field = 'pk'
     permission_classes = [IsAuthenticated]
+    # equipment_name and technician_name are part of the representation.
+    conditional_related_fields = ('equipment__modified', 'technician__updated_at')
 
     def get_queryset(self):
         """
@@ -1501,10 +2037,11 @@ class MaintenanceScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
         if getattr(self, 'swagger_fake_view', False) or not self.request.user.is_authenticated:
             return MaintenanceSchedule.objects.none()
         user = self.request.user
+        queryset = MaintenanceSchedule.objects.select_related('equipment', 'technician')
         if IsAdminOrSuperAdmin().has_permission(self.request, self):
-            return MaintenanceSchedule.objects.all()
+            return queryset
         else:
-            return MaintenanceSchedule.objects.filter(Q(technician=user) | Q(for_all_equipment=True))
+            return queryset.filter(Q(technician=user) | Q(for_all_equipment=True))
 
     def get_serializer_class(self):
         method = getattr(self.request, 'method', None)
@@ -1684,7 +2221,112 @@ def deactivate_schedule(request, pk):
     return Response({'detail': 'Schedule deactivated.'}, status=status.HTTP_200_OK)
 
 
+EXPORT_FORMAT_PARAMETER = OpenApiParameter(
+    name="export_format",
+    location=OpenApiParameter.QUERY,
+    description="'csv' (default) or 'ndjson'.",
+    type=str,
+    required=False
+)
 
+EXPORT_RESPONSES = {
+    (200, 'text/csv'): OpenApiResponse(response=OpenApiTypes.STR, description="CSV file with a header row."),
+    (200, 'application/x-ndjson'): OpenApiResponse(response=OpenApiTypes.STR, description="One JSON object per line."),
+    400: OpenApiResponse(
+        description="Unsupported export format.",
+        examples=[OpenApiExample(
+            "Bad Format",
+            value={"detail": "Unsupported export format 'xml'. Use one of: csv, ndjson."},
+            response_only=True
+        )]
+    ),
+    401: OpenApiResponse(
+        description="Unauthorized access.",
+        examples=[OpenApiExample(
+            "Unauthorized",
+            value={"detail": "Authentication credentials were not provided."},
+            response_only=True
+        )]
+    ),
+}
+
+
+EXPORT_STREAMING_NOTE = (
+    "Rows are read from the database in chunks and written out as they arrive, "
+    "so the export size is not limited by server memory."
+)
 
+class BaseExportView(APIView):
+    """
+    Shared GET handler for the streaming export endpoints (see EXPORT_STREAMING_NOTE).
+    """
+    permission_classes = [IsAuthenticated]
+    export_name = None
 
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return stream_export(self.export_name, export_format, user=request.user)
 
+
+class EquipmentExportView(BaseExportView):
+    """
+    Stream all equipment records as CSV or NDJSON.
+    """
+    export_name = 'equipment'
+
+    @extend_schema(
+        summary="Export Equipment",
+        description=(
+            "Download all equipment records as a streamed file. " + EXPORT_STREAMING_NOTE
+        ),
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses=EXPORT_RESPONSES,
+        tags=["Equipment"]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class MaintenanceActivityExportView(BaseExportView):
+    """
+    Stream all maintenance reports, with equipment and technician names, as CSV or NDJSON.
+    """
+    export_name = 'maintenance-reports'
+
+    @extend_schema(
+        summary="Export Maintenance Reports",
+        description=(
+            "Download all maintenance reports, with equipment and technician names, as a streamed file. "
+            + EXPORT_STREAMING_NOTE
+        ),
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses=EXPORT_RESPONSES,
+        tags=["Maintenance Reports"]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class MaintenanceScheduleExportView(BaseExportView):
+    """
+    Stream the maintenance schedules visible to the user, with equipment and technician names, as CSV or NDJSON.
+    """
+    export_name = 'maintenance-schedules'
+
+    @extend_schema(
+        summary="Export Maintenance Schedules",
+        description=(
+            "Download the maintenance schedules visible to you (all of them for admins), with equipment and "
+            "technician names, as a streamed file. " + EXPORT_STREAMING_NOTE
+        ),
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses=EXPORT_RESPONSES,
+        tags=["Maintenance Schedules"]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Item
+from django.db import transaction
+from .models import Item, StockMovement
+from .stock import set_quantity
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
@@ -21,3 +23,31 @@ class ItemAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        """
+        Route quantity changes through the stock movement ledger.
+        """
+        if not change:
+            return super().save_model(request, obj, form, change)
+        with transaction.atomic():
+            changed = [field for field in form.changed_data if field != 'quantity']
+            if changed:
+                obj.save(update_fields=changed)
+            if 'quantity' in form.changed_data:
+                set_quantity(obj.pk, obj.quantity, user=request.user)
+
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('item', 'delta', 'quantity_after', 'reason', 'performed_by', 'created')
+    list_filter = ('reason',)
+    search_fields = ('item__name', 'item__item_code', 'note')
+    list_select_related = ('item', 'performed_by')
+
+    # The ledger is written by inventory.stock only; entries are never edited.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
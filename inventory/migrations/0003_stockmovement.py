@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:45
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    Item = apps.get_model('inventory', 'Item')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(item_id=item_id, delta=quantity, quantity_after=quantity, reason='opening')
+            for item_id, quantity in Item.objects.filter(quantity__gt=0).values_list('id', 'quantity').iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_alter_item_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('delta', models.IntegerField()),
+                ('quantity_after', models.PositiveIntegerField()),
+                ('reason', models.CharField(choices=[('opening', 'Opening Balance'), ('received', 'Received'), ('issued', 'Issued'), ('returned', 'Returned'), ('damaged', 'Damaged / Expired'), ('correction', 'Stock Count Correction')], max_length=20)),
+                ('note', models.TextField(blank=True, default='')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.item')),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', '-created'], name='inventory_s_item_id_4f59a2_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-17 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('quantity__lte', 5)), fields=['quantity'], name='inventory_item_low_stock_idx'),
+        ),
+    ]
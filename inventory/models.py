@@ -1,6 +1,60 @@
+from django.contrib.auth import get_user_model
 from django.db import models
 from model_utils.models import TimeStampedModel
 
+User = get_user_model()
+
+# Module level so Item.Meta's partial index can use it too.
+LOW_STOCK_THRESHOLD = 5
+
+
+class ItemQuerySet(models.QuerySet):
+
+    def with_stock_status(self):
+        """
+        Annotate `stock_label`, with the same labels as
+        Item.stock_status_for(), and `stock_rank` (0 in stock, 1 low,
+        2 out of stock) in SQL, so the stock level can be filtered on and
+        sorted by severity rather than alphabetically.
+        """
+        return self.annotate(
+            stock_label=models.Case(
+                models.When(quantity=0, then=models.Value("Out of Stock")),
+                models.When(quantity__lte=Item.LOW_STOCK_THRESHOLD, then=models.Value("Low Stock")),
+                default=models.Value("In Stock"),
+                output_field=models.CharField()
+            ),
+            stock_rank=models.Case(
+                models.When(quantity=0, then=models.Value(2)),
+                models.When(quantity__lte=Item.LOW_STOCK_THRESHOLD, then=models.Value(1)),
+                default=models.Value(0),
+                output_field=models.IntegerField()
+            ),
+        )
+
+    def with_stock_level(self, *levels):
+        """
+        Items in any of the given levels ('in_stock', 'low_stock',
+        'out_of_stock'). Adjacent levels are merged into a single quantity
+        range, so e.g. low + out of stock is `quantity <= 5` and can be
+        served by the low-stock partial index.
+        """
+        ranges = []
+        for low, high in sorted(Item.STOCK_LEVEL_RANGES[level] for level in set(levels)):
+            if ranges and ranges[-1][1] is not None and low == ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], high)
+            else:
+                ranges.append((low, high))
+
+        condition = models.Q(pk__in=[])
+        for low, high in ranges:
+            bounds = {'quantity__gte': low} if low else {}
+            if high is not None:
+                bounds['quantity__lte'] = high
+            if not bounds:
+                return self.all()
+            condition |= models.Q(**bounds)
+        return self.filter(condition)
 
 
 class Item(TimeStampedModel):
@@ -21,16 +75,81 @@ class Item(TimeStampedModel):
     quantity = models.PositiveIntegerField(default=0)
     location = models.CharField(max_length=255)
 
+    LOW_STOCK_THRESHOLD = LOW_STOCK_THRESHOLD
+    # Inclusive quantity range of each stock level; None means unbounded.
+    STOCK_LEVEL_RANGES = {
+        'out_of_stock': (0, 0),
+        'low_stock': (1, LOW_STOCK_THRESHOLD),
+        'in_stock': (LOW_STOCK_THRESHOLD + 1, None),
+    }
+
+    objects = ItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Only the few items at or below LOW_STOCK_THRESHOLD are indexed, so
+            # the low/out-of-stock views are a scan of a small index.
+            models.Index(
+                fields=['quantity'],
+                condition=models.Q(quantity__lte=LOW_STOCK_THRESHOLD),
+                name='inventory_item_low_stock_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name}"
 
-    @property
-    def stock_status(self):
-        if self.quantity == 0:
+    @classmethod
+    def stock_status_for(cls, quantity):
+        if quantity == 0:
             return "Out of Stock"
-        elif self.quantity <= 5:
+        elif quantity <= cls.LOW_STOCK_THRESHOLD:
             return "Low Stock"
         else:
             return "In Stock"
 
+    @property
+    def stock_status(self):
+        return self.stock_status_for(self.quantity)
+
+
+class StockMovement(TimeStampedModel):
+    """
+    One change to an Item's quantity. Quantities are changed with atomic
+    F() updates by inventory.stock, which records a movement for each, so the
+    ledger explains how every item reached its current stock.
+    """
+    REASON_CHOICES = [
+        ('opening', 'Opening Balance'),
+        ('received', 'Received'),
+        ('issued', 'Issued'),
+        ('returned', 'Returned'),
+        ('damaged', 'Damaged / Expired'),
+        ('correction', 'Stock Count Correction'),
+    ]
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='movements'
+    )
+    delta = models.IntegerField()
+    quantity_after = models.PositiveIntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    note = models.TextField(blank=True, default='')
+    performed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', '-created']),
+        ]
+
+    def __str__(self):
+        return f"{self.item} {self.delta:+d} ({self.reason})"
+
 
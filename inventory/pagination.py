@@ -0,0 +1,12 @@
+from core.pagination import KeysetCursorPagination
+
+
+class StockMovementCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination for an item's stock movements, newest first, served
+    from the (item, -created) index.
+    """
+    ordering = ('-created', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
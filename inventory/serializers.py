@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Item
+from .models import Item, StockMovement
+from .stock import set_quantity
 
 class ItemReadSerializer(serializers.ModelSerializer):
     """
@@ -15,11 +17,9 @@ class ItemReadSerializer(serializers.ModelSerializer):
             'stock_status', 'created', 'modified'
         ]
 
-    def get_stock_status(self, obj):
-        """
-        Returns the stock status based on current stock.
-        """
-        return obj.stock_status
+    def get_stock_status(self, obj) -> str:
+        # List querysets carry the label from ItemQuerySet.with_stock_status().
+        return getattr(obj, 'stock_label', None) or obj.stock_status
 
 
 class ItemWriteSerializer(serializers.ModelSerializer):
@@ -50,11 +50,76 @@ class ItemWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Item code already exists.")
         return value
 
+    def get_user(self):
+        request = self.context.get('request')
+        return getattr(request, 'user', None)
+
     def create(self, validated_data):
         return Item.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        """
+        Save only the submitted fields. A new quantity is applied as a stock
+        count correction through the movement ledger rather than written over
+        whatever concurrent adjustments have done meanwhile.
+        """
+        quantity = validated_data.pop('quantity', None)
+        with transaction.atomic():
+            if validated_data:
+                for attr, value in validated_data.items():
+                    setattr(instance, attr, value)
+                instance.save(update_fields=list(validated_data))
+            if quantity is not None:
+                movement = set_quantity(instance.pk, quantity, user=self.get_user())
+                instance.quantity = quantity
+                instance._loaded_quantity = quantity
+                if movement is not None:
+                    instance.modified = movement.item.modified
         return instance
+
+
+class StockMovementReadSerializer(serializers.ModelSerializer):
+    """
+    Serializer for reading StockMovement instances.
+    """
+    performed_by_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = StockMovement
+        fields = [
+            'id', 'item', 'delta', 'quantity_after', 'reason', 'note',
+            'performed_by', 'performed_by_name', 'created'
+        ]
+
+    def get_performed_by_name(self, obj) -> str:
+        return obj.performed_by.get_full_name() if obj.performed_by else ''
+
+
+class StockAdjustmentSerializer(serializers.Serializer):
+    """
+    One stock movement: a signed change to the quantity of an item.
+    """
+    delta = serializers.IntegerField()
+    reason = serializers.ChoiceField(choices=StockMovement.REASON_CHOICES)
+    note = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_delta(self, value):
+        if value == 0:
+            raise serializers.ValidationError("The change in quantity cannot be zero.")
+        return value
+
+    def validate_reason(self, value):
+        if value == 'opening':
+            raise serializers.ValidationError("Opening balances are recorded when an item is created.")
+        return value
+
+
+class BatchStockAdjustmentItemSerializer(StockAdjustmentSerializer):
+    item = serializers.IntegerField(min_value=1)
+
+
+class BatchStockAdjustmentSerializer(serializers.Serializer):
+    """
+    Several stock movements, applied together or not at all.
+    """
+    adjustments = BatchStockAdjustmentItemSerializer(many=True, allow_empty=False, max_length=500)
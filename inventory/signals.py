@@ -1,55 +1,42 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save
 from django.dispatch import receiver
-from django.urls import reverse
 from .models import Item
-from notification.models import Notification
-from accounts.models import CustomUser
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .stock import crossed_stock_status, queue_stock_alert, record_opening_balance
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@receiver(post_init, sender=Item)
+def remember_loaded_quantity(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred quantity isn't fetched just for this.
+    instance._loaded_quantity = instance.__dict__.get('quantity')
+
+
 @receiver(post_save, sender=Item)
-def notify_low_or_out_of_stock(sender, instance, created, **kwargs):
+def record_initial_stock(sender, instance, created, **kwargs):
     """
-    Create a notification if the item is low/out of stock.
+    Start each new item's stock movement ledger with its initial quantity.
     """
-    # Determine if it's low stock or out of stock
-    if instance.quantity == 0:
-        status_msg = "Out of Stock"
-    elif instance.quantity <= 5:
-        status_msg = "Low Stock"
-    else:
-        return  # If it's neither out nor low, do nothing
-
-    # Build the notification message
-    message = f"Inventory Alert: '{instance.name}' ({instance.item_code}) is {status_msg}."
-
-    # Fetch all ADMIN or SUPERADMIN users
-    admin_users = CustomUser.objects.filter(
-        user_role__in=[
-            CustomUser.UserRole.ADMIN,
-            CustomUser.UserRole.SUPERADMIN
-        ]
-    )
-
-    # Create a notification & optionally broadcast via WebSockets
-    for admin_user in admin_users:
-        notification = Notification.objects.create(
-            user=admin_user,
-            message=message,
-            link=reverse('item-detail', kwargs={'pk': instance.pk}),  # adapt your URL name
-        )
-        try:
-            channel_layer = get_channel_layer()
-            group_name = f"notification_user_{admin_user.id}"
-            event = {
-                "type": "notification.message",  # Must match the consumer's method name
-                "message": message,
-                "link": notification.link,
-            }
-            async_to_sync(channel_layer.group_send)(group_name, event)
-        except Exception as e:
-            logger.error(f"Failed to send real-time notification: {e}")
+    if created:
+        record_opening_balance(instance)
+
+
+@receiver(post_save, sender=Item)
+def notify_low_or_out_of_stock(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Queue an admin notification when a save moves the item into Low or Out
+    of Stock (or creates it there).
+
+    The fan-out to every admin runs in Celery once the transaction commits,
+    so saving an Item costs the same whatever the number of admins. Saves
+    that leave the stock status unchanged don't alert again.
+    """
+    previous = None if created else instance._loaded_quantity
+    if update_fields is not None and 'quantity' not in update_fields:
+        return
+    instance._loaded_quantity = instance.quantity
+
+    status_msg = crossed_stock_status(previous, instance.quantity)
+    if status_msg:
+        queue_stock_alert(instance, status_msg)
@@ -0,0 +1,172 @@
+"""
+Stock changes for inventory Items.
+
+Every quantity change goes through apply_movements(): the new quantity is
+written with an `UPDATE ... SET quantity = quantity + delta WHERE quantity
+>= -delta`, so concurrent adjustments never lose updates or drive stock below
+zero, and each change is recorded as a StockMovement. A batch touching several
+items is applied in one transaction and fails as a whole.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard.models import AggregateCounter
+from dashboard.snapshot import invalidate_snapshot
+
+from .models import Item, StockMovement
+from .tasks import send_stock_alert
+
+logger = logging.getLogger(__name__)
+
+
+class StockAdjustmentError(Exception):
+    """
+    A batch of stock movements could not be applied; nothing was changed.
+    """
+    def __init__(self, message, item_id=None):
+        super().__init__(message)
+        self.item_id = item_id
+
+
+class UnknownItem(StockAdjustmentError):
+    pass
+
+
+class InsufficientStock(StockAdjustmentError):
+    pass
+
+
+def crossed_stock_status(old_quantity, new_quantity):
+    """
+    Return the Low/Out of Stock status `new_quantity` falls into if it
+    differs from the status of `old_quantity` (None if unknown), else None.
+    """
+    new_status = Item.stock_status_for(new_quantity)
+    if new_status == "In Stock":
+        return None
+    if old_quantity is not None and Item.stock_status_for(old_quantity) == new_status:
+        return None
+    return new_status
+
+
+def queue_stock_alert(item, status_msg):
+    """
+    Notify the admins about `item` once the current transaction commits.
+    """
+    message = f"Inventory Alert: '{item.name}' ({item.item_code}) is {status_msg}."
+    link = reverse('item-detail', kwargs={'pk': item.pk})
+    transaction.on_commit(lambda: send_stock_alert.delay(message, link))
+
+
+def _user_or_none(user):
+    return user if user is not None and user.is_authenticated else None
+
+
+def apply_movements(movements, user=None):
+    """
+    Apply a batch of movements, each a dict with `item_id`, `delta`, `reason`
+    and optionally `note`, and return the saved StockMovements in order.
+
+    Costs one UPDATE per distinct item plus three queries for the batch,
+    however many movements it holds. Raises UnknownItem or InsufficientStock
+    (rolling back the whole batch) if an item is missing or would go below
+    zero at any point, taking the movements in the order given.
+    """
+    movements = list(movements)
+    net = defaultdict(int)
+    for movement in movements:
+        net[movement['item_id']] += movement['delta']
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Items are updated in primary key order so concurrent batches lock rows in the same order.
+        for item_id in sorted(net):
+            updated = Item.objects.filter(pk=item_id, quantity__gte=-net[item_id]).update(
+                quantity=F('quantity') + net[item_id],
+                modified=now
+            )
+            if not updated:
+                if Item.objects.filter(pk=item_id).exists():
+                    raise InsufficientStock(f"Not enough stock of item {item_id} to remove {-net[item_id]}.", item_id)
+                raise UnknownItem(f"Item {item_id} does not exist.", item_id)
+
+        # The rows are locked by the UPDATEs above, so these are the quantities this batch produced.
+        items = Item.objects.in_bulk(list(net))
+        starting = {item_id: item.quantity - net[item_id] for item_id, item in items.items()}
+
+        # The net check above isn't enough: replayed in order, no movement may take an item below zero.
+        running = dict(starting)
+        quantities_after = []
+        for movement in movements:
+            item_id = movement['item_id']
+            running[item_id] += movement['delta']
+            if running[item_id] < 0:
+                raise InsufficientStock(
+                    f"Not enough stock of item {item_id} to remove {-movement['delta']}.", item_id
+                )
+            quantities_after.append(running[item_id])
+
+        performed_by = _user_or_none(user)
+        records = StockMovement.objects.bulk_create([
+            StockMovement(
+                item_id=movement['item_id'],
+                delta=movement['delta'],
+                quantity_after=quantity_after,
+                reason=movement['reason'],
+                note=movement.get('note') or '',
+                performed_by=performed_by
+            )
+            for movement, quantity_after in zip(movements, quantities_after)
+        ])
+        for record in records:
+            record.item = items[record.item_id]
+
+        # QuerySet.update() sends no post_save, so the dashboard bookkeeping happens here.
+        AggregateCounter.add({'inventory:stock': sum(net.values())})
+        invalidate_snapshot()
+
+        for item_id, item in items.items():
+            status_msg = crossed_stock_status(starting[item_id], item.quantity)
+            if status_msg:
+                queue_stock_alert(item, status_msg)
+
+    logger.info(f"Applied {len(records)} stock movements to {len(net)} items.")
+    return records
+
+
+def set_quantity(item_id, quantity, user=None, reason='correction', note=''):
+    """
+    Set an item's stock to an absolute `quantity` (e.g. after a stock count),
+    recording the difference as a movement. Returns the movement, or None if
+    the quantity was already right.
+    """
+    with transaction.atomic():
+        current = Item.objects.select_for_update().filter(pk=item_id).values_list('quantity', flat=True).first()
+        if current is None:
+            raise UnknownItem(f"Item {item_id} does not exist.", item_id)
+        if current == quantity:
+            return None
+        return apply_movements(
+            [{'item_id': item_id, 'delta': quantity - current, 'reason': reason, 'note': note}],
+            user=user
+        )[0]
+
+
+def record_opening_balance(item, user=None):
+    """
+    Record a new item's initial quantity in the ledger.
+    """
+    if not item.quantity:
+        return None
+    return StockMovement.objects.create(
+        item=item,
+        delta=item.quantity,
+        quantity_after=item.quantity,
+        reason='opening',
+        performed_by=_user_or_none(user)
+    )
@@ -0,0 +1,25 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from accounts.models import CustomUser
+from notification.utils import notify_users
+
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def send_stock_alert(message, link):
+    """
+    Notify every Admin and Superadmin about a low/out-of-stock item.
+    """
+    admin_ids = CustomUser.objects.filter(
+        user_role__in=[
+            CustomUser.UserRole.ADMIN,
+            CustomUser.UserRole.SUPERADMIN
+        ]
+    ).values_list('id', flat=True)
+
+    notifications = notify_users(admin_ids, message, link)
+    logger.info(f"Stock alert sent to {len(notifications)} admins: {message}")
+    return len(notifications)
@@ -1,3 +1,212 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from accounts.models import CustomUser
+from dashboard.models import AggregateCounter
+from notification.models import Notification
+from .models import Item, StockMovement
+from .stock import InsufficientStock, apply_movements
+from .tasks import send_stock_alert
+from .views import ItemListCreateView, ItemOrderingFilter
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class StockAlertFanOutTests(TestCase):
+
+    def setUp(self):
+        for n in range(10):
+            CustomUser.objects.create_user(
+                email=f'admin{n}@example.com', first_name='Admin', user_role=CustomUser.UserRole.ADMIN
+            )
+        CustomUser.objects.create_user(email='tech@example.com', first_name='Tech')
+
+    @mock.patch('inventory.stock.send_stock_alert.delay')
+    def test_saving_item_only_queues_alert(self, delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                Item.objects.create(name='Gloves', item_code='GLV-1', category='consumable', quantity=2, location='Store')
+
+        # The INSERT, the opening stock movement and one counter UPDATE; nothing per admin.
+        self.assertEqual(len(ctx.captured_queries), 3)
+        delay.assert_called_once()
+        self.assertIn("Low Stock", delay.call_args.args[0])
+
+    def test_alert_bulk_creates_one_notification_per_admin(self):
+        with CaptureQueriesContext(connection) as ctx:
+            sent = send_stock_alert("Inventory Alert: 'Gloves' (GLV-1) is Low Stock.", '/api/inventory-items/1/')
+
+        self.assertEqual(sent, 10)
+        self.assertEqual(Notification.objects.count(), 10)
+        self.assertEqual(len(ctx.captured_queries), 2)  # admin lookup + one bulk INSERT
+
+
+class ItemConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='store@example.com', first_name='Sam')
+        self.client.force_authenticate(user=self.user)
+        self.item = Item.objects.create(name='Lamp', item_code='L-1', category='replacement', quantity=10, location='Store')
+
+    def test_item_list_revalidates_until_an_item_changes(self):
+        url = reverse('item-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.item.quantity = 9
+        self.item.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@mock.patch('inventory.stock.send_stock_alert.delay')
+class StockMovementTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='store@example.com', first_name='Sam')
+        self.client.force_authenticate(user=self.user)
+        self.gloves = Item.objects.create(name='Gloves', item_code='GLV-1', category='consumable', quantity=20, location='Store')
+        self.masks = Item.objects.create(name='Masks', item_code='MSK-1', category='consumable', quantity=8, location='Store')
+
+    def adjust(self, item, delta, reason='issued'):
+        return self.client.post(
+            reverse('item-stock-adjust', kwargs={'pk': item.pk}), {'delta': delta, 'reason': reason}, format='json'
+        )
+
+    def test_adjustments_apply_on_top_of_the_current_quantity(self, delay):
+        stale = Item.objects.get(pk=self.gloves.pk)
+        self.adjust(self.gloves, -3)
+        # A second writer holding an older copy still can't overwrite the first change.
+        apply_movements([{'item_id': stale.pk, 'delta': -4, 'reason': 'issued'}])
+
+        self.gloves.refresh_from_db()
+        self.assertEqual(self.gloves.quantity, 13)
+        self.assertEqual(
+            list(self.gloves.movements.order_by('id').values_list('delta', 'quantity_after')),
+            [(20, 20), (-3, 17), (-4, 13)]
+        )
+        self.assertEqual(AggregateCounter.get_value('inventory:stock'), 13 + 8)
+
+    def test_stock_cannot_go_negative(self, delay):
+        response = self.adjust(self.masks, -9)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Item.objects.get(pk=self.masks.pk).quantity, 8)
+        self.assertEqual(self.adjust(self.masks, 0).status_code, 400)
+        self.assertEqual(self.client.post(
+            reverse('item-stock-adjust', kwargs={'pk': 999}), {'delta': 1, 'reason': 'received'}, format='json'
+        ).status_code, 404)
+
+    def test_batch_is_all_or_nothing(self, delay):
+        url = reverse('item-stock-batch-adjust')
+        adjustments = [
+            {'item': self.gloves.pk, 'delta': -5, 'reason': 'issued'},
+            {'item': self.masks.pk, 'delta': 2, 'reason': 'returned'},
+            {'item': self.gloves.pk, 'delta': -1, 'reason': 'damaged', 'note': 'torn'},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {'adjustments': adjustments}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['quantity_after'] for row in response.data['movements']], [15, 10, 14])
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+
+        response = self.client.post(url, {'adjustments': [
+            {'item': self.gloves.pk, 'delta': -1, 'reason': 'issued'},
+            {'item': self.masks.pk, 'delta': -50, 'reason': 'issued'},
+        ]}, format='json')
+        self.assertEqual((response.status_code, response.data['item']), (400, self.masks.pk))
+        self.assertEqual(Item.objects.get(pk=self.gloves.pk).quantity, 14)
+        self.assertEqual(StockMovement.objects.count(), 5)  # two opening balances + three movements
+
+    def test_batch_cannot_dip_below_zero_midway(self, delay):
+        url = reverse('item-stock-batch-adjust')
+        # Ends at +2 overall, but the first movement would take the masks to -2.
+        response = self.client.post(url, {'adjustments': [
+            {'item': self.masks.pk, 'delta': -10, 'reason': 'issued'},
+            {'item': self.masks.pk, 'delta': 12, 'reason': 'received'},
+        ]}, format='json')
+        self.assertEqual((response.status_code, response.data['item']), (400, self.masks.pk))
+        self.assertEqual(Item.objects.get(pk=self.masks.pk).quantity, 8)
+        self.assertEqual(StockMovement.objects.count(), 2)  # the opening balances only
+
+        # The same movements received first are fine.
+        response = self.client.post(url, {'adjustments': [
+            {'item': self.masks.pk, 'delta': 12, 'reason': 'received'},
+            {'item': self.masks.pk, 'delta': -10, 'reason': 'issued'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['quantity_after'] for row in response.data['movements']], [20, 10])
+
+    def test_alerts_fire_only_when_a_threshold_is_crossed(self, delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.adjust(self.masks, -2)   # 8 -> 6, still in stock
+            self.adjust(self.masks, -2)   # 6 -> 4, crosses into low stock
+            self.adjust(self.masks, -1)   # 4 -> 3, already low
+            self.adjust(self.masks, -3)   # 3 -> 0, out of stock
+        self.assertEqual(
+            [call.args[0].rsplit(' is ', 1)[1] for call in delay.call_args_list],
+            ['Low Stock.', 'Out of Stock.']
+        )
+        with self.assertRaises(InsufficientStock):
+            apply_movements([{'item_id': self.masks.pk, 'delta': -1, 'reason': 'issued'}])
+
+    def test_item_update_records_quantity_as_a_correction(self, delay):
+        url = reverse('item-detail', kwargs={'pk': self.gloves.pk})
+        response = self.client.patch(url, {'quantity': 25, 'location': 'Ward 3'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        movement = self.gloves.movements.latest('id')
+        self.assertEqual((movement.delta, movement.reason, movement.performed_by), (5, 'correction', self.user))
+        self.gloves.refresh_from_db()
+        self.assertEqual((self.gloves.quantity, self.gloves.location), (25, 'Ward 3'))
+
+        response = self.client.get(reverse('item-stock-movements', kwargs={'pk': self.gloves.pk}))
+        self.assertEqual([row['reason'] for row in response.data['results']], ['correction', 'opening'])
+
+
+class ItemStockStatusFilterTests(APITestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='store@example.com', first_name='Sam')
+        self.client.force_authenticate(user=self.user)
+        for code, quantity in [('A', 0), ('B', 3), ('C', 5), ('D', 6), ('E', 40)]:
+            Item.objects.create(name=f'Part {code}', item_code=code, category='replacement', quantity=quantity, location='Store')
+
+    def codes(self, params):
+        response = self.client.get(reverse('item-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['item_code'] for row in response.data]
+
+    def test_annotation_matches_the_model_property(self):
+        for item in Item.objects.with_stock_status():
+            self.assertEqual(item.stock_label, item.stock_status)
+        self.assertEqual(
+            Item.objects.with_stock_status().filter(stock_label="Low Stock").count(),
+            Item.objects.with_stock_level('low_stock').count()
+        )
+
+    def test_filter_by_stock_status(self):
+        self.assertEqual(sorted(self.codes({'stock_status': 'low_stock'})), ['B', 'C'])
+        self.assertEqual(sorted(self.codes({'stock_status': ['low_stock', 'out_of_stock']})), ['A', 'B', 'C'])
+        self.assertEqual(sorted(self.codes({'stock_status': ['in_stock', 'out_of_stock']})), ['A', 'D', 'E'])
+        self.assertEqual(len(self.codes({'stock_status': ['in_stock', 'low_stock', 'out_of_stock']})), 5)
+        self.assertEqual(self.client.get(reverse('item-list'), {'stock_status': 'plenty'}).status_code, 400)
+
+    def test_order_by_stock_status(self):
+        codes = self.codes({'ordering': '-stock_status,quantity'})
+        self.assertEqual(codes, ['A', 'B', 'C', 'D', 'E'])
+        self.assertEqual(self.codes({'ordering': 'stock_status,-quantity'}), ['E', 'D', 'C', 'B', 'A'])
+
+    def test_stock_status_sorts_by_rank_not_label(self):
+        # Labels happen to sort In < Low < Out too, so check what is ordered on.
+        request = Request(APIRequestFactory().get(reverse('item-list'), {'ordering': '-stock_status,name'}))
+        ordering = ItemOrderingFilter().get_ordering(request, Item.objects.with_stock_status(), ItemListCreateView())
+        self.assertEqual(ordering, ['-stock_rank', 'name'])
+
+    def test_low_stock_filter_uses_only_quantity_ranges(self):
+        sql = str(Item.objects.with_stock_level('low_stock', 'out_of_stock').query)
+        self.assertNotIn('CASE', sql)
+        self.assertIn('"quantity" <= 5', sql)
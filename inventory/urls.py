@@ -5,6 +5,9 @@ urlpatterns = [
     # Item Endpoints
     path('inventory-items/', views.ItemListCreateView.as_view(), name='item-list'),
     path('inventory-items/<int:pk>/', views.ItemDetailView.as_view(), name='item-detail'),
+    path('inventory-items/adjust/', views.ItemStockBatchAdjustView.as_view(), name='item-stock-batch-adjust'),
+    path('inventory-items/<int:pk>/adjust/', views.ItemStockAdjustView.as_view(), name='item-stock-adjust'),
+    path('inventory-items/<int:pk>/movements/', views.ItemStockMovementListView.as_view(), name='item-stock-movements'),
     
     path('inventory/total/', views.TotalInventoryView.as_view(), name='total-inventory'),
 
@@ -1,23 +1,29 @@
 # inventory/views.py
 
 import logging
-from django.db.models import F, Value, CharField, Case, When, Sum
+from django.db.models import F, Value, CharField, Case, When
 from rest_framework import generics, filters, status
+from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django_filters.rest_framework import DjangoFilterBackend, CharFilter, FilterSet
+from django_filters.rest_framework import DjangoFilterBackend, CharFilter, FilterSet, MultipleChoiceFilter
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
-from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiResponse, OpenApiExample, OpenApiParameter
 
 
 
 # Local imports
 from accounts.permissions import IsAdminOrSuperAdmin
-from .models import Item
+from core.mixins import ConditionalGetMixin
+from dashboard.models import AggregateCounter
+from .models import Item, StockMovement
+from .pagination import StockMovementCursorPagination
 from .serializers import (
-    ItemReadSerializer, ItemWriteSerializer,
+    ItemReadSerializer, ItemWriteSerializer, StockMovementReadSerializer,
+    StockAdjustmentSerializer, BatchStockAdjustmentSerializer,
 )
+from .stock import InsufficientStock, UnknownItem, apply_movements
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -27,13 +33,56 @@ logger = logging.getLogger(__name__)
 
 
 
-class ItemListCreateView(generics.ListCreateAPIView):
+class ItemFilter(FilterSet):
+    """
+    Filters for the inventory item list.
+    """
+    stock_status = MultipleChoiceFilter(
+        choices=[
+            ('in_stock', 'In Stock'),
+            ('low_stock', 'Low Stock'),
+            ('out_of_stock', 'Out of Stock'),
+        ],
+        method='filter_stock_status',
+        help_text="Repeat to match several levels, e.g. ?stock_status=low_stock&stock_status=out_of_stock."
+    )
+    location = CharFilter(lookup_expr='icontains')
+
+    class Meta:
+        model = Item
+        fields = ['category', 'location', 'stock_status']
+
+    def filter_stock_status(self, queryset, name, value):
+        return queryset.with_stock_level(*value) if value else queryset
+
+
+class ItemOrderingFilter(OrderingFilter):
+    """
+    `?ordering=stock_status` sorts by the `stock_rank` annotation, so items
+    run In < Low < Out of Stock by severity instead of by label.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            f"{'-' if term.startswith('-') else ''}stock_rank" if term.lstrip('-') == 'stock_status' else term
+            for term in ordering
+        ]
+
+
+class ItemListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     Retrieve a list of items or create a new item.
     Supports filtering, search, and sorting.
     """
     permission_classes = [IsAuthenticated]
-    queryset = Item.objects.all()
+    queryset = Item.objects.with_stock_status()
+    filter_backends = [DjangoFilterBackend, ItemOrderingFilter, SearchFilter]
+    filterset_class = ItemFilter
+    search_fields = ['name', 'item_code']
+    ordering_fields = ['name', 'item_code', 'category', 'quantity', 'stock_status', 'created', 'modified']
 
     def get_serializer_class(self):
         method = getattr(self.request, 'method', None)
@@ -43,7 +92,12 @@ class ItemListCreateView(generics.ListCreateAPIView):
 
     @extend_schema(
         summary="List Inventory Items",
-        description="Retrieve a list of items.",
+        description=(
+            "Retrieve a list of items. Filter with '?stock_status=low_stock' (repeatable; also "
+            "'in_stock' and 'out_of_stock'), '?category=' or '?location=', search names and codes "
+            "with '?search=', and sort with '?ordering=' on name, item_code, category, quantity, "
+            "stock_status, created or modified (prefix '-' for descending)."
+        ),
         responses={
             200: OpenApiResponse(
                 description="List of items retrieved successfully.",
@@ -85,7 +139,7 @@ class ItemListCreateView(generics.ListCreateAPIView):
         return response
 
 
-class ItemDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ItemDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete an item instance.
     """
@@ -210,6 +264,125 @@ class ItemDetailView(generics.RetrieveUpdateDestroyAPIView):
         return response
 
 
+STOCK_ADJUSTMENT_RESPONSE = inline_serializer(
+    name='StockAdjustmentResult',
+    fields={'item': ItemReadSerializer(), 'movement': StockMovementReadSerializer()}
+)
+
+
+class ItemStockAdjustView(generics.GenericAPIView):
+    """
+    Add or remove stock of one item, recording the movement.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockAdjustmentSerializer
+    queryset = Item.objects.all()
+
+    @extend_schema(
+        summary="Adjust Item Stock",
+        description=(
+            "Change an item's quantity by 'delta' (negative to remove stock). The change is applied "
+            "atomically on top of the current quantity, so concurrent adjustments are never lost, "
+            "and is recorded in the item's stock movement ledger. Removing more than is in stock fails."
+        ),
+        request=StockAdjustmentSerializer,
+        responses={
+            200: OpenApiResponse(description="Stock adjusted.", response=STOCK_ADJUSTMENT_RESPONSE),
+            400: OpenApiResponse(
+                description="Invalid data, or not enough stock.",
+                examples=[OpenApiExample(
+                    "Insufficient Stock",
+                    value={"detail": "Not enough stock of item 1 to remove 10."},
+                    response_only=True
+                )]
+            ),
+            404: OpenApiResponse(description="Item not found."),
+        },
+        tags=["Inventory"]
+    )
+    def post(self, request, pk):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            movement, = apply_movements([{'item_id': pk, **serializer.validated_data}], user=request.user)
+        except UnknownItem as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except InsufficientStock as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(
+            f"User {request.user.email} adjusted stock of '{movement.item.name}' by {movement.delta:+d} ({movement.reason})"
+        )
+        return Response({
+            "item": ItemReadSerializer(movement.item).data,
+            "movement": StockMovementReadSerializer(movement).data,
+        })
+
+
+class ItemStockBatchAdjustView(generics.GenericAPIView):
+    """
+    Apply several stock movements in one transaction.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchStockAdjustmentSerializer
+
+    @extend_schema(
+        summary="Adjust Stock of Several Items",
+        operation_id="inventory_items_batch_adjust",
+        description=(
+            "Apply a list of stock movements (e.g. everything issued for one job) in one transaction. "
+            "If any item is missing or would go below zero, nothing is changed."
+        ),
+        request=BatchStockAdjustmentSerializer,
+        responses={
+            200: OpenApiResponse(
+                description="All movements applied.",
+                response=inline_serializer(
+                    name='BatchStockAdjustmentResult',
+                    fields={'movements': StockMovementReadSerializer(many=True)}
+                )
+            ),
+            400: OpenApiResponse(description="Invalid data, unknown item or not enough stock; nothing was changed."),
+        },
+        tags=["Inventory"]
+    )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        adjustments = [
+            {'item_id': adjustment.pop('item'), **adjustment}
+            for adjustment in serializer.validated_data['adjustments']
+        ]
+        try:
+            movements = apply_movements(adjustments, user=request.user)
+        except (UnknownItem, InsufficientStock) as e:
+            return Response({"detail": str(e), "item": e.item_id}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"User {request.user.email} applied {len(movements)} stock movements.")
+        return Response({"movements": StockMovementReadSerializer(movements, many=True).data})
+
+
+class ItemStockMovementListView(generics.ListAPIView):
+    """
+    The stock movement ledger of one item, newest first.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockMovementReadSerializer
+    pagination_class = StockMovementCursorPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        return StockMovement.objects.filter(item_id=self.kwargs['pk']).select_related('performed_by')
+
+    @extend_schema(
+        summary="List Item Stock Movements",
+        description="Cursor-paginated stock movements of an item, newest first.",
+        responses={200: StockMovementReadSerializer(many=True)},
+        tags=["Inventory"]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class TotalInventoryView(APIView):
     """
@@ -262,8 +435,13 @@ class TotalInventoryView(APIView):
         tags=["Inventory"]
     )
     def get(self, request, format=None):
-        total_items = Item.objects.count()
-        total_stock = Item.objects.aggregate(total=Sum('quantity'))['total'] or 0
+        counters = dict(
+            AggregateCounter.objects
+            .filter(key__in=['inventory:total', 'inventory:stock'])
+            .values_list('key', 'value')
+        )
+        total_items = counters.get('inventory:total', 0)
+        total_stock = counters.get('inventory:stock', 0)
 
         return Response({
             "total_items": total_items,
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import json
+from django.conf import settings
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth.models import AnonymousUser
 
@@ -36,16 +38,98 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
 
-    async def notification_message(self, event):
+    def format_event(self, event):
         """
-        This method is called whenever a message is sent to this user's group.
+        Build the client-facing payload for a notification event.
         """
-        logger.debug(f"Sending message to {self.user.email}: {event}")
-        await self.send(text_data=json.dumps({
+        return {
             "title": event.get("title", ""),
             "message": event.get("message", ""),
             "link": event.get("link", ""),
-        }))
+        }
+
+    async def notification_message(self, event):
+        """
+        This method is called whenever a message is sent to this user's group.
+        """
+        logger.debug(f"Sending message to {self.user.email}: {event}")
+        await self.send(text_data=json.dumps(self.format_event(event)))
+
+    async def notification_unread_count(self, event):
+        """
+        Called when the user's unread notification count changes.
+        """
+        await self.send(text_data=json.dumps({"type": "unread_count", "unread_count": event["unread_count"]}))
+
+
+class BatchedNotificationConsumer(NotificationConsumer):
+    """
+    A NotificationConsumer that coalesces bursts of events into a single frame.
+
+    Events are buffered per connection and flushed as one JSON array once
+    NOTIFICATION_BATCH_WINDOW seconds have passed since the first buffered
+    event or NOTIFICATION_BATCH_SIZE events are waiting, whichever comes first.
+    Every event is delivered, even when several carry the same text; of
+    several unread-count updates only the latest is sent, after the batch.
+    Events still buffered when the client disconnects are dropped: the
+    socket is already closed by then, so they could not be delivered.
+    """
+
+    @property
+    def batch_window(self):
+        return getattr(settings, 'NOTIFICATION_BATCH_WINDOW', 0.25)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'NOTIFICATION_BATCH_SIZE', 20)
+
+    async def connect(self):
+        self._buffer = []
+        self._unread_count = None
+        self._flush_task = None
+        await super().connect()
+
+    async def disconnect(self, close_code):
+        try:
+            task, self._flush_task = getattr(self, '_flush_task', None), None
+            if task is not None:
+                task.cancel()
+            self._buffer, self._unread_count = [], None
+        finally:
+            await super().disconnect(close_code)
+
+    async def notification_message(self, event):
+        self._buffer.append(self.format_event(event))
+
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+    async def notification_unread_count(self, event):
+        self._unread_count = event["unread_count"]
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.batch_window)
+        await self.flush()
+
+    async def flush(self):
+        """
+        Send everything buffered so far as a single JSON array frame.
+        """
+        task, self._flush_task = self._flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            logger.debug(f"Sending {len(batch)} coalesced messages to {self.user.email}")
+            await self.send(text_data=json.dumps(batch))
+        if self._unread_count is not None:
+            count, self._unread_count = self._unread_count, None
+            await super().notification_unread_count({"unread_count": count})
 
 
  # async def receive(self, text_data=None, bytes_data=None):
@@ -1,7 +1,11 @@
 import logging
+import time
 import jwt
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import UntypedToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from urllib.parse import parse_qs
@@ -15,29 +19,79 @@ logger = logging.getLogger(__name__)  # ❶ Create logger
 
 User = get_user_model()
 
+# Authenticated users are kept in the shared cache under the token's jti, the
+# user id and a per-user version. Each entry expires together with its token;
+# saving or deleting a user bumps the version (see notification.signals), which
+# every process checks on lookup, so stale entries are never read again.
+USER_VERSION_KEY = 'ws-auth:user:{user_id}:version'
+
+
+def _user_cache_key(jti, user_id, version):
+    return f"ws-auth:{jti}:{user_id}:{version}"
+
+
+def _bump_user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), timeout=None)
+
+
+def invalidate_cached_user(user_id):
+    """
+    Mark every cached token entry belonging to `user_id` stale once the current
+    transaction commits.
+    """
+    transaction.on_commit(lambda: _bump_user_version(user_id))
+
+
 @database_sync_to_async
-def get_user_from_token(token):
+def load_user(user_id):
+    """
+    Load a lightweight snapshot of the user with only the columns consumers need.
+    """
+    try:
+        return User.objects.only(
+            'id', 'email', 'first_name', 'last_name', 'user_role', 'is_active', 'is_staff', 'is_superuser'
+        ).get(id=user_id)
+    except User.DoesNotExist:
+        return None
+
+
+async def get_user_from_token(token):
     """
     Given a verified token, return the corresponding user instance or None.
+
+    The token is validated every time; the user lookup is served from the
+    shared cache when the same token reconnects, so reconnect storms don't hit
+    the DB.
     """
     try:
-        UntypedToken(token)  # This will raise an error if the token is invalid
+        validated_token = UntypedToken(token)  # This will raise an error if the token is invalid
     except (InvalidToken, TokenError, jwt.DecodeError):
         logger.warning(f"JWT token is invalid {token}")  # ❷ Log bad token
         return None
 
-    # Decode does not do the same checks as UntypedToken, but we can still get user_id:
-    decoded_data = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-    user_id = decoded_data.get("user_id")
+    user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
     if not user_id:
         logger.debug("No user_id found")  # ❸ Additional log
         return None
 
-    try:
-        user = User.objects.get(id=user_id)
+    version = await cache.aget_or_set(
+        USER_VERSION_KEY.format(user_id=user_id), lambda: int(time.time()), timeout=None
+    )
+    cache_key = _user_cache_key(validated_token.get(jwt_settings.JTI_CLAIM) or token, user_id, version)
+    user = await cache.aget(cache_key)
+    if user:
         return user
-    except User.DoesNotExist:
-        return None
+
+    user = await load_user(user_id)
+    if user:
+        timeout = int(validated_token['exp'] - time.time())
+        if timeout > 0:
+            await cache.aset(cache_key, user, timeout=timeout)
+    return user
 
 class JWTAuthMiddleware(BaseMiddleware):
     """
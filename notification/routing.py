@@ -1,6 +1,7 @@
 from django.urls import re_path
-from .consumers import NotificationConsumer
+from .consumers import NotificationConsumer, BatchedNotificationConsumer
 
 websocket_urlpatterns = [
     re_path(r'wss/notifications/$', NotificationConsumer.as_asgi()),
+    re_path(r'wss/notifications/batched/$', BatchedNotificationConsumer.as_asgi()),
 ]
@@ -1,10 +1,15 @@
 
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from .middleware import invalidate_cached_user
 from .models import Notification
+from .utils import adjust_unread_counts
+
+User = get_user_model()
 
 @receiver(post_save, sender=Notification)
 def broadcast_notification(sender, instance, created, **kwargs):
@@ -28,3 +33,40 @@ def broadcast_notification(sender, instance, created, **kwargs):
     # Get channel layer and send the event
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(group_name, event)
+
+
+@receiver(post_init, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    instance._loaded_is_read = instance.__dict__.get('is_read')
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_count_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep the cached unread count in step with new notifications and
+    changes to is_read (e.g. PATCH {"is_read": true}).
+    """
+    if created:
+        delta = 0 if instance.is_read else 1
+    elif update_fields is not None and 'is_read' not in update_fields:
+        return
+    else:
+        previous = instance._loaded_is_read
+        delta = 0 if previous is None or previous == instance.is_read else (-1 if instance.is_read else 1)
+    instance._loaded_is_read = instance.is_read
+    adjust_unread_counts({instance.user_id: delta})
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_count_on_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_counts({instance.user_id: -1})
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_websocket_auth_cache(sender, instance, **kwargs):
+    """
+    Drop cached WebSocket authentication entries when a user changes.
+    """
+    invalidate_cached_user(instance.pk)
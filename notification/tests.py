@@ -93,3 +93,225 @@
 #             details="Created user1@example.com",
 #         )
 #         self.assertIn("Admin performed Create User on User1", str(log))
+
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from notification.consumers import NotificationConsumer, BatchedNotificationConsumer
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    NOTIFICATION_BATCH_WINDOW=0.05,
+    NOTIFICATION_BATCH_SIZE=20,
+)
+class BatchedNotificationConsumerTests(SimpleTestCase):
+    burst_size = 50
+
+    async def receive_frames(self, consumer_class):
+        communicator = WebsocketCommunicator(consumer_class.as_asgi(), "/wss/notifications/")
+        communicator.scope['user'] = SimpleNamespace(id=1, email='tech@example.com')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        channel_layer = get_channel_layer()
+        for n in range(self.burst_size):
+            await channel_layer.group_send("notification_user_1", {
+                "type": "notification.message",
+                "title": "New Notification",
+                "message": f"Event {n}",
+                "link": "",
+            })
+
+        frames = []
+        while True:
+            try:
+                frames.append(json.loads(await communicator.receive_from(timeout=0.3)))
+            except asyncio.TimeoutError:
+                break
+        await communicator.disconnect()
+        return frames
+
+    async def test_burst_is_coalesced_into_fewer_frames(self):
+        plain = await self.receive_frames(NotificationConsumer)
+        batched = await self.receive_frames(BatchedNotificationConsumer)
+
+        self.assertEqual(len(plain), self.burst_size)
+        self.assertLessEqual(len(batched), 3)
+        self.assertEqual(
+            [event["message"] for frame in batched for event in frame],
+            [f"Event {n}" for n in range(self.burst_size)]
+        )
+
+    async def test_distinct_events_with_the_same_text_are_all_sent(self):
+        communicator = WebsocketCommunicator(BatchedNotificationConsumer.as_asgi(), "/wss/notifications/")
+        communicator.scope['user'] = SimpleNamespace(id=1, email='tech@example.com')
+        await communicator.connect()
+
+        event = {"type": "notification.message", "title": "", "message": "Same", "link": ""}
+        channel_layer = get_channel_layer()
+        await channel_layer.group_send("notification_user_1", event)
+        await channel_layer.group_send("notification_user_1", event)
+
+        frame = json.loads(await communicator.receive_from(timeout=1))
+        self.assertEqual(frame, [{"title": "", "message": "Same", "link": ""}] * 2)
+        await communicator.disconnect()
+
+    @override_settings(NOTIFICATION_BATCH_WINDOW=0.3)
+    async def test_disconnect_cancels_the_window_and_leaves_the_group(self):
+        channel_layer = get_channel_layer()
+        members = set(channel_layer.groups.get("notification_user_1", {}))
+        communicator = WebsocketCommunicator(BatchedNotificationConsumer.as_asgi(), "/wss/notifications/")
+        communicator.scope['user'] = SimpleNamespace(id=1, email='tech@example.com')
+        await communicator.connect()
+
+        await channel_layer.group_send(
+            "notification_user_1", {"type": "notification.message", "title": "", "message": "Late", "link": ""}
+        )
+        self.assertTrue(await communicator.receive_nothing(timeout=0.05))
+        await communicator.disconnect()
+        await asyncio.sleep(0.4)
+
+        # The window's flush would have written to a closed socket.
+        self.assertTrue(communicator.output_queue.empty())
+        self.assertEqual(set(channel_layer.groups.get("notification_user_1", {})), members)
+
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import CustomUser
+from notification.middleware import USER_VERSION_KEY, get_user_from_token
+
+
+class JWTAuthCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def resolve(self, token):
+        with CaptureQueriesContext(connection) as ctx:
+            user = async_to_sync(get_user_from_token)(token)
+        return user, len(ctx.captured_queries)
+
+    def test_reconnects_are_served_from_cache(self):
+        first, first_queries = self.resolve(self.token)
+        again, again_queries = self.resolve(self.token)
+
+        self.assertEqual(first.pk, self.user.pk)
+        self.assertEqual(again.pk, self.user.pk)
+        self.assertEqual(first_queries, 1)
+        self.assertEqual(again_queries, 0)
+
+    def test_saving_user_invalidates_cache(self):
+        self.resolve(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Renamed'
+            self.user.save()
+
+        user, queries = self.resolve(self.token)
+        self.assertEqual(queries, 1)
+        self.assertEqual(user.first_name, 'Renamed')
+
+    def test_version_bumped_elsewhere_invalidates_cache(self):
+        # Another process saving the user only touches the shared cache.
+        self.resolve(self.token)
+        CustomUser.objects.filter(pk=self.user.pk).update(first_name='Renamed')
+        cache.incr(USER_VERSION_KEY.format(user_id=self.user.pk))
+
+        user, queries = self.resolve(self.token)
+        self.assertEqual(queries, 1)
+        self.assertEqual(user.first_name, 'Renamed')
+
+    def test_invalid_token_is_rejected(self):
+        self.assertEqual(self.resolve('not-a-token'), (None, 0))
+
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from notification.models import Notification
+from notification.utils import notify_users
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class UnreadNotificationCountTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='tech@example.com', first_name='Tess')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('notification-unread-count')
+
+    def unread_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertFalse([q for q in ctx.captured_queries if 'notification_notification' in q['sql']])
+        return response.data['unread_count']
+
+    def create(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=self.user, message='Hello', **kwargs)
+
+    def test_count_follows_creates_reads_and_mark_all(self):
+        first = self.create()
+        self.create()
+        self.create(is_read=True)
+        self.assertEqual(self.unread_count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('notification-detail', kwargs={'pk': first.pk}), {'is_read': True}, format='json')
+        self.assertEqual(self.unread_count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_users([self.user.pk], 'Stock alert')
+        self.assertEqual(self.unread_count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('mark-all-notifications-read'))
+        self.assertEqual(self.unread_count(), 0)
+
+    def test_cold_cache_counts_once(self):
+        Notification.objects.bulk_create([Notification(user=self.user, message='x') for _ in range(3)])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(self.url).data['unread_count'], 3)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(self.unread_count(), 3)
+
+    async def receive_count(self, consumer_class):
+        communicator = WebsocketCommunicator(consumer_class.as_asgi(), "/wss/notifications/")
+        communicator.scope['user'] = SimpleNamespace(id=self.user.pk, email=self.user.email)
+        await communicator.connect()
+        for count in (1, 2, 3):
+            await get_channel_layer().group_send(
+                f"notification_user_{self.user.pk}", {"type": "notification.unread_count", "unread_count": count}
+            )
+        frames = []
+        while True:
+            try:
+                frames.append(json.loads(await communicator.receive_from(timeout=0.3)))
+            except asyncio.TimeoutError:
+                break
+        await communicator.disconnect()
+        return frames
+
+    @override_settings(NOTIFICATION_BATCH_WINDOW=0.05)
+    def test_count_changes_are_pushed_over_websocket(self):
+        plain = async_to_sync(self.receive_count)(NotificationConsumer)
+        self.assertEqual([frame['unread_count'] for frame in plain], [1, 2, 3])
+        # The batched consumer only sends the latest count.
+        batched = async_to_sync(self.receive_count)(BatchedNotificationConsumer)
+        self.assertEqual(batched, [{'type': 'unread_count', 'unread_count': 3}])
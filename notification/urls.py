@@ -9,4 +9,5 @@ urlpatterns = [
     path('notifications/', views.NotificationListView.as_view(), name='notification-list'),
     path('notifications/<int:pk>/', views.NotificationDetailView.as_view(), name='notification-detail'),
     path('notifications/mark_all_read/', views.mark_all_notifications_read, name='mark-all-notifications-read'),
+    path('notifications/unread-count/', views.unread_notification_count, name='notification-unread-count'),
 ]
\ No newline at end of file
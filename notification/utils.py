@@ -0,0 +1,125 @@
+import asyncio
+import logging
+
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+async def _group_send_many(channel_layer, group_names, event):
+    await asyncio.gather(*(channel_layer.group_send(group_name, event) for group_name in group_names))
+
+
+def push_to_users(user_ids, event):
+    """
+    Send the same Channels event to the `notification_user_{id}` group of every
+    user in `user_ids`, concurrently and with a single sync-to-async hop.
+    """
+    group_names = [f"notification_user_{user_id}" for user_id in user_ids]
+    if not group_names:
+        return
+    try:
+        async_to_sync(_group_send_many)(get_channel_layer(), group_names, event)
+    except Exception as e:
+        # Log the error and continue; the notifications are already stored.
+        logger.error(f"Failed to send real-time notifications: {e}")
+
+
+def notify_users(user_ids, message, link=None, title="New Notification"):
+    """
+    Create one Notification per user with a single bulk INSERT and push it to
+    each user's WebSocket group. Returns the created notifications.
+
+    bulk_create() skips post_save, so `broadcast_notification` doesn't fire once
+    per row; the real-time push happens here instead.
+    """
+    user_ids = list(user_ids)
+    notifications = Notification.objects.bulk_create(
+        [Notification(user_id=user_id, message=message, link=link) for user_id in user_ids],
+        batch_size=500
+    )
+    push_to_users(user_ids, {
+        "type": "notification.message",
+        "title": title,
+        "message": message,
+        "link": link or "",
+    })
+    adjust_unread_counts(Counter(user_ids))
+    return notifications
+
+
+def unread_count_key(user_id):
+    return f"notification:unread:{user_id}"
+
+
+def _count_unread(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def _unread_count_timeout():
+    # Bounded so a count that drifted (e.g. after raw SQL) heals itself.
+    return getattr(settings, 'NOTIFICATION_UNREAD_COUNT_TIMEOUT', 3600)
+
+
+def get_unread_count(user_id):
+    """
+    Return the user's unread notification count from the cache, counting
+    the table only when the cached value is missing.
+    """
+    count = cache.get(unread_count_key(user_id))
+    if count is None:
+        count = _count_unread(user_id)
+        cache.add(unread_count_key(user_id), count, timeout=_unread_count_timeout())
+    return count
+
+
+def push_unread_counts(counts):
+    """
+    Send each user in {user_id: count} their new unread count over WebSocket.
+    """
+    for user_id, count in counts.items():
+        push_to_users([user_id], {"type": "notification.unread_count", "unread_count": count})
+
+
+def _apply_unread_deltas(deltas):
+    counts = {}
+    for user_id, delta in deltas.items():
+        key = unread_count_key(user_id)
+        try:
+            count = cache.incr(key, delta)
+        except ValueError:
+            count = None
+        if count is None or count < 0:
+            # Not cached (or gone wrong): take the committed figure from the table.
+            count = _count_unread(user_id)
+            cache.set(key, count, timeout=_unread_count_timeout())
+        counts[user_id] = count
+    push_unread_counts(counts)
+
+
+def adjust_unread_counts(deltas):
+    """
+    Apply {user_id: delta} to the cached unread counts once the current
+    transaction commits, and push the new counts to the users.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply_unread_deltas(deltas))
+
+
+def reset_unread_count(user_id):
+    """
+    Record that the user has no unread notifications (after "mark all read").
+    """
+    def reset():
+        cache.set(unread_count_key(user_id), 0, timeout=_unread_count_timeout())
+        push_unread_counts({user_id: 0})
+    transaction.on_commit(reset)
@@ -6,6 +6,7 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
 from rest_framework.decorators import api_view, permission_classes
 from .serializers import NotificationSerializer
 from .models import Notification
+from .utils import get_unread_count, reset_unread_count
 
 
 
@@ -139,4 +140,37 @@ def mark_all_notifications_read(request):
     if not user.is_authenticated:
         return Response({'detail': 'Authentication required.'}, status=status.HTTP_401_UNAUTHORIZED)
     Notification.objects.filter(user=user, is_read=False).update(is_read=True)
-    return Response({'detail': 'All notifications marked as read.'}, status=status.HTTP_200_OK)
\ No newline at end of file
+    reset_unread_count(user.pk)
+    return Response({'detail': 'All notifications marked as read.'}, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    methods=['GET'],
+    summary="Unread Notification Count",
+    description=(
+        "Number of unread notifications for the authenticated user, for badges. Served from a "
+        "cached per-user counter; connected WebSocket clients also receive "
+        "{\"type\": \"unread_count\", \"unread_count\": n} whenever it changes."
+    ),
+    responses={
+        200: OpenApiResponse(
+            description="Unread count retrieved successfully.",
+            response={
+                "type": "object",
+                "properties": {
+                    "unread_count": {"type": "integer"}
+                }
+            },
+            examples=[OpenApiExample(
+                "Unread Count",
+                value={"unread_count": 3},
+                response_only=True
+            )]
+        )
+    },
+    tags=["Notifications"]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def unread_notification_count(request):
+    return Response({'unread_count': get_unread_count(request.user.pk)}, status=status.HTTP_200_OK)